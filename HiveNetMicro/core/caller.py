@@ -91,6 +91,7 @@ class RemoteCaller(object):
             ip {str} - 访问主机ip, is_fixed_config为True时应设置
             port {int} - 访问主机端口, is_fixed_config为True时应设置
             naming {str} - 注册中心适配器名(application.yaml中namings配置中的适配器), 不传代表使用系统默认的命名适配器
+            locality {dict} - 从注册中心就近选择实例的参数, 不传代表不考虑实例位置, 参数详见NamingAdapter.get_instance
             formater {str} - 该服务使用的请求报文转换插件标识
             enable_tracer {bool} - 是否启用调用链, 默认为false
             tracer_inject_format {str} - 调用链上下文传递格式化类型, 默认为'http_headers'
@@ -113,6 +114,7 @@ class RemoteCaller(object):
             'port': 80,
             'naming': None,
             'naming_subscribe_interval': 5.0,
+            'locality': None,
             'formater': None,
             'enable_tracer': False
         }
@@ -466,10 +468,14 @@ class RemoteCaller(object):
         if not _instance_ok:
             # 本地获取不到, 通过远程获取
             _naming_adapter = self._get_naming_adapter(_instance_info.get('naming', None))
+            _kwargs = {'group_name': _instance_info.get('group_name', None)}
+            if _instance_info.get('locality', None) is not None:
+                # 仅在远程服务配置了就近选择时传入, 兼容未支持该参数的命名服务适配器
+                _kwargs['locality'] = _instance_info['locality']
+
             _service_info = await AsyncTools.async_run_coroutine(
                 _naming_adapter.get_instance(
-                    _instance_info.get('service_name', None),
-                    group_name=_instance_info.get('group_name', None)
+                    _instance_info.get('service_name', None), **_kwargs
                 )
             )
 
@@ -1,16 +1,19 @@
 # -*- coding=utf-8 -*-
 import base64
+import gzip
 import hashlib
+import io
 import logging
+import os
 import socket
+import threading
 import json
 import platform
 import time
 import hmac
+import asyncio
 import traceback
 
-from pyrsistent import b
-
 try:
     import ssl
 except ImportError:
@@ -18,27 +21,27 @@ except ImportError:
 
 from multiprocessing import Process, Manager, Queue, pool
 from threading import RLock, Thread
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
 
 try:
     # python3.6
     from http import HTTPStatus
-    from urllib.request import Request, urlopen, ProxyHandler, HTTPSHandler, build_opener
+    from urllib.request import Request, ProxyHandler, HTTPSHandler, build_opener
     from urllib.parse import urlencode, unquote_plus, quote
     from urllib.error import HTTPError, URLError
 except ImportError:
     # python2.7
     import httplib as HTTPStatus
-    from urllib2 import Request, urlopen, HTTPError, URLError, ProxyHandler, HTTPSHandler, build_opener
+    from urllib2 import Request, HTTPError, URLError, ProxyHandler, HTTPSHandler, build_opener
     from urllib import urlencode, unquote_plus, quote
 
     base64.encodebytes = base64.encodestring
 
-from .commons import synchronized_with_attr, truncate, python_version_bellow
+from .commons import synchronized_with_attr, truncate
 from .params import group_key, parse_key, is_valid
 from .files import read_file_str, save_file, delete_file
 from .exception import NacosException, NacosRequestException
 from .listener import Event, SimpleListenerManager
-from .timer import NacosTimer, NacosTimerManager
 
 # lhj: 添加异步执行所需的依赖库
 try:
@@ -57,6 +60,9 @@ VERSION = "0.1.7"
 DEFAULT_GROUP_NAME = "DEFAULT_GROUP"
 DEFAULT_NAMESPACE = ""
 
+# lhj: 表单请求的内容类型
+FORM_CONTENT_TYPE = "application/x-www-form-urlencoded"
+
 WORD_SEPARATOR = u'\x02'
 LINE_SEPARATOR = u'\x01'
 
@@ -68,6 +74,19 @@ DEFAULTS = {
     "CALLBACK_THREAD_NUM": 10,
     "FAILOVER_BASE": "nacos-data/data",
     "SNAPSHOT_BASE": "nacos-data/snapshot",
+    # lhj: 服务订阅轮询的参数
+    "SUBSCRIBE_CONCURRENCY": 16,  # 同时执行的订阅查询请求数
+    "SUBSCRIBE_UDP_PUSH": False,  # 是否启用nacos服务端的UDP推送
+    "SUBSCRIBE_UDP_PORT": 0,  # UDP推送的监听端口, 0代表随机端口
+    "SUBSCRIBE_CLIENT_IP": None,  # 接收UDP推送的本机地址, 不设置则自动获取
+    # lhj: 请求传输层的参数
+    "TRANSPORT_POOL_SIZE": 10,  # 异步请求每个事件循环的连接池大小
+    "TRANSPORT_EWMA_DECAY": 0.3,  # 服务端响应时长指数加权移动平均的衰减系数
+    "TRANSPORT_EJECT_FAILURES": 3,  # 服务端连续失败多少次后暂时剔除
+    "TRANSPORT_EJECT_TIME": 10,  # 服务端剔除的基础时长(连续失败时翻倍), 单位为秒
+    "TRANSPORT_EJECT_MAX_TIME": 120,  # 服务端剔除的最大时长, 单位为秒
+    "TRANSPORT_RETRY_RATIO": 0.2,  # 重试预算, 每个请求可增加的重试次数
+    "TRANSPORT_RETRY_MAX": 10,  # 重试预算的最大累积次数
 }
 
 OPTIONS = {"default_timeout", "pulling_timeout", "pulling_config_size", "callback_thread_num", "failover_base",
@@ -124,10 +143,270 @@ class SubscribedLocalInstance(object):
     def __init__(self, key, instance):
         self.key = key
         self.instance_id = instance["instanceId"]
-        self.md5 = NacosClient.get_md5(str(instance))
+        # lhj: 直接通过字典比较判断实例是否变更, 无需计算md5
         self.instance = instance
 
 
+class SubscribeTask(object):
+    """
+    服务订阅任务
+    """
+
+    def __init__(self, key, interval, args, kwargs):
+        """
+        构造函数
+
+        @param {str} key - 订阅标识(服务名)
+        @param {float} interval - 轮询间隔, 单位为秒
+        @param {tuple} args - 获取服务实例清单的固定位置入参
+        @param {dict} kwargs - 获取服务实例清单的key-value入参
+        """
+        self.key = key
+        self.interval = interval
+        self.args = args
+        self.kwargs = kwargs
+        self.grouped_name = "%s@@%s" % (kwargs.get("group_name", None) or DEFAULT_GROUP_NAME, key)
+        self.first_sub = True  # 第一次获取不通知
+        self.running = False  # 是否正在执行查询
+        self.next_time = 0  # 下一次执行的时间(time.monotonic)
+
+
+class SubscribePushProtocol(asyncio.DatagramProtocol):
+    """
+    接收nacos服务端UDP推送的协议
+    """
+
+    def __init__(self, poller):
+        self.poller = poller
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.poller.deal_push(data, addr, self.transport)
+
+
+class SubscribePoller(object):
+    """
+    服务订阅的批量轮询处理
+    注: 每个客户端只有一个轮询线程, 所有订阅任务在同一个事件循环中执行, 共享同一个http连接池;
+        如果启用UDP推送, 服务端推送的变更将立即处理, 轮询作为推送丢失时的兜底
+    """
+
+    def __init__(self, client):
+        """
+        构造函数
+
+        @param {NacosClient} client - nacos客户端
+        """
+        self.client = client
+        self.tasks = dict()  # 订阅任务, key为订阅标识
+        self.udp_port = None  # UDP推送的监听端口
+        self.client_ip = None  # 接收UDP推送的本机地址
+        self._lock = RLock()
+        self._thread = None
+        self._loop = None
+        self._wakeup = None
+        self._stopped = False
+
+    def add_task(self, task):
+        """
+        添加订阅任务
+
+        @param {SubscribeTask} task - 订阅任务
+        """
+        _thread = self._thread
+        if _thread is not None and self._stopped and _thread.is_alive():
+            # 等待已停止的轮询线程退出
+            self._notify()
+            _thread.join()
+
+        with self._lock:
+            self.tasks[task.key] = task
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = Thread(target=self._run, name="nacos-subscribe-poller", daemon=True)
+                self._thread.start()
+
+        self._notify()
+
+    def remove_task(self, key):
+        """
+        删除订阅任务
+
+        @param {str} key - 订阅标识
+        """
+        with self._lock:
+            self.tasks.pop(key, None)
+
+    def stop(self):
+        """
+        停止轮询
+        """
+        with self._lock:
+            self.tasks.clear()
+            self._stopped = True
+
+        self._notify()
+
+    def deal_push(self, data, addr, transport):
+        """
+        处理服务端的UDP推送
+
+        @param {bytes} data - 推送数据
+        @param {tuple} addr - 推送方地址
+        @param {DatagramTransport} transport - 用于返回应答的连接
+        """
+        try:
+            if data[0:2] == b"\x1f\x8b":
+                data = gzip.decompress(data)
+            push = json.loads(data.decode("UTF-8"))
+            ack = {"type": "unknown-ack", "lastRefTime": push.get("lastRefTime", 0), "data": ""}
+            if push.get("type", None) in ("dom", "service"):
+                ack["type"] = "push-ack"
+                info = json.loads(push["data"])
+                name = info.get("name", None) or info.get("dom", None)
+                with self._lock:
+                    task = None
+                    for item in self.tasks.values():
+                        if item.grouped_name == name or item.key == name:
+                            task = item
+                            break
+                if task is not None and not task.first_sub:
+                    logger.debug("[subscribe-push] receive push of %s" % name)
+                    self.client._deal_subscribe_hosts(task, info.get("hosts", None) or [])
+            elif push.get("type", None) == "dump":
+                ack["type"] = "dump-ack"
+
+            transport.sendto(json.dumps(ack).encode("UTF-8"), addr)
+        except Exception:
+            logger.exception("[subscribe-push] deal push data error")
+
+    def _notify(self):
+        """
+        唤醒轮询循环
+        """
+        _loop = self._loop
+        if _loop is not None and self._wakeup is not None:
+            try:
+                _loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+
+    def _run(self):
+        """
+        轮询线程的执行函数
+        """
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+        self._loop = _loop
+        try:
+            _loop.run_until_complete(self._poll_forever())
+        except Exception:
+            logger.exception("[subscribe-poller] poller stopped with error")
+        finally:
+            self._loop = None
+            self._wakeup = None
+            _loop.close()
+
+    async def _poll_forever(self):
+        """
+        轮询处理的主循环
+        """
+        self._wakeup = asyncio.Event()
+        _concurrency = DEFAULTS["SUBSCRIBE_CONCURRENCY"]
+        _semaphore = asyncio.Semaphore(_concurrency)
+        _transport = None
+        if DEFAULTS["SUBSCRIBE_UDP_PUSH"]:
+            _transport = await self._start_push_receiver()
+
+        try:
+            async with aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=_concurrency, enable_cleanup_closed=True)
+            ) as session:
+                while not self._stopped:
+                    self._wakeup.clear()
+                    _now = time.monotonic()
+                    with self._lock:
+                        _tasks = list(self.tasks.values())
+
+                    _next_time = _now + 60
+                    for task in _tasks:
+                        if task.running:
+                            continue
+                        if task.next_time <= _now:
+                            task.running = True
+                            asyncio.ensure_future(self._poll_task(task, session, _semaphore))
+                        else:
+                            _next_time = min(_next_time, task.next_time)
+
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=max(_next_time - _now, 0.01))
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            if _transport is not None:
+                _transport.close()
+
+    async def _poll_task(self, task, session, semaphore):
+        """
+        执行一次订阅查询
+
+        @param {SubscribeTask} task - 订阅任务
+        @param {aiohttp.ClientSession} session - 共享的http会话
+        @param {asyncio.Semaphore} semaphore - 控制并发数的信号量
+        """
+        try:
+            async with semaphore:
+                latest_res = await self.client.async_list_naming_instance(
+                    *task.args, session=session, udp_port=self.udp_port, client_ip=self.client_ip, **task.kwargs
+                )
+            if task.key in self.tasks:
+                self.client._deal_subscribe_hosts(task, latest_res.get("hosts", None) or [])
+        except Exception:
+            logger.exception("[subscribe-poller] poll service %s error" % task.key)
+        finally:
+            task.running = False
+            task.next_time = time.monotonic() + task.interval
+            self._wakeup.set()
+
+    async def _start_push_receiver(self):
+        """
+        启动UDP推送的监听
+
+        @returns {DatagramTransport} - 监听连接, 启动失败返回None
+        """
+        try:
+            self.client_ip = DEFAULTS["SUBSCRIBE_CLIENT_IP"] or self._get_local_ip()
+            _transport, _ = await asyncio.get_event_loop().create_datagram_endpoint(
+                lambda: SubscribePushProtocol(self), local_addr=("0.0.0.0", DEFAULTS["SUBSCRIBE_UDP_PORT"])
+            )
+            self.udp_port = _transport.get_extra_info("sockname")[1]
+            logger.info("[subscribe-push] listen udp push on %s:%s" % (self.client_ip, self.udp_port))
+            return _transport
+        except Exception:
+            logger.exception("[subscribe-push] start udp push receiver error, use polling only")
+            self.udp_port = None
+            return None
+
+    def _get_local_ip(self):
+        """
+        获取与nacos服务端通讯的本机地址
+
+        @returns {str} - 本机地址
+        """
+        address, port = self.client.server_list[0]
+        host = address.split("://")[-1]
+        _sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            _sock.connect((host, port))
+            return _sock.getsockname()[0]
+        finally:
+            _sock.close()
+
+
 class SubscribedLocalManager(object):
     def __init__(self):
         self.manager = {
@@ -225,6 +504,308 @@ def parse_nacos_server_addr(server_addr):
         return sp[0], port
 
 
+class NacosServerState(object):
+    """
+    nacos服务端的状态
+    """
+
+    def __init__(self, index, server_info):
+        """
+        构造函数
+
+        @param {int} index - 服务端在地址清单中的位置
+        @param {tuple} server_info - 服务端地址信息(address, port)
+        """
+        self.index = index
+        self.server_info = server_info
+        address, port = server_info
+        self.server = ":".join([address, str(port)])
+        self.url = self.server if self.server.startswith("http") else "http://%s" % self.server
+        self.is_https = self.url.startswith("https")
+        self.host = address.split("://")[-1]
+        self.port = port
+        self.ewma = 0.0  # 响应时长的指数加权移动平均, 单位为秒
+        self.failures = 0  # 连续失败次数
+        self.eject_until = 0  # 剔除的截止时间(time.monotonic)
+
+
+class NacosSyncResponse(object):
+    """
+    同步请求的响应对象(兼容urlopen返回对象的常用方法)
+    """
+
+    def __init__(self, status, headers, content):
+        self.status = status
+        self.headers = headers
+        self._content = content
+
+    def getcode(self):
+        return self.status
+
+    def read(self):
+        return self._content
+
+
+class NacosTransport(object):
+    """
+    nacos客户端的请求传输层
+    注: 1、异步请求在每个事件循环中使用一个常驻的会话(连接池), 同步请求在每个线程中对每个服务端保持长连接;
+        2、按响应时长的指数加权移动平均选择服务端, 连续失败的服务端暂时剔除(剔除时长按失败次数翻倍);
+        3、通过重试预算限制服务端故障时的重试数量, 避免放大服务端压力
+    """
+
+    def __init__(self, server_list):
+        """
+        构造函数
+
+        @param {list} server_list - 服务端地址清单, 每个元素为(address, port)
+        """
+        self.servers = [NacosServerState(_index, _info) for _index, _info in enumerate(server_list)]
+        self.ssl_context = ssl.SSLContext() if ssl is not None else None
+        self._lock = RLock()
+        self._retry_tokens = float(DEFAULTS["TRANSPORT_RETRY_MAX"])
+        self._pid = os.getpid()
+        self._sessions = dict()  # 异步会话, key为事件循环对象
+        self._local = threading.local()  # 同步请求的长连接, 每个线程独立
+
+    #############################
+    # 服务端选择
+    #############################
+    def select(self):
+        """
+        获取本次请求的服务端尝试顺序
+
+        @returns {list} - 服务端状态清单, 可用的服务端按(是否有连续失败, 响应时长)排序在前, 被剔除的服务端按剔除截止时间排序在后
+        """
+        _now = time.monotonic()
+        with self._lock:
+            _available = [_state for _state in self.servers if _state.eject_until <= _now]
+            _ejected = [_state for _state in self.servers if _state.eject_until > _now]
+        # 近期失败过的服务端排在后面
+        _available.sort(key=lambda _state: (_state.failures > 0, _state.ewma, _state.index))
+        _ejected.sort(key=lambda _state: _state.eject_until)
+        return _available + _ejected
+
+    def record_success(self, state, latency):
+        """
+        记录服务端请求成功
+
+        @param {NacosServerState} state - 服务端状态
+        @param {float} latency - 请求时长, 单位为秒
+        """
+        _decay = DEFAULTS["TRANSPORT_EWMA_DECAY"]
+        with self._lock:
+            state.ewma = latency if state.ewma == 0.0 else (state.ewma * (1 - _decay) + latency * _decay)
+            state.failures = 0
+            state.eject_until = 0
+
+    def record_failure(self, state):
+        """
+        记录服务端请求失败, 连续失败达到阈值时剔除该服务端
+
+        @param {NacosServerState} state - 服务端状态
+        """
+        with self._lock:
+            state.failures += 1
+            _over = state.failures - DEFAULTS["TRANSPORT_EJECT_FAILURES"]
+            if _over >= 0:
+                _eject_time = min(
+                    DEFAULTS["TRANSPORT_EJECT_TIME"] * (2 ** min(_over, 16)), DEFAULTS["TRANSPORT_EJECT_MAX_TIME"]
+                )
+                state.eject_until = time.monotonic() + _eject_time
+                logger.warning("[transport] server %s ejected for %s seconds after %d failures" % (
+                    state.server, _eject_time, state.failures))
+
+    def deposit_retry(self):
+        """
+        每次请求时增加重试预算
+        """
+        with self._lock:
+            self._retry_tokens = min(
+                self._retry_tokens + DEFAULTS["TRANSPORT_RETRY_RATIO"], DEFAULTS["TRANSPORT_RETRY_MAX"]
+            )
+
+    def acquire_retry(self):
+        """
+        获取一次重试的预算
+
+        @returns {bool} - 是否允许重试
+        """
+        with self._lock:
+            if self._retry_tokens >= 1:
+                self._retry_tokens -= 1
+                return True
+            return False
+
+    #############################
+    # 连接管理
+    #############################
+    def get_session(self):
+        """
+        获取当前事件循环的常驻异步会话(需在协程中调用)
+
+        @returns {aiohttp.ClientSession} - 异步会话
+        """
+        _loop = asyncio.get_event_loop()
+        with self._lock:
+            self._check_fork()
+            # 取出已关闭的事件循环对应的会话
+            _orphans = [
+                self._sessions.pop(_item) for _item in list(self._sessions.keys()) if _item.is_closed()
+            ]
+
+            _session = self._sessions.get(_loop, None)
+            if _session is None or _session.closed:
+                _session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(
+                        limit=DEFAULTS["TRANSPORT_POOL_SIZE"], enable_cleanup_closed=True
+                    )
+                )
+                self._sessions[_loop] = _session
+
+        for _orphan in _orphans:
+            self._close_orphan_session(_orphan)
+        return _session
+
+    async def close_session(self):
+        """
+        关闭当前事件循环的异步会话
+        """
+        with self._lock:
+            _session = self._sessions.pop(asyncio.get_event_loop(), None)
+        if _session is not None:
+            await _session.close()
+
+    def sync_request(self, state, method, url, headers, body, timeout):
+        """
+        使用长连接执行同步请求
+
+        @param {NacosServerState} state - 服务端状态
+        @param {str} method - 请求方法
+        @param {str} url - 请求路径(含查询参数)
+        @param {dict} headers - 请求头
+        @param {bytes} body - 请求内容
+        @param {float} timeout - 超时时间, 单位为秒
+
+        @returns {NacosSyncResponse} - 响应对象
+
+        @throws {HTTPError} - 响应状态码不小于400时抛出
+        """
+        if body is not None and not any(_key.lower() == "content-type" for _key in headers.keys()):
+            # http.client不会自动添加表单的内容类型(urllib会), 否则nacos将无法解析表单参数
+            headers = dict(headers)
+            headers["Content-Type"] = FORM_CONTENT_TYPE
+
+        _conn, _reused = self._get_sync_conn(state, timeout)
+        try:
+            _conn.request(method, url, body=body, headers=headers)
+            _resp = _conn.getresponse()
+            _content = _resp.read()
+        except (HTTPException, ConnectionError) as e:
+            self._drop_sync_conn(state)
+            if not _reused:
+                raise
+            # 复用的长连接可能已被服务端关闭, 使用新连接重试一次
+            logger.debug("[transport] reused connection to %s broken: %s, reconnect" % (state.server, str(e)))
+            _conn, _reused = self._get_sync_conn(state, timeout)
+            try:
+                _conn.request(method, url, body=body, headers=headers)
+                _resp = _conn.getresponse()
+                _content = _resp.read()
+            except Exception:
+                self._drop_sync_conn(state)
+                raise
+        except Exception:
+            self._drop_sync_conn(state)
+            raise
+
+        if _resp.will_close:
+            self._drop_sync_conn(state)
+
+        if _resp.status >= 400:
+            raise HTTPError(state.url + url, _resp.status, _resp.reason, _resp.headers, io.BytesIO(_content))
+
+        return NacosSyncResponse(_resp.status, _resp.headers, _content)
+
+    def _get_sync_conn(self, state, timeout):
+        """
+        获取当前线程到指定服务端的长连接
+
+        @param {NacosServerState} state - 服务端状态
+        @param {float} timeout - 超时时间, 单位为秒
+
+        @returns {tuple} - (连接对象, 是否复用的连接)
+        """
+        with self._lock:
+            self._check_fork()
+        _conns = getattr(self._local, "conns", None)
+        if _conns is None or self._local.pid != self._pid:
+            _conns = self._local.conns = dict()
+            self._local.pid = self._pid
+
+        _conn = _conns.get(state.index, None)
+        _reused = _conn is not None
+        if _conn is None:
+            if state.is_https:
+                _conn = HTTPSConnection(state.host, state.port, timeout=timeout, context=self.ssl_context)
+            else:
+                _conn = HTTPConnection(state.host, state.port, timeout=timeout)
+            _conns[state.index] = _conn
+        else:
+            _conn.timeout = timeout
+            if _conn.sock is not None:
+                _conn.sock.settimeout(timeout)
+        return _conn, _reused
+
+    def _drop_sync_conn(self, state):
+        """
+        关闭并删除当前线程到指定服务端的长连接
+
+        @param {NacosServerState} state - 服务端状态
+        """
+        _conns = getattr(self._local, "conns", None)
+        if _conns is not None:
+            _conn = _conns.pop(state.index, None)
+            if _conn is not None:
+                _conn.close()
+
+    def _close_orphan_session(self, session):
+        """
+        关闭事件循环已关闭的异步会话
+        注: 原事件循环已关闭, 无法在其中等待会话关闭, 先断开会话持有的连接, 再通过临时事件循环关闭会话释放连接器
+
+        @param {aiohttp.ClientSession} session - 异步会话
+        """
+        if session.closed:
+            return
+
+        try:
+            for _protos in list(getattr(session.connector, "_conns", {}).values()):
+                for _proto, _ in _protos:
+                    _sock = None if _proto.transport is None else _proto.transport.get_extra_info("socket")
+                    if _sock is not None:
+                        try:
+                            _sock.shutdown(socket.SHUT_RDWR)
+                        except OSError:
+                            pass
+
+            # 当前线程可能正在运行事件循环, 在独立线程中执行会话的关闭
+            _thread = Thread(target=asyncio.run, args=(session.close(),), name="nacos-transport-close-session")
+            _thread.start()
+            _thread.join()
+        except Exception:
+            logger.warning("[transport] close orphan session error: %s" % traceback.format_exc())
+
+    def _check_fork(self):
+        """
+        检查是否在fork出来的子进程中, 如果是则丢弃从父进程继承的连接
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._sessions = dict()
+            self._local = threading.local()
+
+
 class NacosClient:
     debug = False
 
@@ -264,10 +845,12 @@ class NacosClient:
 
         self.server_list_lock = RLock()
         self.server_offset = 0
+        # lhj: 请求传输层, 负责连接复用和服务端选择
+        self.transport = NacosTransport(self.server_list)
 
         self.watcher_mapping = dict()
         self.subscribed_local_manager = SubscribedLocalManager()
-        self.subscribe_timer_manager = NacosTimerManager()
+        self.subscribe_poller = SubscribePoller(self)
         self.pulling_lock = RLock()
         self.puller_mapping = None
         self.notify_queue = None
@@ -302,6 +885,8 @@ class NacosClient:
             self.current_server = self.server_list[self.server_offset]
 
     def get_server(self):
+        # lhj: 按传输层的服务端状态选择
+        self.current_server = self.transport.select()[0].server_info
         logger.info("[get-server] use server:%s" % str(self.current_server))
         return self.current_server
 
@@ -622,64 +1207,54 @@ class NacosClient:
         all_headers = self._get_common_headers(params, data)
         if headers:
             all_headers.update(headers)
+        timeout = timeout or self.default_timeout
         logger.debug(
             "[do-sync-req] url:%s, headers:%s, params:%s, data:%s, timeout:%s" % (
                 url, all_headers, params, data, timeout))
-        tries = 0
-        while True:
+        body = urlencode(data).encode() if data else None
+        # lhj: 通过传输层选择服务端并复用长连接, 重试受重试预算限制
+        self.transport.deposit_retry()
+        server = None
+        for tries, state in enumerate(self.transport.select()):
+            if tries > 0 and not self.transport.acquire_retry():
+                logger.error("[do-sync-req] retry budget exhausted, last server:%s" % server)
+                raise NacosRequestException("Retry budget exhausted")
+            server = state.server
+            start_time = time.monotonic()
             try:
-                server_info = self.get_server()
-                if not server_info:
-                    logger.error("[do-sync-req] can not get one server.")
-                    raise NacosRequestException("Server is not available.")
-                address, port = server_info
-                server = ":".join([address, str(port)])
-                server_url = server
-                if not server_url.startswith("http"):
-                    server_url = "%s://%s" % ("http", server)
-                if python_version_bellow("3"):
-                    req = Request(url=server_url + url, data=urlencode(data).encode() if data else None,
-                                  headers=all_headers)
-                    req.get_method = lambda: method
-                    ctx = ssl.create_default_context()
-                    ctx.check_hostname = False
-                    ctx.verify_mode = ssl.CERT_NONE
-                else:
-                    req = Request(url=server_url + url, data=urlencode(data).encode() if data else None,
-                                  headers=all_headers, method=method)
-                    ctx = ssl.SSLContext()
-                # build a new opener that adds proxy setting so that http request go through the proxy
                 if self.proxies:
-                    proxy_support = ProxyHandler(self.proxies)
-                    https_support = HTTPSHandler(context=ctx)
-                    opener = build_opener(proxy_support, https_support)
+                    # build a new opener that adds proxy setting so that http request go through the proxy
+                    req = Request(url=state.url + url, data=body, headers=all_headers, method=method)
+                    opener = build_opener(ProxyHandler(self.proxies), HTTPSHandler(context=self.transport.ssl_context))
                     resp = opener.open(req, timeout=timeout)
                 else:
-                    # for python version compatibility
-                    if python_version_bellow("2.7.5"):
-                        resp = urlopen(req, timeout=timeout)
-                    else:
-                        resp = urlopen(req, timeout=timeout, context=ctx)
+                    resp = self.transport.sync_request(state, method, url, all_headers, body, timeout)
+                self.transport.record_success(state, time.monotonic() - start_time)
                 logger.debug("[do-sync-req] info from server:%s" % server)
                 return resp
             except HTTPError as e:
                 if e.code in [HTTPStatus.INTERNAL_SERVER_ERROR, HTTPStatus.BAD_GATEWAY,
                               HTTPStatus.SERVICE_UNAVAILABLE]:
                     logger.warning("[do-sync-req] server:%s is not available for reason:%s" % (server, e.msg))
+                    self.transport.record_failure(state)
                 else:
+                    self.transport.record_success(state, time.monotonic() - start_time)
                     raise
             except socket.timeout:
                 logger.warning("[do-sync-req] %s request timeout" % server)
+                self.transport.record_failure(state)
             except URLError as e:
                 logger.warning("[do-sync-req] %s connection error:%s" % (server, e.reason))
+                self.transport.record_failure(state)
+            except (HTTPException, OSError) as e:
+                logger.warning("[do-sync-req] %s connection error:%s" % (server, str(e)))
+                self.transport.record_failure(state)
 
-            tries += 1
-            if tries >= len(self.server_list):
-                logger.error("[do-sync-req] %s maybe down, no server is currently available" % server)
-                raise NacosRequestException("All server are not available")
-            self.change_server()
             logger.warning("[do-sync-req] %s maybe down, skip to next" % server)
 
+        logger.error("[do-sync-req] %s maybe down, no server is currently available" % server)
+        raise NacosRequestException("All server are not available")
+
     def _do_pulling(self, cache_list, queue):
         cache_pool = dict()
         for cache_key in cache_list:
@@ -1064,61 +1639,46 @@ class NacosClient:
                 raise NacosException("`service_name` is required in subscribe")
         self.subscribed_local_manager.add_local_listener(key=service_name, listener_fn=listener_fn)
 
-        #  判断是否是第一次订阅调用
-        class _InnerSubContext(object):
-            first_sub = True
-
-        def _compare_and_trigger_listener():
-            #  invoke `list_naming_instance`
-            latest_res = self.list_naming_instance(*args, **kwargs)
-            latest_instances = latest_res['hosts']
-            #  获取本地缓存实例
-            local_service_instances_dict = self.subscribed_local_manager.get_local_instances(service_name)
-            #  当前本地没有缓存，所有都是新的实例
-            if not local_service_instances_dict:
-                if not latest_instances or len(latest_instances) < 1:
-                    #  第一次订阅调用不通知
-                    if _InnerSubContext.first_sub:
-                        _InnerSubContext.first_sub = False
-                        return
-                for instance in latest_instances:
-                    slc = SubscribedLocalInstance(key=service_name, instance=instance)
-                    self.subscribed_local_manager.add_local_instance(slc)
-                    #  第一次订阅调用不通知
-                    if _InnerSubContext.first_sub:
-                        _InnerSubContext.first_sub = False
-                        return
-                    self.subscribed_local_manager.do_listener_launch(service_name, Event.ADDED, slc)
-            else:
-                local_service_instances_dict_copy = local_service_instances_dict.copy()
-                for instance in latest_instances:
-                    slc = SubscribedLocalInstance(key=service_name, instance=instance)
-                    local_slc = local_service_instances_dict.get(slc.instance_id)
-                    # 本地不存在实例缓存
-                    if local_slc is None:
-                        self.subscribed_local_manager.add_local_instance(slc)
-                        self.subscribed_local_manager.do_listener_launch(service_name, Event.ADDED, slc)
-                    # 本地存在实例缓存
-                    else:
-                        local_slc_md5 = local_slc.md5
-                        local_slc_id = local_slc.instance_id
-                        local_service_instances_dict_copy.pop(local_slc_id)
-                        # 比较md5,存在实例变更
-                        if local_slc_md5 != slc.md5:
-                            self.subscribed_local_manager.remove_local_instance(local_slc).add_local_instance(slc)
-                            self.subscribed_local_manager.do_listener_launch(service_name, Event.MODIFIED, slc)
-                #  still have instances in local marked deleted
-                if len(local_service_instances_dict_copy) > 0:
-                    for local_slc_id, slc in local_service_instances_dict_copy.items():
-                        self.subscribed_local_manager.remove_local_instance(slc)
-                        self.subscribed_local_manager.do_listener_launch(service_name, Event.DELETED, slc)
-
-        timer_name = 'service-subscribe-timer-{key}'.format(key=service_name)
-        subscribe_timer = NacosTimer(name=timer_name,
-                                     interval=listener_interval,
-                                     fn=_compare_and_trigger_listener)
-        subscribe_timer.scheduler()
-        self.subscribe_timer_manager.add_timer(subscribe_timer)
+        # lhj: 统一由订阅轮询对象在同一个事件循环中处理, 不再每个服务创建一个定时线程
+        if service_name not in self.subscribe_poller.tasks:
+            self.subscribe_poller.add_task(SubscribeTask(service_name, listener_interval, args, kwargs))
+
+    def _deal_subscribe_hosts(self, task, latest_instances):
+        """
+        比较服务的最新实例清单与本地缓存, 通知变更的实例
+
+        @param {SubscribeTask} task - 订阅任务
+        @param {list} latest_instances - 最新的实例清单
+        """
+        service_name = task.key
+        if task.first_sub:
+            #  第一次订阅调用不通知
+            task.first_sub = False
+            for instance in latest_instances:
+                self.subscribed_local_manager.add_local_instance(
+                    SubscribedLocalInstance(key=service_name, instance=instance)
+                )
+            return
+
+        local_service_instances_dict = self.subscribed_local_manager.get_local_instances(service_name)
+        local_service_instances_dict_copy = dict(local_service_instances_dict or {})
+        for instance in latest_instances:
+            local_slc = local_service_instances_dict_copy.pop(instance["instanceId"], None)
+            if local_slc is None:
+                # 本地不存在实例缓存
+                slc = SubscribedLocalInstance(key=service_name, instance=instance)
+                self.subscribed_local_manager.add_local_instance(slc)
+                self.subscribed_local_manager.do_listener_launch(service_name, Event.ADDED, slc)
+            elif local_slc.instance != instance:
+                # 本地存在实例缓存, 实例信息有变更
+                slc = SubscribedLocalInstance(key=service_name, instance=instance)
+                self.subscribed_local_manager.remove_local_instance(local_slc).add_local_instance(slc)
+                self.subscribed_local_manager.do_listener_launch(service_name, Event.MODIFIED, slc)
+
+        #  still have instances in local marked deleted
+        for slc in local_service_instances_dict_copy.values():
+            self.subscribed_local_manager.remove_local_instance(slc)
+            self.subscribed_local_manager.do_listener_launch(service_name, Event.DELETED, slc)
 
     def unsubscribe(self, service_name, listener_name=None):
         """
@@ -1132,15 +1692,20 @@ class NacosClient:
             return
         if listener_name:
             listener_manager.remove_listener(listener_name)
-            return
-        listener_manager.empty_listeners()
+        else:
+            listener_manager.empty_listeners()
+
+        # lhj: 没有监听的情况停止订阅查询
+        if len(listener_manager.all_listeners()) == 0:
+            self.subscribe_poller.remove_task(service_name)
+            self.subscribed_local_manager.manager.pop(service_name, None)
 
     def stop_subscribe(self):
         """
-        stop subscribe timer scheduler
+        stop subscribe poller
         :return:
         """
-        self.subscribe_timer_manager.stop()
+        self.subscribe_poller.stop()
 
     #############################
     # 扩展增加命名空间的处理
@@ -1327,9 +1892,10 @@ class NacosClient:
     #############################
     # 增加异步处理的支持
     #############################
-    async def _do_async_req(self, url, headers=None, params=None, data=None, timeout=None, method="GET"):
+    async def _do_async_req(self, url, headers=None, params=None, data=None, timeout=None, method="GET", session=None):
         """
         执行异步请求
+        注: 如果传入session将复用该会话的连接池, 否则使用传输层中当前事件循环的常驻会话
         """
         if self.username and self.password:
             if not params:
@@ -1339,58 +1905,64 @@ class NacosClient:
         all_headers = self._get_common_headers(params, data)
         if headers:
             all_headers.update(headers)
+        timeout = timeout or self.default_timeout
         logger.debug(
             "[do-async-req] url:%s, headers:%s, params:%s, data:%s, timeout:%s" % (
                 url, all_headers, params, data, timeout))
-        tries = 0
-        while True:
+        body = urlencode(data).encode() if data else None
+        if body is not None and not any(_key.lower() == "content-type" for _key in all_headers.keys()):
+            # aiohttp对bytes类型的内容默认使用application/octet-stream
+            all_headers["Content-Type"] = FORM_CONTENT_TYPE
+        _session = session if session is not None else self.transport.get_session()
+        self.transport.deposit_retry()
+        server = None
+        resp = None
+        for tries, state in enumerate(self.transport.select()):
+            if tries > 0 and not self.transport.acquire_retry():
+                logger.error("[do-async-req] retry budget exhausted, last server:%s" % server)
+                break
+            server = state.server
+            start_time = time.monotonic()
             try:
-                server_info = self.get_server()
-                if not server_info:
-                    logger.error("[do-async-req] can not get one server.")
-                    raise NacosRequestException("Server is not available.")
-                address, port = server_info
-                server = ":".join([address, str(port)])
-                server_url = server
-                if not server_url.startswith("http"):
-                    server_url = "%s://%s" % ("http", server)
-
-                # ssl证书上下文
-                ctx = ssl.SSLContext()
-
-                # 执行异步请求
-                async with aiohttp.ClientSession(
-                    headers=all_headers,
-                    timeout=aiohttp.ClientTimeout(total=timeout),
-                    connector=aiohttp.TCPConnector(enable_cleanup_closed=True),
-                ) as _session:
-                    async with _session.request(
-                        method, server_url + url,
-                        data=urlencode(data).encode() if data else None, ssl=ctx
-                    ) as _response:
-                        resp = {
-                            'status': _response.status,
-                            'msg': await _response.read()
-                        }
-                        logger.debug("[do-async-req] info from server[%s]: %s" % (server, _response))
-                        return resp
+                async with _session.request(
+                    method, state.url + url, headers=all_headers, timeout=aiohttp.ClientTimeout(total=timeout),
+                    data=body, ssl=self.transport.ssl_context
+                ) as _response:
+                    resp = {
+                        'status': _response.status,
+                        'msg': await _response.read()
+                    }
+                    logger.debug("[do-async-req] info from server[%s]: %s" % (server, _response))
+
+                if resp['status'] in [HTTPStatus.INTERNAL_SERVER_ERROR, HTTPStatus.BAD_GATEWAY,
+                                      HTTPStatus.SERVICE_UNAVAILABLE]:
+                    logger.warning("[do-async-req] server:%s is not available, status:%s" % (server, resp['status']))
+                    self.transport.record_failure(state)
+                else:
+                    self.transport.record_success(state, time.monotonic() - start_time)
+                    return resp
             except Exception as _err:
                 logger.warning(
                     "[do-async-req] server [%s] request error: %s\n %s" % (
                         server, str(_err), traceback.format_exc()
                     )
                 )
+                self.transport.record_failure(state)
 
-            tries += 1
-            if tries >= len(self.server_list):
-                logger.error("[do-async-req] %s maybe down, no server is currently available" % server)
-                raise NacosRequestException("All server are not available")
-            self.change_server()
             logger.warning("[do-async-req] %s maybe down, skip to next" % server)
 
-    async def async_send_heartbeat(self, service_name, ip, port, cluster_name=None, weight=1.0, metadata=None, ephemeral=True,group_name=DEFAULT_GROUP_NAME):
+        if resp is not None:
+            # 所有服务端都返回了服务端错误, 由调用方处理响应状态
+            return resp
+
+        logger.error("[do-async-req] %s maybe down, no server is currently available" % server)
+        raise NacosRequestException("All server are not available")
+
+    async def async_send_heartbeat(self, service_name, ip, port, cluster_name=None, weight=1.0, metadata=None, ephemeral=True,group_name=DEFAULT_GROUP_NAME,
+                                   session=None):
         """
         异步模式的发送心跳续约函数
+        注: 如果传入session将复用该会话的连接池
         """
         logger.info("[async-send-heartbeat] ip:%s, port:%s, service_name:%s, namespace:%s" % (ip, port, service_name,
                                                                                         self.namespace))
@@ -1422,7 +1994,8 @@ class NacosClient:
             params["namespaceId"] = self.namespace
 
         try:
-            resp = await self._do_async_req("/nacos/v1/ns/instance/beat", None, params, None, self.default_timeout, "PUT")
+            resp = await self._do_async_req("/nacos/v1/ns/instance/beat", None, params, None, self.default_timeout, "PUT",
+                                            session=session)
             if resp['status'] == 200:
                 c = resp['msg']
                 logger.info("[async-send-heartbeat] ip:%s, port:%s, service_name:%s, namespace:%s, server response:%s" %
@@ -1667,7 +2240,8 @@ class NacosClient:
             logger.exception("[async-remove-naming-instance] exception %s occur" % str(e))
             raise
 
-    async def async_list_naming_instance(self, service_name, clusters=None, namespace_id=None, group_name=None, healthy_only=False):
+    async def async_list_naming_instance(self, service_name, clusters=None, namespace_id=None, group_name=None, healthy_only=False,
+                                         session=None, udp_port=None, client_ip=None):
         """
         异步获取服务实例清单
         :param service_name:        服务名
@@ -1675,6 +2249,9 @@ class NacosClient:
         :param namespace_id:        命名空间ID
         :param group_name:          分组名
         :param healthy_only:         是否只返回健康实例   否，默认为false
+        :param session:             复用的aiohttp会话
+        :param udp_port:            接收服务端变更推送的UDP端口, 不传代表不接收推送
+        :param client_ip:           接收服务端变更推送的本机地址
         """
         logger.info("[async-list-naming-instance] service_name:%s, namespace:%s" % (service_name, self.namespace))
 
@@ -1694,8 +2271,14 @@ class NacosClient:
         if group_name:
             params['groupName'] = group_name
 
+        if udp_port:
+            params['udpPort'] = udp_port
+            params['clientIP'] = client_ip
+
         try:
-            resp = await self._do_async_req("/nacos/v1/ns/instance/list", None, params, None, self.default_timeout, "GET")
+            resp = await self._do_async_req(
+                "/nacos/v1/ns/instance/list", None, params, None, self.default_timeout, "GET", session=session
+            )
             if resp['status'] == 200:
                 c = resp['msg']
                 logger.info("[async-list-naming-instance] service_name:%s, namespace:%s, server response:%s" %
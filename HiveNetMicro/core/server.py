@@ -544,6 +544,22 @@ class ServerStarter(object):
                 ))
                 raise
 
+            _cache_options = _config.get('cache_options', None)
+            if _cache_options is not None:
+                # 开启结果缓存, 在报文处理修饰符内部添加, 确保缓存命中时仍执行报文检查和报文转换
+                _cache_options = copy.deepcopy(_cache_options)
+                _cache_adapter_id = _cache_options.pop('adapter', None)
+                _cache_adapter = self.adapter_manager.get_adapter('Cache', _cache_adapter_id)
+                if _cache_adapter is None:
+                    raise ModuleNotFoundError(_(
+                        'Cache adapter [$1] of service [$2] is not found', _cache_adapter_id, _name
+                    ))
+
+                if _cache_options.get('key_prefix', None) is None:
+                    _cache_options['key_prefix'] = _name
+
+                _service_func = _cache_adapter.get_wrapped_cached_func(_service_func, _cache_options)
+
             # 添加报文处理的修饰符
             _service_func = self.get_wrapped_inf_deal(_service_func, service_config=_config)
 
@@ -605,7 +621,10 @@ class ServerStarter(object):
             _init_config['app_name'] = self.app_config['base_config']['app_name']
 
             # 执行事件参数设置
-            for _task_type in ('after_register', 'after_deregister', 'after_own_master', 'after_lost_master'):
+            for _task_type in (
+                'after_register', 'after_deregister', 'after_own_master', 'after_lost_master',
+                'after_member_join', 'after_member_leave'
+            ):
                 if _init_config.get(_task_type, None) is not None:
                     # 加载任务
                     _task_config = self.app_config['tasks'][_init_config[_task_type]]
@@ -649,6 +668,9 @@ class ServerStarter(object):
                 self.sys_logger.error(_('Register cluster error: $1', str(_ret)))
                 raise RuntimeError(_ret.msg)
 
+            # asyncio模式在服务的事件循环中启动心跳及事件处理任务
+            await self.cluster.start_async_tasks()
+
         # 服务状态更新
         self.started = True
 
@@ -670,6 +692,9 @@ class ServerStarter(object):
         self.started = False
 
         if self.cluster is not None:
+            # 停止asyncio模式的心跳及事件处理任务
+            await self.cluster.stop_async_tasks()
+
             # 取消注册集群服务
             _ret = self.cluster.deregister_cluster()
             if _ret.is_success():
@@ -774,7 +799,7 @@ class ServerStarter(object):
         无 Web Server 情况的后台应用启动函数(阻断交易)
         """
         # 执行after_server_start
-        self._after_server_start()
+        await self._after_server_start()
 
         # 循环阻断交易并等待ctrl+c中断
         while True:
@@ -789,7 +814,7 @@ class ServerStarter(object):
                 break
 
         # 执行before_server_stop
-        self._before_server_stop()
+        await self._before_server_stop()
 
     async def _run_task(self, task_type: str, task_id: str):
         """
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2022 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+Redis连接工具
+
+@module redis_tool
+@file redis_tool.py
+"""
+import os
+import sys
+# 自动安装依赖库
+from HiveNetCore.utils.pyenv_tool import PythonEnvTools
+try:
+    import redis
+except ImportError:
+    PythonEnvTools.install_package('redis')
+    import redis
+from redis.cluster import RedisCluster, ClusterNode
+from redis.sentinel import Sentinel
+# 根据当前文件路径将包路径纳入, 在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir, os.path.pardir)))
+
+
+class RedisTool(object):
+    """
+    Redis连接工具
+    """
+
+    # 支持的部署模式
+    REDIS_MODES = ('standalone', 'cluster', 'sentinel')
+
+    @classmethod
+    def create_clients(cls, redis_mode: str = 'standalone', redis_para: dict = {}, sentinel_para: dict = None,
+            replica_para: dict = None, read_from_replicas: bool = False) -> tuple:
+        """
+        按部署模式创建redis的连接对象
+
+        @param {str} redis_mode='standalone' - redis的部署模式
+            standalone - 单节点(或主从)模式, 通过redis_para连接主节点, 可通过replica_para指定只读副本
+            cluster - Redis Cluster集群模式, redis_para为redis.cluster.RedisCluster的初始化参数
+                注: 可通过startup_nodes参数指定启动节点列表, 格式为[{'host': '', 'port': 6379}, ...]
+            sentinel - 哨兵模式, 通过sentinel_para获取主节点和从节点, redis_para为节点的连接参数
+        @param {dict} redis_para={} - redis的连接参数字典
+        @param {dict} sentinel_para=None - 哨兵模式的参数
+            sentinels {list} - 哨兵地址列表, 格式为[['127.0.0.1', 26379], ...]
+            service_name {str} - 主节点的服务名, 默认为'mymaster'
+            sentinel_kwargs {dict} - 连接哨兵的参数, 例如密码
+        @param {dict} replica_para=None - standalone模式的只读副本连接参数, 将覆盖redis_para中的同名参数
+        @param {bool} read_from_replicas=False - 只读命令是否发送到副本节点执行
+            注: 副本数据存在复制延迟, 写入后立即读取可能获取到旧数据
+
+        @returns {tuple} - 返回(主连接对象, 只读连接对象), 如果不使用副本读取, 只读连接对象与主连接对象一致
+        """
+        if redis_mode not in cls.REDIS_MODES:
+            raise ValueError('not support redis mode [%s]' % redis_mode)
+
+        _redis_para = dict(redis_para)
+        if redis_mode == 'cluster':
+            # 集群模式, 副本读取由RedisCluster根据槽位自动路由
+            _startup_nodes = _redis_para.pop('startup_nodes', None)
+            if _startup_nodes is not None:
+                _redis_para['startup_nodes'] = [
+                    ClusterNode(_node['host'], _node.get('port', 6379)) for _node in _startup_nodes
+                ]
+            _redis_para.pop('max_connections', None)
+            _client = RedisCluster(read_from_replicas=read_from_replicas, **_redis_para)
+            return _client, _client
+        elif redis_mode == 'sentinel':
+            _sentinel_para = {} if sentinel_para is None else sentinel_para
+            _service_name = _sentinel_para.get('service_name', 'mymaster')
+            _sentinel = Sentinel(
+                [tuple(_item) for _item in _sentinel_para['sentinels']],
+                sentinel_kwargs=_sentinel_para.get('sentinel_kwargs', None), **_redis_para
+            )
+            _client = _sentinel.master_for(_service_name)
+            _read_client = _sentinel.slave_for(_service_name) if read_from_replicas else _client
+            return _client, _read_client
+        else:
+            _client = redis.Redis(connection_pool=redis.ConnectionPool(**_redis_para))
+            _read_client = _client
+            if read_from_replicas and replica_para is not None:
+                _replica_para = dict(_redis_para)
+                _replica_para.update(replica_para)
+                _read_client = redis.Redis(connection_pool=redis.ConnectionPool(**_replica_para))
+
+            return _client, _read_client
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2022 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+基于共享内存的跨进程快照工具
+
+@module shared_snapshot
+@file shared_snapshot.py
+"""
+import os
+import sys
+import json
+import time
+import struct
+import threading
+from multiprocessing import shared_memory, resource_tracker
+# 根据当前文件路径将包路径纳入, 在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir, os.path.pardir)))
+
+
+class SharedSnapshot(object):
+    """
+    基于共享内存的跨进程快照(单进程写入, 多进程读取)
+    注: 通过顺序锁(seqlock)实现无锁读取, 写入时先将版本号置为奇数, 写完数据后再置为偶数,
+        读取方在读取数据前后版本号一致且为偶数时数据有效, 否则重新读取;
+        共享内存的布局为: 版本号(8字节) + 数据长度(8字节) + 数据(json格式)
+    """
+
+    # 共享内存头部结构: 版本号, 数据长度
+    HEADER = struct.Struct('<QQ')
+
+    def __init__(self, name: str, size: int = 1048576, is_writer: bool = False, attach_interval: float = 1.0):
+        """
+        构造函数
+
+        @param {str} name - 共享内存名称, 同一台主机上写入方和读取方需一致
+        @param {int} size=1048576 - 共享内存大小, 单位为字节, 仅写入方创建时使用
+        @param {bool} is_writer=False - 是否写入方, 写入方负责创建共享内存
+        @param {float} attach_interval=1.0 - 读取方共享内存不存在时重新尝试连接的间隔, 单位为秒
+        """
+        self.name = name
+        self.size = size
+        self.is_writer = is_writer
+        self.attach_interval = attach_interval
+        self._shm = None
+        self._next_attach_time = 0
+        self._lock = threading.Lock()
+
+        if is_writer:
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                # 上次运行遗留的共享内存, 直接复用
+                self._shm = shared_memory.SharedMemory(name=name, create=False)
+
+            # 如果遗留的版本号为写入中的状态, 调整为完成状态
+            _version = self.HEADER.unpack_from(self._shm.buf, 0)[0]
+            if _version % 2 == 1:
+                struct.pack_into('<Q', self._shm.buf, 0, _version + 1)
+
+    #############################
+    # 公共属性
+    #############################
+    @property
+    def version(self) -> int:
+        """
+        获取当前快照的版本号
+
+        @property {int} - 版本号, 共享内存不存在或未写入过数据返回None
+        """
+        if not self._attach():
+            return None
+
+        _version = struct.unpack_from('<Q', self._shm.buf, 0)[0]
+        return None if _version == 0 else _version
+
+    #############################
+    # 公共函数
+    #############################
+    def publish(self, data) -> int:
+        """
+        发布快照数据(仅写入方)
+
+        @param {Any} data - 要发布的数据, 需支持json序列化
+
+        @returns {int} - 发布后的版本号
+        """
+        _payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        _len = len(_payload)
+        if _len + self.HEADER.size > self._shm.size:
+            raise ValueError('snapshot size [%d] exceeds shared memory size [%d]' % (
+                _len + self.HEADER.size, self._shm.size
+            ))
+
+        with self._lock:
+            _buf = self._shm.buf
+            _version = struct.unpack_from('<Q', _buf, 0)[0] + 1
+            struct.pack_into('<Q', _buf, 0, _version)  # 奇数, 代表正在写入
+            _buf[self.HEADER.size: self.HEADER.size + _len] = _payload
+            struct.pack_into('<Q', _buf, 8, _len)
+            struct.pack_into('<Q', _buf, 0, _version + 1)  # 偶数, 代表写入完成
+
+        return _version + 1
+
+    def read(self, retry: int = 1000) -> tuple:
+        """
+        读取快照数据
+
+        @param {int} retry=1000 - 读取到写入中的数据时的最大重试次数
+
+        @returns {tuple} - 返回(版本号, 数据), 共享内存不存在或未写入过数据返回None
+        """
+        if not self._attach():
+            return None
+
+        _buf = self._shm.buf
+        _max_len = self._shm.size - self.HEADER.size
+        for _i in range(retry):
+            _version, _len = self.HEADER.unpack_from(_buf, 0)
+            if _version == 0:
+                return None
+
+            if _version % 2 == 1 or _len > _max_len:
+                # 正在写入
+                continue
+
+            _payload = bytes(_buf[self.HEADER.size: self.HEADER.size + _len])
+            if struct.unpack_from('<Q', _buf, 0)[0] == _version:
+                return _version, json.loads(_payload.decode('utf-8'))
+
+        return None
+
+    def close(self, unlink: bool = False):
+        """
+        关闭共享内存
+
+        @param {bool} unlink=False - 是否同时删除共享内存(仅写入方)
+        """
+        if self._shm is not None:
+            self._shm.close()
+            if unlink and self.is_writer:
+                self._shm.unlink()
+            self._shm = None
+
+    #############################
+    # 内部函数
+    #############################
+    def _attach(self) -> bool:
+        """
+        连接已存在的共享内存(读取方)
+
+        @returns {bool} - 是否已连接
+        """
+        if self._shm is not None:
+            return True
+
+        _now = time.monotonic()
+        if _now < self._next_attach_time:
+            return False
+
+        try:
+            _shm = shared_memory.SharedMemory(name=self.name, create=False)
+        except FileNotFoundError:
+            self._next_attach_time = _now + self.attach_interval
+            return False
+
+        # 读取方不负责共享内存的生命周期, 避免进程退出时被资源跟踪器删除
+        try:
+            resource_tracker.unregister(_shm._name, 'shared_memory')
+        except:
+            pass
+
+        self._shm = _shm
+        return True
@@ -14,6 +14,11 @@
 import os
 import sys
 import time
+import uuid
+import hashlib
+import asyncio
+import inspect
+import functools
 import threading
 import traceback
 from HiveNetCore.generic import CResult
@@ -62,11 +67,33 @@ class ClusterAdapter(AdapterBaseFw):
             heart_beat {float} - 续约心跳间隔时长, 单位为秒, 默认为4
             enable_event {bool} - 服务是否开启集群事件接收处理, 默认为False
             event_interval {float} - 事件接收检查间隔, 单位为秒, 默认为2
+                注: block模式下为获取事件出现异常后的重试等待时长
             event_each_get {int} - 每次从服务器获取的事件数, 默认为10
+            event_mode {str} - 事件接收模式, 默认为poll
+                poll - 通过定时器按event_interval间隔轮询获取事件
+                block - 通过独立线程阻塞等待事件(需实现类支持), 事件到达后立即处理, 空闲时不产生轮询请求
+            event_block_timeout {float} - block模式下每次阻塞等待事件的最长时间, 单位为秒, 默认为5
+                注: 停止适配器时, 事件接收线程最长需等待该时长才会退出
+            run_mode {str} - 心跳及事件处理的运行模式, 默认为thread
+                thread - 通过独立的定时器(线程)执行心跳和事件处理
+                asyncio - 通过start_async_tasks在服务的事件循环中以任务方式执行心跳和事件处理,
+                    异步的事件处理函数直接在服务的事件循环中执行, 可共享应用的异步连接对象
+                    注: 需在事件循环中执行start_async_tasks启动, 服务框架会在服务启动后自动执行;
+                        访问服务端的同步操作将放到线程池中执行, 避免阻塞事件循环
+            async_worker_num {int} - asyncio模式下并发执行事件处理函数的最大任务数, 默认为10
+            async_queue_size {int} - asyncio模式下待处理事件队列的最大长度, 默认为1000
+                注: 队列满时将暂停从服务端获取事件, 未获取的事件保留在服务端
             after_register {function} - 当注册集群成功后触发执行的函数, 函数入参为adapter对象(self)
             after_deregister {function}  - 当取消注册集群后触发执行的函数, 函数入参为adapter对象(self)
             after_own_master {function} - 当服务变为集群主服务后触发执行的函数, 函数入参为adapter对象(self)
+                注: 可通过adapter.master_token获取本次抢占的防护令牌(fencing token)
             after_lost_master {function} - 当服务变为失去集群主服务后触发执行的函数, 函数入参为adapter对象(self)
+            enable_member_view {bool} - 是否在本地维护当前集群模块(相同namespace/sys_id/module_id)的成员视图, 默认为False
+                注: 成员视图在每次心跳时通过对比成员清单增量更新, 可通过get_members/get_member_master直接从本地获取;
+                    实现类可通过维护成员索引获取成员清单, 避免每次心跳都遍历全部集群信息
+            after_member_join {function} - 当有成员加入集群模块后触发执行的函数, 函数入参为(adapter对象, 成员信息字典)
+                注: 注册集群后首次刷新成员视图时, 已存在的成员(包括自身)也会触发该函数
+            after_member_leave {function} - 当有成员离开集群模块后触发执行的函数, 函数入参为(adapter对象, 成员信息字典)
             实现类定义的参数...
         @param {str} logger_id=None - 日志对象标识, 可以选择application.yaml配置中的其中一个日志对象
         @param {bool} is_manage=False - 指定适配器是否以管理工具方式启动
@@ -78,10 +105,18 @@ class ClusterAdapter(AdapterBaseFw):
         self._expire = self._init_config.get('expire', 10)
         self._enable_event = self._init_config.get('enable_event', False)
         self._event_each_get = self._init_config.get('event_each_get', 10)
+        self._event_mode = self._init_config.get('event_mode', 'poll')
+        self._event_block_timeout = self._init_config.get('event_block_timeout', 5)
+        self._run_mode = self._init_config.get('run_mode', 'thread')
+        self._async_worker_num = self._init_config.get('async_worker_num', 10)
+        self._async_queue_size = self._init_config.get('async_queue_size', 1000)
         self._after_register = self._init_config.get('after_register', None)
         self._after_deregister = self._init_config.get('after_deregister', None)
         self._after_own_master = self._init_config.get('after_own_master', None)
         self._after_lost_master = self._init_config.get('after_lost_master', None)
+        self._enable_member_view = self._init_config.get('enable_member_view', False)
+        self._after_member_join = self._init_config.get('after_member_join', None)
+        self._after_member_leave = self._init_config.get('after_member_leave', None)
 
         # 日志对象
         _logger_manager: LoggerManager = GlobalManager.GET_SYS_LOGGER_MANAGER()
@@ -100,6 +135,13 @@ class ClusterAdapter(AdapterBaseFw):
         self._registered_lock = threading.RLock()  # 变更注册状态的线程锁
         self._master = False  # 指示当前服务是否集群主服务
         self._master_lock = threading.RLock()  # 变更集群主服务状态的线程锁
+        self._master_token = None  # 抢占集群主服务获得的防护令牌, 由实现类在抢占成功时设置
+        self._members = {}  # 本地成员视图, key为server_id, value为成员信息字典
+        self._member_master = None  # 本地成员视图中的集群主服务server_id
+        self._member_lock = threading.RLock()  # 更新成员视图的线程锁
+        self._member_listeners = []  # 成员变更的监听函数清单
+        self._partition_sets = {}  # 已注册的分区集合, key为分区集合名
+        self._partition_lock = threading.RLock()  # 分区分配的线程锁
 
         # 集群信息
         self._app_name = self._init_config.get('app_name')
@@ -111,25 +153,39 @@ class ClusterAdapter(AdapterBaseFw):
         # 执行实现类的初始化函数
         self._self_init()
 
-        if not self._is_manage:
-            # 启动续约心跳的定时器
-            self._heart_timer = Timer(
-                self._init_config.get('heart_beat', 4), self._heart_beat_timer_func
-            )
-            self._heart_timer.setDaemon(True)
-            self._heart_timer.start()
+        # asyncio模式的任务对象
+        self._async_tasks = []
+        self._async_queue = None
 
+        if not self._is_manage:
             # 已注册的事件处理函数, key为事件, value为处理函数
             self._event_func = {}
 
-            # 启动指令接收检查定时器
+            self._heart_timer = None
             self._event_timer = None
-            if self._enable_event:
-                self._event_timer = Timer(
-                    self._init_config.get('event_interval', 2), self._event_timer_func
+            self._event_thread = None
+            self._event_thread_stop = False
+            if self._run_mode != 'asyncio':
+                # 启动续约心跳的定时器
+                self._heart_timer = Timer(
+                    self._init_config.get('heart_beat', 4), self._heart_beat_timer_func
                 )
-                self._event_timer.setDaemon(True)
-                self._event_timer.start()
+                self._heart_timer.setDaemon(True)
+                self._heart_timer.start()
+
+            # 启动指令接收检查定时器(或阻塞接收线程)
+            if self._enable_event and self._run_mode != 'asyncio':
+                if self._event_mode == 'block':
+                    self._event_thread = threading.Thread(
+                        target=self._event_block_thread_func, name='ClusterEventThread', daemon=True
+                    )
+                    self._event_thread.start()
+                else:
+                    self._event_timer = Timer(
+                        self._init_config.get('event_interval', 2), self._event_timer_func
+                    )
+                    self._event_timer.setDaemon(True)
+                    self._event_timer.start()
 
     def __del__(self):
         """
@@ -140,6 +196,9 @@ class ClusterAdapter(AdapterBaseFw):
             if self._event_timer is not None:
                 self._event_timer.cancel()
 
+            # 通知阻塞接收线程退出(线程在本次阻塞等待超时后结束)
+            self._event_thread_stop = True
+
             if self._heart_timer is not None:
                 self._heart_timer.cancel()
 
@@ -177,6 +236,17 @@ class ClusterAdapter(AdapterBaseFw):
         """
         return self._master
 
+    @property
+    def master_token(self) -> int:
+        """
+        获取当前服务作为集群主服务的防护令牌(fencing token)
+        注: 每次集群主服务变更令牌都会递增, 仅主服务执行的任务可以记录该令牌,
+            在执行关键操作前通过check_master_token检查, 拒绝已失去主服务身份的旧主服务的操作
+
+        @property {int} - 令牌值, 非主服务或实现类不支持时返回None
+        """
+        return self._master_token if self._master else None
+
     #############################
     # 公共函数
     #############################
@@ -208,6 +278,10 @@ class ClusterAdapter(AdapterBaseFw):
             # 抢占集群主服务
             self._try_own_master()
 
+            # 刷新本地成员视图
+            if self._enable_member_view:
+                self.refresh_member_view()
+
         return _result
 
     def deregister_cluster(self) -> CResult:
@@ -233,6 +307,12 @@ class ClusterAdapter(AdapterBaseFw):
             # 取消集群主服务占用
             self._try_lost_master()
 
+            # 清空本地成员视图, 并释放所有分区
+            with self._member_lock:
+                self._members = {}
+                self._member_master = None
+            self._rebalance_partitions()
+
             # 取消集群注册信息
             if not self._deregister_cluster():
                 raise RuntimeError('deregistered server failure')
@@ -294,6 +374,305 @@ class ClusterAdapter(AdapterBaseFw):
 
         return _result
 
+    def get_members(self) -> list:
+        """
+        从本地成员视图获取当前集群模块的成员清单
+
+        @returns {list} - 成员信息清单, 格式与get_cluster_list一致
+        """
+        return list(self._members.values())
+
+    def get_member(self, server_id: str) -> dict:
+        """
+        从本地成员视图获取指定成员的信息
+
+        @param {str} server_id - 服务实例序号
+
+        @returns {dict} - 成员信息字典, 找不到返回None
+        """
+        return self._members.get(server_id, None)
+
+    def get_member_master(self) -> dict:
+        """
+        从本地成员视图获取当前集群模块的主服务信息
+
+        @returns {dict} - 主服务信息字典, 没有主服务返回None
+        """
+        _master = self._member_master
+        return None if _master is None else self._members.get(_master, None)
+
+    def add_member_listener(self, func):
+        """
+        添加成员变更的监听函数
+
+        @param {function} func - 监听函数, 入参为(adapter对象, 加入的成员清单, 离开的成员清单)
+        """
+        self._member_listeners.append(func)
+
+    def refresh_member_view(self) -> bool:
+        """
+        刷新本地成员视图
+        注: 对比最新的成员清单, 对加入和离开的成员触发对应的函数
+
+        @returns {bool} - 刷新结果
+        """
+        try:
+            _list = self._get_member_list_self()
+        except:
+            self.logger.error('refresh cluster member view error: %s' % traceback.format_exc())
+            return False
+
+        with self._member_lock:
+            _new_members = {}
+            _new_master = None
+            for _info in _list:
+                _new_members[_info['server_id']] = _info
+                if _info['master']:
+                    _new_master = _info['server_id']
+
+            _joined = [_info for _id, _info in _new_members.items() if _id not in self._members]
+            _left = [_info for _id, _info in self._members.items() if _id not in _new_members]
+            self._members = _new_members
+            self._member_master = _new_master
+
+        # 执行成员变更触发函数
+        for _funcs, _infos in ((self._after_member_join, _joined), (self._after_member_leave, _left)):
+            if _funcs is None:
+                continue
+
+            for _info in _infos:
+                try:
+                    AsyncTools.sync_run_coroutine(_funcs(self, _info))
+                except:
+                    self.logger.error('run cluster member change trigger func error: %s' % traceback.format_exc())
+
+        if len(_joined) > 0 or len(_left) > 0:
+            # 成员变更, 重新分配分区
+            self._rebalance_partitions()
+
+            for _listener in self._member_listeners:
+                try:
+                    AsyncTools.sync_run_coroutine(_listener(self, _joined, _left))
+                except:
+                    self.logger.error('run cluster member listener error: %s' % traceback.format_exc())
+
+        return True
+
+    #############################
+    # 分区分配
+    #############################
+    def register_partition_set(self, name: str, partition_count: int = 256, after_gained=None,
+            after_lost=None) -> CResult:
+        """
+        注册分区集合
+        注: 分区集合的各个分区通过rendezvous hashing(最高随机权重)分配给集群模块的存活成员,
+            成员变更时只有涉及变更成员的分区会重新分配; 需开启enable_member_view
+
+        @param {str} name - 分区集合名, 集群模块的各个成员应使用相同的集合名和分区数量
+        @param {int} partition_count=256 - 分区数量
+        @param {function} after_gained=None - 当前服务获得分区后触发执行的函数, 入参为(adapter对象, 分区集合名, 获得的分区清单)
+        @param {function} after_lost=None - 当前服务失去分区后触发执行的函数, 入参为(adapter对象, 分区集合名, 失去的分区清单)
+
+        @returns {CResult} - 处理结果
+        """
+        _result = CResult()
+        with ExceptionTool.ignored_cresult(
+            result_obj=_result, logger=self.logger, self_log_msg='register partition set error'
+        ):
+            if not self._enable_member_view:
+                raise RuntimeError('partition set need enable_member_view')
+
+            with self._partition_lock:
+                if name in self._partition_sets.keys():
+                    raise RuntimeError('partition set [%s] already exists' % name)
+
+                self._partition_sets[name] = {
+                    'partition_count': partition_count,
+                    'after_gained': after_gained,
+                    'after_lost': after_lost,
+                    'owners': [None] * partition_count,  # 每个分区对应的成员server_id
+                    'owned': set()  # 当前服务拥有的分区
+                }
+
+            self._rebalance_partitions(name)
+
+        return _result
+
+    def deregister_partition_set(self, name: str) -> CResult:
+        """
+        取消分区集合注册
+        注: 不会触发分区失去的函数
+
+        @param {str} name - 分区集合名
+
+        @returns {CResult} - 处理结果
+        """
+        _result = CResult()
+        with ExceptionTool.ignored_cresult(
+            result_obj=_result, logger=self.logger, self_log_msg='deregister partition set error'
+        ):
+            with self._partition_lock:
+                self._partition_sets.pop(name)
+
+        return _result
+
+    def get_partitions(self, name: str) -> list:
+        """
+        获取当前服务拥有的分区清单
+
+        @param {str} name - 分区集合名
+
+        @returns {list} - 分区序号清单(已排序)
+        """
+        return sorted(self._partition_sets[name]['owned'])
+
+    def get_partition_owner(self, name: str, partition: int) -> str:
+        """
+        获取分区所属的成员
+
+        @param {str} name - 分区集合名
+        @param {int} partition - 分区序号
+
+        @returns {str} - 成员的server_id, 没有存活成员返回None
+        """
+        return self._partition_sets[name]['owners'][partition]
+
+    def get_partition(self, name: str, key: str) -> int:
+        """
+        获取数据key对应的分区序号
+
+        @param {str} name - 分区集合名
+        @param {str} key - 数据key
+
+        @returns {int} - 分区序号
+        """
+        return self._hash_value(key) % self._partition_sets[name]['partition_count']
+
+    def is_partition_owner(self, name: str, key: str) -> bool:
+        """
+        判断数据key对应的分区是否由当前服务处理
+
+        @param {str} name - 分区集合名
+        @param {str} key - 数据key
+
+        @returns {bool} - 是否当前服务拥有
+        """
+        return self.get_partition(name, key) in self._partition_sets[name]['owned']
+
+    async def start_async_tasks(self):
+        """
+        在当前事件循环中启动心跳及事件处理任务(仅run_mode为asyncio时有效)
+        """
+        if self._is_manage or self._run_mode != 'asyncio' or len(self._async_tasks) > 0:
+            return
+
+        _loop = asyncio.get_running_loop()
+        self._async_tasks.append(_loop.create_task(self._async_heart_beat_task()))
+        if self._enable_event:
+            # 通过有界队列实现背压, 处理不过来时暂停获取事件
+            self._async_queue = asyncio.Queue(maxsize=self._async_queue_size)
+            self._async_tasks.append(_loop.create_task(self._async_get_events_task()))
+            for _i in range(self._async_worker_num):
+                self._async_tasks.append(_loop.create_task(self._async_event_worker_task()))
+
+    async def stop_async_tasks(self):
+        """
+        停止asyncio模式的心跳及事件处理任务
+        """
+        if len(self._async_tasks) == 0:
+            return
+
+        for _task in self._async_tasks:
+            _task.cancel()
+
+        await asyncio.gather(*self._async_tasks, return_exceptions=True)
+        self._async_tasks.clear()
+        self._async_queue = None
+
+    def lock(self, name: str, ttl: float = 10, auto_renew: bool = True, blocking: bool = True,
+            timeout: float = None, retry_interval: float = 0.1, fair: bool = False) -> 'ClusterLock':
+        """
+        获取分布式锁对象
+
+        @param {str} name - 锁名称, 同一命名空间和系统下唯一
+        @param {float} ttl=10 - 持有的租约时长, 单位为秒, 超过时长未续约将自动释放
+        @param {bool} auto_renew=True - 持有期间是否自动续约(每ttl/3续约一次)
+        @param {bool} blocking=True - 获取不到时是否等待
+        @param {float} timeout=None - 等待获取的最长时间, 单位为秒, None代表一直等待
+        @param {float} retry_interval=0.1 - 等待期间重试获取的间隔时长, 单位为秒
+        @param {bool} fair=False - 是否按请求的先后顺序公平获取
+
+        @returns {ClusterLock} - 锁对象, 可通过with或async with使用
+            例如:
+            async with adapter.lock('job1', ttl=30) as _lock:
+                do_something(_lock.token)
+        """
+        return ClusterLock(
+            self, name, ttl=ttl, auto_renew=auto_renew, blocking=blocking, timeout=timeout,
+            retry_interval=retry_interval, fair=fair
+        )
+
+    def semaphore(self, name: str, permits: int, ttl: float = 10, auto_renew: bool = True, blocking: bool = True,
+            timeout: float = None, retry_interval: float = 0.1, fair: bool = False) -> 'ClusterSemaphore':
+        """
+        获取分布式信号量对象
+
+        @param {str} name - 信号量名称, 同一命名空间和系统下唯一
+        @param {int} permits - 允许同时持有的数量
+        @param {float} ttl=10 - 持有的租约时长, 单位为秒, 超过时长未续约将自动释放
+        @param {bool} auto_renew=True - 持有期间是否自动续约(每ttl/3续约一次)
+        @param {bool} blocking=True - 获取不到时是否等待
+        @param {float} timeout=None - 等待获取的最长时间, 单位为秒, None代表一直等待
+        @param {float} retry_interval=0.1 - 等待期间重试获取的间隔时长, 单位为秒
+        @param {bool} fair=False - 是否按请求的先后顺序公平获取
+
+        @returns {ClusterSemaphore} - 信号量对象, 可通过with或async with使用
+        """
+        return ClusterSemaphore(
+            self, name, permits=permits, ttl=ttl, auto_renew=auto_renew, blocking=blocking, timeout=timeout,
+            retry_interval=retry_interval, fair=fair
+        )
+
+    def rate_limiter(self, name: str, rate: int, period: float = 1, burst: int = None, prefetch: int = 1,
+            prefetch_ttl: float = None, fail_open: bool = True) -> 'ClusterRateLimiter':
+        """
+        获取集群限流器对象(GCRA算法)
+
+        @param {str} name - 限流器名称, 同一命名空间和系统下相同名称的限流器共享限额
+        @param {int} rate - 每个周期允许通过的请求数
+        @param {float} period=1 - 周期时长, 单位为秒
+        @param {int} burst=None - 允许的突发请求数, 不设置代表与rate一致
+        @param {int} prefetch=1 - 每次从集群预取到本地的令牌数, 大于1时可减少访问集群的次数
+        @param {float} prefetch_ttl=None - 预取令牌在本地的有效时长, 单位为秒, 不设置代表与period一致
+        @param {bool} fail_open=True - 访问集群出现异常时是否放行
+
+        @returns {ClusterRateLimiter} - 限流器对象
+            例如:
+            _limiter = adapter.rate_limiter('api_query', 100, period=1, prefetch=10)
+            _allowed, _retry_after = _limiter.acquire(key=tenant_id)
+        """
+        return ClusterRateLimiter(
+            self, name, rate, period=period, burst=burst, prefetch=prefetch, prefetch_ttl=prefetch_ttl,
+            fail_open=fail_open
+        )
+
+    def check_master_token(self, token: int) -> bool:
+        """
+        检查防护令牌是否仍为当前有效的集群主服务令牌
+
+        @param {int} token - 要检查的令牌
+
+        @returns {bool} - 检查结果, 令牌已过期(集群主服务已变更)返回False
+        """
+        if token is None or self._is_manage:
+            return False
+
+        try:
+            return self._check_master_token_self(token)
+        except:
+            self.logger.error('check cluster master token error: %s' % traceback.format_exc())
+            return False
+
     def clear_all_cluster(self, namespace: str, sys_id: str = None, module_id: str = None, server_id: str = None) -> CResult:
         """
         清空所有集群信息(仅管理使用)
@@ -433,6 +812,7 @@ class ClusterAdapter(AdapterBaseFw):
                 if self._master:
                     # 从主服务变为非主服务
                     self._master = False
+                    self._master_token = None
                     if self._after_lost_master is not None:
                         try:
                             AsyncTools.sync_run_coroutine(self._after_lost_master(self))
@@ -458,6 +838,7 @@ class ClusterAdapter(AdapterBaseFw):
                 self.logger.error('try to lost cluster master error: %s' % traceback.format_exc())
 
             self._master = False
+            self._master_token = None
             if self._after_lost_master is not None:
                 try:
                     AsyncTools.sync_run_coroutine(self._after_lost_master(self))
@@ -483,6 +864,10 @@ class ClusterAdapter(AdapterBaseFw):
         if _registered:
             self._try_own_master()
 
+            # 刷新本地成员视图
+            if self._enable_member_view:
+                self.refresh_member_view()
+
     def _event_deal_func(self, context: dict, event: str, paras):
         """
         通用事件处理函数
@@ -512,6 +897,161 @@ class ClusterAdapter(AdapterBaseFw):
             _item[0]['adapter'] = self
             self._event_deal_func(_item[0], _item[1], _item[2])
 
+    async def _async_heart_beat_task(self):
+        """
+        asyncio模式的心跳续约任务
+        """
+        _loop = asyncio.get_running_loop()
+        _interval = self._init_config.get('heart_beat', 4)
+        while True:
+            await asyncio.sleep(_interval)
+            try:
+                await _loop.run_in_executor(None, self._heart_beat_timer_func)
+            except asyncio.CancelledError:
+                raise
+            except:
+                self.logger.error('cluster heart beat error: %s' % traceback.format_exc())
+
+    async def _async_get_events_task(self):
+        """
+        asyncio模式的事件获取任务
+        """
+        _loop = asyncio.get_running_loop()
+        _interval = self._init_config.get('event_interval', 2)
+        while True:
+            try:
+                if self._event_mode == 'block':
+                    _events = await _loop.run_in_executor(
+                        None, self._list_events, self._block_get_events_self, self._event_block_timeout
+                    )
+                else:
+                    _events = await _loop.run_in_executor(None, self._list_events, self._get_events_self)
+
+                # 放入队列, 队列已满时将等待, 从而暂停获取新的事件
+                for _item in _events:
+                    await self._async_queue.put(_item)
+
+                if self._event_mode != 'block':
+                    await asyncio.sleep(_interval)
+            except asyncio.CancelledError:
+                raise
+            except:
+                self.logger.error('get cluster events error: %s' % traceback.format_exc())
+                await asyncio.sleep(_interval)
+
+    async def _async_event_worker_task(self):
+        """
+        asyncio模式的事件处理任务
+        """
+        _loop = asyncio.get_running_loop()
+        while True:
+            _item = await self._async_queue.get()
+            try:
+                _item[0]['adapter'] = self
+                _func = self._event_func.get(_item[1], None)
+                if _func is None:
+                    self.logger.warning('get event[%s] but not register deal func' % _item[1])
+                    continue
+
+                if inspect.iscoroutinefunction(_func):
+                    # 异步函数直接在当前事件循环执行
+                    await _func(_item[0], _item[1], _item[2])
+                else:
+                    # 同步函数放到线程池执行, 避免阻塞事件循环
+                    await AsyncTools.async_run_coroutine(await _loop.run_in_executor(
+                        None, functools.partial(_func, _item[0], _item[1], _item[2])
+                    ))
+            except asyncio.CancelledError:
+                raise
+            except:
+                self.logger.error('run event[%s] func error: %s' % (_item[1], traceback.format_exc()))
+            finally:
+                self._async_queue.task_done()
+
+    def _list_events(self, get_func, *args) -> list:
+        """
+        执行事件获取函数并将结果转换为列表(在线程池中执行)
+
+        @param {function} get_func - 事件获取函数
+        @param {args} - 事件获取函数的入参
+
+        @returns {list} - 事件列表
+        """
+        _events = get_func(*args)
+        return [] if _events is None else list(_events)
+
+    def _hash_value(self, value: str) -> int:
+        """
+        获取字符串的稳定哈希值(不同进程的计算结果一致)
+
+        @param {str} value - 字符串
+
+        @returns {int} - 64位哈希值
+        """
+        return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def _rebalance_partitions(self, name: str = None):
+        """
+        按当前成员视图重新分配分区
+
+        @param {str} name=None - 要分配的分区集合名, 不传代表所有分区集合
+        """
+        _member_ids = sorted(self._members.keys())
+        _changes = []
+        with self._partition_lock:
+            _names = list(self._partition_sets.keys()) if name is None else [name]
+            for _name in _names:
+                _set = self._partition_sets[_name]
+                _owned = set()
+                for _partition in range(_set['partition_count']):
+                    # rendezvous hashing, 选择权重最高的成员
+                    _owner = None
+                    _max_weight = -1
+                    for _member_id in _member_ids:
+                        _weight = self._hash_value('%s:%d:%s' % (_name, _partition, _member_id))
+                        if _weight > _max_weight:
+                            _owner = _member_id
+                            _max_weight = _weight
+
+                    _set['owners'][_partition] = _owner
+                    if _owner == self._server_id:
+                        _owned.add(_partition)
+
+                _gained = sorted(_owned - _set['owned'])
+                _lost = sorted(_set['owned'] - _owned)
+                _set['owned'] = _owned
+                _changes.append((_name, _set, _gained, _lost))
+
+        # 执行分区变更触发函数
+        for _name, _set, _gained, _lost in _changes:
+            for _func, _partitions in ((_set['after_lost'], _lost), (_set['after_gained'], _gained)):
+                if _func is None or len(_partitions) == 0:
+                    continue
+
+                try:
+                    AsyncTools.sync_run_coroutine(_func(self, _name, _partitions))
+                except:
+                    self.logger.error('run partition change trigger func error: %s' % traceback.format_exc())
+
+    def _event_block_thread_func(self):
+        """
+        事件阻塞接收线程函数
+        """
+        _retry_interval = self._init_config.get('event_interval', 2)
+        while not self._event_thread_stop:
+            try:
+                _events = self._block_get_events_self(self._event_block_timeout)
+                if _events is None:
+                    continue
+
+                for _item in _events:
+                    _item[0]['adapter'] = self
+                    self._event_deal_func(_item[0], _item[1], _item[2])
+            except:
+                # 连接异常等情况, 等待后重试, 避免异常时空转
+                self.logger.error('block get cluster events error: %s' % traceback.format_exc())
+                time.sleep(_retry_interval)
+
     #############################
     # 需实现类继承实现的公共函数
     #############################
@@ -606,10 +1146,19 @@ class ClusterAdapter(AdapterBaseFw):
         """
         raise NotImplementedError()
 
+    def _get_member_list_self(self) -> list:
+        """
+        获取当前集群模块(相同namespace/sys_id/module_id)的成员清单, 用于刷新成员视图
+        注: 默认通过get_cluster_list获取, 实现类可重载为通过成员索引获取
+
+        @returns {list} - 成员信息清单, 格式与get_cluster_list一致
+        """
+        return self.get_cluster_list(self._namespace, sys_id=self._sys_id, module_id=self._module_id)
+
     def _try_own_master_self(self) -> bool:
         """
         尝试抢占集群主服务
-        注: 如果本身已经是集群主服务, 则续约超时时间
+        注: 如果本身已经是集群主服务, 则续约超时时间; 如果实现类支持防护令牌, 应在抢占成功时设置self._master_token
 
         @returns {bool} - 抢占结果
         """
@@ -623,6 +1172,70 @@ class ClusterAdapter(AdapterBaseFw):
         """
         raise NotImplementedError()
 
+    def _check_master_token_self(self, token: int) -> bool:
+        """
+        检查防护令牌是否仍为当前有效的集群主服务令牌
+
+        @param {int} token - 要检查的令牌
+
+        @returns {bool} - 检查结果
+        """
+        raise NotImplementedError()
+
+    def _acquire_semaphore_self(self, name: str, holder_id: str, permits: int, ttl: float, fair: bool) -> int:
+        """
+        尝试获取分布式信号量
+
+        @param {str} name - 信号量名称
+        @param {str} holder_id - 持有者标识
+        @param {int} permits - 允许同时持有的数量
+        @param {float} ttl - 持有的租约时长, 单位为秒
+        @param {bool} fair - 是否公平获取, 如果是应将持有者加入等待队列, 只有排在前面的等待者可以获取
+
+        @returns {int} - 获取成功返回防护令牌, 获取失败返回0
+        """
+        raise NotImplementedError()
+
+    def _renew_semaphore_self(self, name: str, holder_id: str, ttl: float) -> bool:
+        """
+        续约分布式信号量
+
+        @param {str} name - 信号量名称
+        @param {str} holder_id - 持有者标识
+        @param {float} ttl - 持有的租约时长, 单位为秒
+
+        @returns {bool} - 续约结果, 已不再持有返回False
+        """
+        raise NotImplementedError()
+
+    def _release_semaphore_self(self, name: str, holder_id: str) -> bool:
+        """
+        释放分布式信号量(同时从等待队列中移除)
+
+        @param {str} name - 信号量名称
+        @param {str} holder_id - 持有者标识
+
+        @returns {bool} - 释放结果, 未持有返回False
+        """
+        raise NotImplementedError()
+
+    def _acquire_rate_tokens_self(self, name: str, key: str, interval: int, burst: int, need: int,
+            want: int) -> tuple:
+        """
+        按GCRA算法从集群获取限流令牌
+        注: 实现类应以原子方式完成检查和扣减, 算法可参考ClusterRateLimiter._gcra
+
+        @param {str} name - 限流器名称
+        @param {str} key - 限流维度的key
+        @param {int} interval - 令牌的发放间隔, 单位为微秒
+        @param {int} burst - 允许的突发请求数
+        @param {int} need - 本次至少需要获取的令牌数
+        @param {int} want - 本次希望获取的令牌数(包含预取), 可用令牌充足时最多获取该数量
+
+        @returns {tuple} - 返回(获取到的令牌数, 需等待的时长(秒)), 可用令牌少于need时获取到的令牌数为0
+        """
+        raise NotImplementedError()
+
     def _get_events_self(self):
         """
         获取当前服务的集群事件迭代数据
@@ -641,6 +1254,17 @@ class ClusterAdapter(AdapterBaseFw):
         """
         raise NotImplementedError()
 
+    def _block_get_events_self(self, timeout: float):
+        """
+        阻塞等待并获取当前服务的集群事件迭代数据(event_mode为block时使用)
+        注: 实现类应在没有事件时阻塞等待, 直到有事件到达或超时
+
+        @param {float} timeout - 最长的阻塞等待时间, 单位为秒
+
+        @returns {iterator} - 当前收到的事件迭代数据, 格式与_get_events_self一致, 超时没有事件可返回None
+        """
+        raise NotImplementedError()
+
     def _clear_all_cluster(self, namespace: str, sys_id: str = None, module_id: str = None, server_id: str = None) -> bool:
         """
         清空所有集群信息(仅管理使用)
@@ -653,3 +1277,492 @@ class ClusterAdapter(AdapterBaseFw):
         @returns {bool} - 处理结果
         """
         raise NotImplementedError()
+
+
+class ClusterSemaphore(object):
+    """
+    集群分布式信号量(可作为同步或异步的上下文管理器使用)
+    注: 通过ClusterAdapter.semaphore获取对象, 持有期间可自动续约, 每次获取成功都会分配递增的防护令牌(fencing token)
+    """
+
+    def __init__(self, adapter: 'ClusterAdapter', name: str, permits: int = 1, ttl: float = 10,
+            auto_renew: bool = True, blocking: bool = True, timeout: float = None,
+            retry_interval: float = 0.1, fair: bool = False):
+        """
+        构造函数
+
+        @param {ClusterAdapter} adapter - 集群适配器对象
+        @param {str} name - 信号量名称, 同一命名空间和系统下唯一
+        @param {int} permits=1 - 允许同时持有的数量
+        @param {float} ttl=10 - 持有的租约时长, 单位为秒, 超过时长未续约将自动释放
+        @param {bool} auto_renew=True - 持有期间是否自动续约(每ttl/3续约一次)
+        @param {bool} blocking=True - 获取不到时是否等待
+        @param {float} timeout=None - 等待获取的最长时间, 单位为秒, None代表一直等待
+        @param {float} retry_interval=0.1 - 等待期间重试获取的间隔时长, 单位为秒
+        @param {bool} fair=False - 是否按请求的先后顺序公平获取
+        """
+        self._adapter = adapter
+        self.name = name
+        self.permits = permits
+        self.ttl = ttl
+        self.auto_renew = auto_renew
+        self.blocking = blocking
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.fair = fair
+
+        # 持有者标识
+        self.holder_id = '%s:%s' % (adapter._server_id, uuid.uuid4().hex)
+
+        # 内部控制变量
+        self._token = None
+        self._lost = False
+        self._renew_stop = None  # 同步模式续约线程的停止事件
+        self._renew_task = None  # 异步模式续约任务
+
+    #############################
+    # 公共属性
+    #############################
+    @property
+    def token(self) -> int:
+        """
+        获取本次持有的防护令牌
+
+        @property {int} - 令牌, 未持有时返回None
+        """
+        return self._token
+
+    @property
+    def acquired(self) -> bool:
+        """
+        判断是否持有且租约有效(自动续约失败视为失效)
+
+        @property {bool}
+        """
+        return self._token is not None and not self._lost
+
+    #############################
+    # 同步处理
+    #############################
+    def acquire(self) -> bool:
+        """
+        获取信号量
+
+        @returns {bool} - 获取结果
+        """
+        _start = time.monotonic()
+        while True:
+            _token = self._adapter._acquire_semaphore_self(
+                self.name, self.holder_id, self.permits, self.ttl, self.fair
+            )
+            if _token:
+                self._on_acquired(_token)
+                if self.auto_renew:
+                    self._renew_stop = threading.Event()
+                    threading.Thread(target=self._renew_thread_func, args=(self._renew_stop, ), daemon=True).start()
+                return True
+
+            if not self.blocking or (self.timeout is not None and time.monotonic() - _start >= self.timeout):
+                # 获取失败, 公平模式需从等待队列中移除
+                if self.fair:
+                    self._adapter._release_semaphore_self(self.name, self.holder_id)
+                return False
+
+            time.sleep(self.retry_interval)
+
+    def release(self) -> bool:
+        """
+        释放信号量
+
+        @returns {bool} - 释放结果, 如果租约已失效返回False
+        """
+        if self._renew_stop is not None:
+            self._renew_stop.set()
+            self._renew_stop = None
+
+        return self._on_release()
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TimeoutError('acquire cluster semaphore [%s] timeout' % self.name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.release()
+
+    #############################
+    # 异步处理
+    #############################
+    async def async_acquire(self) -> bool:
+        """
+        获取信号量(异步模式)
+        注: 访问服务端的操作在线程池中执行, 不阻塞事件循环
+
+        @returns {bool} - 获取结果
+        """
+        _loop = asyncio.get_running_loop()
+        _start = time.monotonic()
+        while True:
+            _token = await _loop.run_in_executor(
+                None, self._adapter._acquire_semaphore_self,
+                self.name, self.holder_id, self.permits, self.ttl, self.fair
+            )
+            if _token:
+                self._on_acquired(_token)
+                if self.auto_renew:
+                    self._renew_task = _loop.create_task(self._renew_task_func())
+                return True
+
+            if not self.blocking or (self.timeout is not None and time.monotonic() - _start >= self.timeout):
+                if self.fair:
+                    await _loop.run_in_executor(
+                        None, self._adapter._release_semaphore_self, self.name, self.holder_id
+                    )
+                return False
+
+            await asyncio.sleep(self.retry_interval)
+
+    async def async_release(self) -> bool:
+        """
+        释放信号量(异步模式)
+
+        @returns {bool} - 释放结果, 如果租约已失效返回False
+        """
+        if self._renew_task is not None:
+            self._renew_task.cancel()
+            self._renew_task = None
+
+        return await asyncio.get_running_loop().run_in_executor(None, self._on_release)
+
+    async def __aenter__(self):
+        if not await self.async_acquire():
+            raise TimeoutError('acquire cluster semaphore [%s] timeout' % self.name)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_tb):
+        await self.async_release()
+
+    #############################
+    # 内部函数
+    #############################
+    def _on_acquired(self, token: int):
+        """
+        获取成功的处理
+
+        @param {int} token - 防护令牌
+        """
+        self._token = token
+        self._lost = False
+
+    def _on_release(self) -> bool:
+        """
+        释放的处理
+
+        @returns {bool} - 释放结果
+        """
+        if self._token is None:
+            return False
+
+        _ret = self._adapter._release_semaphore_self(self.name, self.holder_id)
+        _ret = _ret and not self._lost
+        self._token = None
+        return _ret
+
+    def _renew(self) -> bool:
+        """
+        续约处理
+
+        @returns {bool} - 是否续约成功, 失败代表租约已失效
+        """
+        try:
+            if self._adapter._renew_semaphore_self(self.name, self.holder_id, self.ttl):
+                return True
+        except:
+            self._adapter.logger.error('renew cluster semaphore [%s] error: %s' % (self.name, traceback.format_exc()))
+            return True  # 连接异常时在下一周期重试, 租约未到期前仍有效
+
+        self._lost = True
+        self._adapter.logger.warning('cluster semaphore [%s] lease lost' % self.name)
+        return False
+
+    def _renew_thread_func(self, stop_event: threading.Event):
+        """
+        同步模式的续约线程函数
+
+        @param {threading.Event} stop_event - 停止事件
+        """
+        while not stop_event.wait(self.ttl / 3.0):
+            if not self._renew():
+                break
+
+    async def _renew_task_func(self):
+        """
+        异步模式的续约任务
+        """
+        _loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.ttl / 3.0)
+            if not await _loop.run_in_executor(None, self._renew):
+                break
+
+
+class ClusterLock(ClusterSemaphore):
+    """
+    集群分布式锁(只允许一个持有者的信号量)
+    """
+
+    def __init__(self, adapter: 'ClusterAdapter', name: str, ttl: float = 10, auto_renew: bool = True,
+            blocking: bool = True, timeout: float = None, retry_interval: float = 0.1, fair: bool = False):
+        """
+        构造函数
+
+        @param {ClusterAdapter} adapter - 集群适配器对象
+        @param {str} name - 锁名称, 同一命名空间和系统下唯一
+        @param {float} ttl=10 - 持有的租约时长, 单位为秒, 超过时长未续约将自动释放
+        @param {bool} auto_renew=True - 持有期间是否自动续约(每ttl/3续约一次)
+        @param {bool} blocking=True - 获取不到时是否等待
+        @param {float} timeout=None - 等待获取的最长时间, 单位为秒, None代表一直等待
+        @param {float} retry_interval=0.1 - 等待期间重试获取的间隔时长, 单位为秒
+        @param {bool} fair=False - 是否按请求的先后顺序公平获取
+        """
+        super().__init__(
+            adapter, name, permits=1, ttl=ttl, auto_renew=auto_renew, blocking=blocking,
+            timeout=timeout, retry_interval=retry_interval, fair=fair
+        )
+
+
+class RateLimitExceeded(Exception):
+    """
+    超过限流限额的异常
+    """
+
+    def __init__(self, name: str, retry_after: float):
+        """
+        构造函数
+
+        @param {str} name - 限流器名称
+        @param {float} retry_after - 需等待的时长, 单位为秒
+        """
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__('rate limit [%s] exceeded, retry after %.3f seconds' % (name, retry_after))
+
+
+class ClusterRateLimiter(object):
+    """
+    集群限流器(GCRA算法, 效果与令牌桶一致)
+    注: 通过ClusterAdapter.rate_limiter获取对象, 如果集群适配器为None则按进程本地限流;
+        可通过prefetch一次从集群预取多个令牌到本地, 后续请求直接消耗本地令牌, 被拒绝后在等待时长内也直接本地拒绝
+    """
+
+    def __init__(self, adapter: 'ClusterAdapter', name: str, rate: int, period: float = 1, burst: int = None,
+            prefetch: int = 1, prefetch_ttl: float = None, fail_open: bool = True, max_local_keys: int = 10000):
+        """
+        构造函数
+
+        @param {ClusterAdapter} adapter - 集群适配器对象, 传入None代表按进程本地限流
+        @param {str} name - 限流器名称, 同一命名空间和系统下相同名称的限流器共享限额
+        @param {int} rate - 每个周期允许通过的请求数
+        @param {float} period=1 - 周期时长, 单位为秒
+        @param {int} burst=None - 允许的突发请求数, 不设置代表与rate一致
+        @param {int} prefetch=1 - 每次从集群预取到本地的令牌数, 大于1时可减少访问集群的次数
+            注: 预取的令牌在集群中已计入限额, 未使用的令牌到期后丢弃, 因此预取过多会导致实际通过量低于限额
+        @param {float} prefetch_ttl=None - 预取令牌在本地的有效时长, 单位为秒, 不设置代表与period一致
+        @param {bool} fail_open=True - 访问集群出现异常时是否放行
+        @param {int} max_local_keys=10000 - 本地缓存状态的key数量上限, 超过时清理已过期的状态
+        """
+        self._adapter = adapter
+        self.name = name
+        self.rate = rate
+        self.period = period
+        self.burst = rate if burst is None else burst
+        self.prefetch = max(1, prefetch)
+        self.prefetch_ttl = period if prefetch_ttl is None else prefetch_ttl
+        self.fail_open = fail_open
+        self.max_local_keys = max_local_keys
+
+        # 令牌的发放间隔, 单位为微秒
+        self._interval = max(1, int(round(period * 1000000 / rate)))
+
+        # 本地状态, key为限流维度的key, value为[预取令牌数, 预取令牌到期时间, 拒绝截止时间, 拒绝时的需求数, 本地限流的tat]
+        self._states = dict()
+        self._lock = threading.Lock()
+
+    #############################
+    # 公共函数
+    #############################
+    def acquire(self, key: str = '', count: int = 1) -> tuple:
+        """
+        尝试获取令牌(不等待)
+
+        @param {str} key='' - 限流维度的key, 例如租户标识, 不同key分别计算限额
+        @param {int} count=1 - 需要获取的令牌数
+
+        @returns {tuple} - 返回(是否获取成功, 需等待的时长(秒)), 获取成功时等待时长为0
+        """
+        _ret = self._acquire_local(key, count)
+        if _ret is None:
+            _ret = self._acquire_remote(key, count)
+
+        return _ret
+
+    async def async_acquire(self, key: str = '', count: int = 1) -> tuple:
+        """
+        尝试获取令牌(不等待, 异步模式)
+
+        @param {str} key='' - 限流维度的key, 例如租户标识, 不同key分别计算限额
+        @param {int} count=1 - 需要获取的令牌数
+
+        @returns {tuple} - 返回(是否获取成功, 需等待的时长(秒)), 获取成功时等待时长为0
+        """
+        _ret = self._acquire_local(key, count)
+        if _ret is None:
+            # 访问集群的阻塞操作放到线程池执行
+            _ret = await asyncio.get_event_loop().run_in_executor(None, self._acquire_remote, key, count)
+
+        return _ret
+
+    def check(self, key: str = '', count: int = 1):
+        """
+        检查是否允许通过, 不允许时抛出RateLimitExceeded异常
+
+        @param {str} key='' - 限流维度的key
+        @param {int} count=1 - 需要获取的令牌数
+        """
+        _allowed, _retry_after = self.acquire(key=key, count=count)
+        if not _allowed:
+            raise RateLimitExceeded(self.name, _retry_after)
+
+    async def async_check(self, key: str = '', count: int = 1):
+        """
+        检查是否允许通过(异步模式), 不允许时抛出RateLimitExceeded异常
+
+        @param {str} key='' - 限流维度的key
+        @param {int} count=1 - 需要获取的令牌数
+        """
+        _allowed, _retry_after = await self.async_acquire(key=key, count=count)
+        if not _allowed:
+            raise RateLimitExceeded(self.name, _retry_after)
+
+    #############################
+    # 内部函数
+    #############################
+    @staticmethod
+    def _gcra(tat: int, now: int, interval: int, burst: int, need: int, want: int) -> tuple:
+        """
+        GCRA算法计算
+
+        @param {int} tat - 当前的理论到达时间(TAT), 单位为微秒
+        @param {int} now - 当前时间, 单位为微秒
+        @param {int} interval - 令牌的发放间隔, 单位为微秒
+        @param {int} burst - 允许的突发请求数
+        @param {int} need - 本次至少需要获取的令牌数
+        @param {int} want - 本次希望获取的令牌数
+
+        @returns {tuple} - 返回(获取到的令牌数, 新的理论到达时间, 需等待的时长(微秒))
+        """
+        _tat = max(tat, now)
+        _available = (now + burst * interval - _tat) // interval
+        if _available < need:
+            return 0, _tat, _tat + (need - burst) * interval - now
+
+        _grant = min(want, _available)
+        return _grant, _tat + _grant * interval, 0
+
+    def _get_state(self, key: str, now: float) -> list:
+        """
+        获取本地状态(需在锁内调用)
+
+        @param {str} key - 限流维度的key
+        @param {float} now - 当前时间(time.monotonic)
+
+        @returns {list} - 本地状态
+        """
+        _state = self._states.get(key, None)
+        if _state is None:
+            if len(self._states) >= self.max_local_keys:
+                # 清理已过期的状态
+                _now_us = int(now * 1000000)
+                for _key in [
+                    _key for _key, _val in self._states.items()
+                    if _val[1] <= now and _val[2] <= now and _val[4] <= _now_us
+                ]:
+                    self._states.pop(_key)
+
+            _state = [0, 0, 0, 0, 0]
+            self._states[key] = _state
+
+        return _state
+
+    def _acquire_local(self, key: str, count: int) -> tuple:
+        """
+        尝试在本地完成令牌获取
+
+        @param {str} key - 限流维度的key
+        @param {int} count - 需要获取的令牌数
+
+        @returns {tuple} - 返回(是否获取成功, 需等待的时长(秒)), 需要访问集群时返回None
+        """
+        if count > self.burst:
+            raise ValueError('count [%d] is greater than burst [%d]' % (count, self.burst))
+
+        _now = time.monotonic()
+        with self._lock:
+            if self._adapter is None:
+                # 进程本地限流
+                _state = self._get_state(key, _now)
+                _grant, _state[4], _retry_after = self._gcra(
+                    _state[4], int(_now * 1000000), self._interval, self.burst, count, count
+                )
+                return (True, 0) if _grant > 0 else (False, _retry_after / 1000000)
+
+            _state = self._states.get(key, None)
+            if _state is None:
+                return None
+
+            if _state[0] >= count and _state[1] > _now:
+                # 消耗预取的令牌
+                _state[0] -= count
+                return True, 0
+
+            if _state[2] > _now and count >= _state[3]:
+                # 仍在拒绝等待时长内
+                return False, _state[2] - _now
+
+        return None
+
+    def _acquire_remote(self, key: str, count: int) -> tuple:
+        """
+        从集群获取令牌
+
+        @param {str} key - 限流维度的key
+        @param {int} count - 需要获取的令牌数
+
+        @returns {tuple} - 返回(是否获取成功, 需等待的时长(秒))
+        """
+        try:
+            _grant, _retry_after = self._adapter._acquire_rate_tokens_self(
+                self.name, key, self._interval, self.burst, count, max(count, self.prefetch)
+            )
+        except:
+            self._adapter.logger.error('acquire rate limiter [%s] tokens error: %s' % (
+                self.name, traceback.format_exc()
+            ))
+            return (True, 0) if self.fail_open else (False, 0)
+
+        _now = time.monotonic()
+        with self._lock:
+            _state = self._get_state(key, _now)
+            if _grant < count:
+                _state[2] = _now + _retry_after
+                _state[3] = count
+                return False, _retry_after
+
+            if _grant > count:
+                # 多获取的令牌放入本地
+                if _state[1] <= _now:
+                    _state[0] = 0
+                _state[0] += _grant - count
+                _state[1] = _now + self.prefetch_ttl
+
+            return True, 0
@@ -14,6 +14,8 @@
 """
 import os
 import sys
+import bisect
+from random import random
 # 根据当前文件路径将包路径纳入, 在非安装的情况下可以引用到
 sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir, os.path.pardir, os.path.pardir)))
@@ -124,13 +126,20 @@ class NamingAdapter(AdapterBaseFw):
         """
         raise NotImplementedError()
 
-    async def get_instance(self, service_name: str, group_name: str = None, healthy_only: bool = True) -> dict:
+    async def get_instance(self, service_name: str, group_name: str = None, healthy_only: bool = True,
+            locality: dict = None) -> dict:
         """
         获取一个可用的实例
 
         @param {str} service_name - 服务名
         @param {str} group_name=None - 所属分组, 如不传则默认为'DEFAULT_GROUP'
         @param {bool} healthy_only=True - 是否只列出健康的实例
+        @param {dict} locality=None - 就近选择实例的参数, 不传代表不考虑实例位置
+            enable {bool} - 是否启用, 默认为True
+            levels {list} - 位置属性清单, 按优先顺序排列, 默认为['cluster_name', 'zone']
+                注: 实例的位置属性优先从实例信息获取, 获取不到则从实例的metadata中获取
+            min_healthy {int} - 本地健康实例数低于该值时使用下一级位置的实例, 默认为1
+            min_healthy_ratio {float} - 本地健康实例比例低于该值时使用下一级位置的实例, 默认为0.0
 
         @returns {dict} - 实例信息, 如果找不到返回None, 实例信息格式如下
             {
@@ -175,3 +184,154 @@ class NamingAdapter(AdapterBaseFw):
         实现类继承实现的初始化函数
         """
         pass
+
+
+class NamingInstanceSnapshot(object):
+    """
+    服务实例清单的不可变快照
+    注: 在订阅信息更新时构建并整体替换, 读取时无需加锁; 预先区分健康实例并计算累计权重,
+        按权重选择实例时通过二分查找完成, 无需每次遍历清单
+    """
+
+    __slots__ = ('instances', 'healthy', 'unhealthy', '_healthy_weights', '_unhealthy_weights', '_locality_snapshots')
+
+    def __init__(self, instances: list):
+        """
+        构造函数
+
+        @param {list} instances - 实例清单, 每个实例的格式与NamingAdapter.list_instance返回的实例信息一致
+            注: 实例信息字典在快照间共享, 使用方不应修改
+        """
+        self.instances = tuple(instances)
+        self.healthy = tuple(_info for _info in self.instances if _info.get('healthy', False))
+        self.unhealthy = tuple(_info for _info in self.instances if not _info.get('healthy', False))
+        self._healthy_weights = self._get_prefix_weights(self.healthy)
+        self._unhealthy_weights = self._get_prefix_weights(self.unhealthy)
+        # 按位置筛选的实例快照缓存, key为(属性名, 属性值)
+        self._locality_snapshots = dict()
+
+    def list(self, healthy_only: bool = True) -> list:
+        """
+        获取实例清单
+
+        @param {bool} healthy_only=True - 是否只列出健康的实例
+
+        @returns {list} - 实例清单
+        """
+        return list(self.healthy if healthy_only else self.instances)
+
+    def choose(self, healthy_only: bool = True) -> dict:
+        """
+        按权重随机选择一个实例
+        注: 优先选择健康的实例, 如果没有健康实例且healthy_only为False, 从不健康的实例中选择
+
+        @param {bool} healthy_only=True - 是否只选择健康的实例
+
+        @returns {dict} - 实例信息, 如果找不到返回None
+        """
+        if len(self.healthy) > 0:
+            return self._weighted_choice(self.healthy, self._healthy_weights)
+
+        if not healthy_only and len(self.unhealthy) > 0:
+            return self._weighted_choice(self.unhealthy, self._unhealthy_weights)
+
+        return None
+
+    def choose_local(self, levels: list, healthy_only: bool = True, min_healthy: int = 1,
+            min_healthy_ratio: float = 0.0) -> dict:
+        """
+        按位置就近选择实例
+        注: 按位置清单的顺序逐级查找与本地位置相同的实例, 如果该级的健康实例数量或比例低于阈值,
+            则使用下一级位置的实例, 所有位置都不满足时从全部实例中选择
+
+        @param {list} levels - 位置清单, 按优先顺序排列, 每项为(位置属性名, 本地属性值), 本地属性值为None时跳过
+        @param {bool} healthy_only=True - 是否只选择健康的实例
+        @param {int} min_healthy=1 - 本地健康实例数低于该值时使用下一级位置的实例
+        @param {float} min_healthy_ratio=0.0 - 本地健康实例比例低于该值时使用下一级位置的实例
+
+        @returns {dict} - 实例信息, 如果找不到返回None
+        """
+        for _key, _value in levels:
+            if _value is None:
+                continue
+
+            _local = self.get_locality_snapshot(_key, _value)
+            _healthy = len(_local.healthy)
+            if _healthy > 0 and _healthy >= min_healthy and _healthy >= min_healthy_ratio * len(_local.instances):
+                return _local.choose(healthy_only=True)
+
+        return self.choose(healthy_only=healthy_only)
+
+    def get_locality_snapshot(self, key: str, value) -> 'NamingInstanceSnapshot':
+        """
+        获取指定位置的实例快照
+
+        @param {str} key - 位置属性名, 优先从实例信息获取, 获取不到则从实例的metadata中获取
+        @param {Any} value - 位置属性值
+
+        @returns {NamingInstanceSnapshot} - 位置属性值相同的实例快照
+        """
+        _snapshot = self._locality_snapshots.get((key, value), None)
+        if _snapshot is None:
+            _snapshot = NamingInstanceSnapshot([
+                _info for _info in self.instances if self._get_locality_value(_info, key) == value
+            ])
+            self._locality_snapshots[(key, value)] = _snapshot
+
+        return _snapshot
+
+    @staticmethod
+    def _get_locality_value(info: dict, key: str):
+        """
+        获取实例的位置属性值
+
+        @param {dict} info - 实例信息
+        @param {str} key - 位置属性名
+
+        @returns {Any} - 位置属性值
+        """
+        _value = info.get(key, None)
+        if _value is None:
+            _value = (info.get('metadata', None) or {}).get(key, None)
+
+        return _value
+
+    @staticmethod
+    def _get_prefix_weights(instances: tuple) -> tuple:
+        """
+        计算实例清单的累计权重
+
+        @param {tuple} instances - 实例清单
+
+        @returns {tuple} - 累计权重数组, 第i项为前i+1个实例的权重加总
+        """
+        _total_weight = 0.0
+        _weights = []
+        for _info in instances:
+            _weight = _info.get('weight', None)
+            _total_weight += 1.0 if _weight is None else max(float(_weight), 0.0)
+            _weights.append(_total_weight)
+
+        return tuple(_weights)
+
+    @staticmethod
+    def _weighted_choice(instances: tuple, weights: tuple) -> dict:
+        """
+        按累计权重随机选择实例
+
+        @param {tuple} instances - 实例清单
+        @param {tuple} weights - 累计权重数组
+
+        @returns {dict} - 选中的实例
+        """
+        _len = len(instances)
+        if _len == 1:
+            return instances[0]
+
+        _total_weight = weights[-1]
+        if _total_weight <= 0:
+            # 权重全部为0, 平均选择
+            return instances[int(random() * _len) % _len]
+
+        _index = bisect.bisect_right(weights, random() * _total_weight)
+        return instances[min(_index, _len - 1)]
@@ -671,7 +671,8 @@ class TracerAdapter(AdapterBaseFw):
         # 关闭span
         scope.close()
 
-    def _get_method_info_obj(self, func: Callable, args: tuple, kwargs: dict) -> dict:
+    @classmethod
+    def _get_method_info_obj(cls, func: Callable, args: tuple, kwargs: dict) -> dict:
         """
         获取函数对象的信息
 
@@ -739,7 +740,8 @@ class TracerAdapter(AdapterBaseFw):
         }
         return method_info_obj
 
-    def _get_obj_info(self, obj_type: str, obj: Any, para_str: str, default: Any = None) -> Any:
+    @classmethod
+    def _get_obj_info(cls, obj_type: str, obj: Any, para_str: str, default: Any = None) -> Any:
         """
         从请求或响应对象获取指定参数值的通用函数
 
@@ -767,23 +769,24 @@ class TracerAdapter(AdapterBaseFw):
             return get_para
         elif obj_type in ('req', 'para'):
             # 请求对象和函数入参的处理方式一样
-            return self._get_obj_info_from_method(
+            return cls._get_obj_info_from_method(
                 obj, get_type, get_para, default=default
             )
         elif obj_type == 'resp':
             # 请求返回对象的信息获取
-            return self._get_obj_info_from_resp(
+            return cls._get_obj_info_from_resp(
                 obj, get_type, get_para, default=default
             )
         elif obj_type == 'return':
-            return self._get_obj_info_from_return(
+            return cls._get_obj_info_from_return(
                 obj, get_type, get_para, default=default
             )
         else:
             # 不支持的类型
             return default
 
-    def _get_obj_info_from_method(self, method_info_obj: dict, get_type: str, get_para: str, default: Any = None) -> Any:
+    @classmethod
+    def _get_obj_info_from_method(cls, method_info_obj: dict, get_type: str, get_para: str, default: Any = None) -> Any:
         """
         从函数信息字典中获取指定参数的信息
 
@@ -835,7 +838,8 @@ class TracerAdapter(AdapterBaseFw):
         except:
             return default
 
-    def _get_obj_info_from_resp(self, resp_obj: dict, get_type: str, get_para: str, default: Any = None) -> Any:
+    @classmethod
+    def _get_obj_info_from_resp(cls, resp_obj: dict, get_type: str, get_para: str, default: Any = None) -> Any:
         """
         从请求返回对象中获取指定参数的信息
 
@@ -876,7 +880,8 @@ class TracerAdapter(AdapterBaseFw):
         except:
             return default
 
-    def _get_obj_info_from_return(self, ret_obj: Any, get_type: str, get_para: str, default: Any = None) -> Any:
+    @classmethod
+    def _get_obj_info_from_return(cls, ret_obj: Any, get_type: str, get_para: str, default: Any = None) -> Any:
         """
         从函数返回对象中获取指定参数的信息
 
@@ -14,6 +14,8 @@ web服务适配器
 """
 import os
 import sys
+import json
+import math
 from functools import wraps
 import traceback
 from typing import Callable
@@ -26,6 +28,8 @@ from HiveNetMicro.core.adapter_base import AdapterBaseFw
 from HiveNetMicro.core.global_manager import GlobalManager
 from HiveNetMicro.core.logger_manager import LoggerManager
 from HiveNetMicro.interface.adapter.formater import RouterTools
+from HiveNetMicro.interface.adapter.tracer import TracerAdapter
+from HiveNetMicro.interface.adapter.cluster import ClusterRateLimiter, RateLimitExceeded
 
 
 class WebAdapter(AdapterBaseFw):
@@ -151,6 +155,9 @@ class WebAdapter(AdapterBaseFw):
         @param {dict} service_config - 服务配置字典
             注: 为services.yaml配置中services下服务配置标识的完整配置字典
         """
+        # 服务限流规则
+        _rate_limit_rules = self._get_rate_limit_rules(service_uri, service_config)
+
         def decorator(f):
             @wraps(f)
             async def decorated_function(*args, **kwargs):
@@ -187,6 +194,10 @@ class WebAdapter(AdapterBaseFw):
                             _inf_logging.log('S', 'R', _std_request, service_config=service_config)
                         )
 
+                    # 服务限流检查, 超过限额将抛出RateLimitExceeded异常
+                    if _rate_limit_rules is not None:
+                        await self._check_rate_limit(_rate_limit_rules, f, [_std_request] + _real_args, kwargs)
+
                     # 执行请求处理函数
                     _std_response = f(_std_request, *_real_args, **kwargs)
                     if isawaitable(_std_response):
@@ -207,7 +218,11 @@ class WebAdapter(AdapterBaseFw):
                     # 返回结果
                     return _web_response
                 except Exception as e:
-                    self.logger.error('service handler exception: %s' % traceback.format_exc())
+                    if isinstance(e, RateLimitExceeded):
+                        # 超过限流属于正常的拒绝, 无需记录异常堆栈
+                        self.logger.warning('service [%s] rejected: %s' % (service_uri, str(e)))
+                    else:
+                        self.logger.error('service handler exception: %s' % traceback.format_exc())
 
                     if _formater is None:
                         raise
@@ -215,6 +230,12 @@ class WebAdapter(AdapterBaseFw):
                         _std_response = _formater.format_exception(
                             _web_request, e, service_config=service_config, is_std_request=False
                         )
+                        if isinstance(e, RateLimitExceeded):
+                            _std_response.setdefault('network', {})['status'] = service_config[
+                                'rate_limit'].get('status', 429)
+                            _std_response.setdefault('headers', {})['Retry-After'] = str(
+                                max(1, math.ceil(e.retry_after))
+                            )
                         _web_response = _formater.generate_web_response(_std_response)
 
                         # 记录异常情况响应的日志信息
@@ -227,3 +248,59 @@ class WebAdapter(AdapterBaseFw):
 
             return decorated_function
         return decorator
+
+    def _get_rate_limit_rules(self, service_uri: str, service_config: dict) -> list:
+        """
+        获取服务的限流规则
+
+        @param {str} service_uri - 服务标识路径
+        @param {dict} service_config - 服务配置字典
+
+        @returns {list} - 限流规则清单, 每项为(限流器对象, 限流维度的参数表达式列表), 未配置限流返回None
+        """
+        _rate_limit = service_config.get('rate_limit', None)
+        if _rate_limit is None:
+            return None
+
+        # 未启用集群时按进程本地限流
+        _cluster = GlobalManager.GET_SYS_CLUSTER() if _rate_limit.get('use_cluster', True) else None
+        _rules = list()
+        for _index, _rule in enumerate(_rate_limit.get('rules', [])):
+            _name = _rule.get('name', None)
+            if _name is None:
+                _name = '%s_%d' % (service_config.get('service_name', service_uri), _index)
+
+            _limiter = ClusterRateLimiter(
+                _cluster, _name, _rule['rate'], period=_rule.get('period', 1), burst=_rule.get('burst', None),
+                prefetch=_rule.get('prefetch', 1), prefetch_ttl=_rule.get('prefetch_ttl', None),
+                fail_open=_rate_limit.get('fail_open', True)
+            )
+            _rules.append((_limiter, _rule.get('key_paras', None)))
+
+        return _rules
+
+    async def _check_rate_limit(self, rules: list, func: Callable, args: list, kwargs: dict):
+        """
+        按限流规则检查请求是否允许执行, 不允许时抛出RateLimitExceeded异常
+
+        @param {list} rules - 限流规则清单
+        @param {Callable} func - 请求处理函数
+        @param {list} args - 请求处理函数的固定位置入参, 第一个为标准请求对象
+        @param {dict} kwargs - 请求处理函数的key-value入参
+        """
+        _method_info_obj = None
+        for _limiter, _key_paras in rules:
+            _key = ''
+            if _key_paras is not None:
+                if _method_info_obj is None:
+                    _method_info_obj = TracerAdapter._get_method_info_obj(func, args, kwargs)
+
+                _vals = list()
+                for _para in _key_paras:
+                    _val = TracerAdapter._get_obj_info('req', _method_info_obj, _para)
+                    if type(_val) != str:
+                        _val = json.dumps(_val, ensure_ascii=False, sort_keys=True, default=str)
+                    _vals.append(_val)
+                _key = ':'.join(_vals)
+
+            await _limiter.async_check(key=_key)
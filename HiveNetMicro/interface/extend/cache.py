@@ -13,15 +13,345 @@
 """
 import os
 import sys
+import math
+import asyncio
+import time
+import bisect
+import uuid
+import random
+import json
+import hashlib
+import inspect
+import threading
 import traceback
-from typing import Any
-from HiveNetCore.utils.run_tool import AsyncTools
+from functools import wraps
+from typing import Any, Callable
+from HiveNetCore.parallel import Timer
+from HiveNetCore.utils.run_tool import RunTool, AsyncTools
 # 根据当前文件路径将包路径纳入, 在非安装的情况下可以引用到
 sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir, os.path.pardir, os.path.pardir)))
 from HiveNetMicro.core.adapter_base import AdapterBaseFw
 from HiveNetMicro.core.global_manager import GlobalManager
 from HiveNetMicro.core.logger_manager import LoggerManager
+from HiveNetMicro.interface.adapter.tracer import TracerAdapter
+
+
+class CachePipeline(object):
+    """
+    缓存批量处理管道
+    注: 在管道上调用的缓存操作函数不会立即执行, 而是登记在管道中, 在execute(或退出with语句)时一次性提交执行, 例如:
+        with cache.pipeline() as _pipe:
+            _pipe.set('a', 1)
+            _pipe.hset('b', 'k', 'v')
+        print(_pipe.results)
+    """
+
+    # 支持在管道中执行的缓存操作函数
+    SUPPORT_OPS = (
+        'delete', 'mdelete', 'rename', 'exists', 'set', 'get', 'mset', 'mget', 'set_expire',
+        'set_counter', 'incr_counter', 'decr_counter', 'list_len', 'list_clear', 'lpush', 'rpush',
+        'list_range', 'list_remove', 'lpop', 'rpop', 'hset', 'hmset', 'hget', 'hmget', 'hgetall', 'hdel',
+        'hexists', 'hkeys'
+    )
+
+    def __init__(self, cache_adapter, transaction: bool = False):
+        """
+        构造函数
+
+        @param {CacheAdapter} cache_adapter - 缓存适配器对象
+        @param {bool} transaction=False - 是否以事务方式执行(要么全部执行, 要么全部不执行)
+        """
+        self.cache_adapter = cache_adapter
+        self.transaction = transaction
+        self.ops = []  # 登记的操作清单, 每个操作为(op, args, kwargs)
+        self.results = None  # 执行结果列表, 与登记的操作顺序一一对应
+
+    def __enter__(self):
+        """
+        with语句进入
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        """
+        with语句退出, 如果没有异常则执行管道中的操作
+        """
+        if exc_type is None:
+            self.execute()
+        else:
+            self.reset()
+
+    def __getattr__(self, name: str):
+        """
+        获取缓存操作的登记函数
+
+        @param {str} name - 缓存操作函数名
+        """
+        if name not in self.SUPPORT_OPS:
+            raise AttributeError('pipeline not support op [%s]' % name)
+
+        def _add_op(*args, **kwargs):
+            self.ops.append((name, args, kwargs))
+            return self
+
+        return _add_op
+
+    def execute(self) -> list:
+        """
+        执行管道中登记的操作
+
+        @returns {list} - 执行结果列表, 与登记的操作顺序一一对应, 结果值与直接执行缓存操作函数的返回值一致
+        """
+        try:
+            self.results = self.cache_adapter._execute_pipeline(
+                self.ops, transaction=self.transaction
+            )
+        finally:
+            self.ops = []
+
+        return self.results
+
+    def reset(self):
+        """
+        清空管道中登记的操作
+        """
+        self.ops = []
+
+
+class CacheMetrics(object):
+    """
+    缓存指标统计对象
+    注: 统计缓存命中/未命中、自动缓存加载耗时、操作耗时分布、按分组的读写字节数, 以及基于抽样的热点key检测
+        (count-min sketch估算访问次数并保留访问最多的top-K个key)
+    """
+
+    # 需统计命中情况的读取操作
+    HIT_OPS = ('get', 'mget', 'hget', 'hmget', 'hgetall')
+
+    def __init__(self, latency_buckets: list = None, hot_key_sample_rate: float = 0.01,
+            hot_key_top_k: int = 20, sketch_width: int = 2048, sketch_depth: int = 4):
+        """
+        构造函数
+
+        @param {list} latency_buckets=None - 操作耗时分布的分段上限列表, 单位为毫秒, 默认为[1, 5, 10, 50, 100, 500, 1000]
+        @param {float} hot_key_sample_rate=0.01 - 热点key检测的抽样比例, 为0代表不检测热点key
+        @param {int} hot_key_top_k=20 - 热点key检测保留的key数量
+        @param {int} sketch_width=2048 - count-min sketch每行的计数器数量
+        @param {int} sketch_depth=4 - count-min sketch的行数(哈希函数数量)
+        """
+        self.latency_buckets = sorted(
+            [1, 5, 10, 50, 100, 500, 1000] if latency_buckets is None else latency_buckets
+        )
+        self.hot_key_sample_rate = hot_key_sample_rate
+        self.hot_key_top_k = hot_key_top_k
+        self.sketch_width = sketch_width
+        self.sketch_depth = sketch_depth
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        重置统计数据
+        """
+        with self._lock:
+            self._reset_stat()
+
+    def record_op(self, op: str, group: str, name: str, result: Any, duration: float):
+        """
+        记录缓存操作
+
+        @param {str} op - 操作函数名
+        @param {str} group - 缓存所属分组
+        @param {str} name - 缓存名, 为None代表无法获取
+        @param {Any} result - 操作结果
+        @param {float} duration - 操作耗时, 单位为秒
+        """
+        _hits, _misses = self._get_hit_count(op, result)
+        _ms = duration * 1000
+        with self._lock:
+            # 耗时分布
+            _latency = self._latency.get(op, None)
+            if _latency is None:
+                _latency = {'count': 0, 'sum': 0.0, 'max': 0.0, 'buckets': [0] * (len(self.latency_buckets) + 1)}
+                self._latency[op] = _latency
+
+            _latency['count'] += 1
+            _latency['sum'] += _ms
+            _latency['max'] = max(_latency['max'], _ms)
+            _latency['buckets'][bisect.bisect_left(self.latency_buckets, _ms)] += 1
+
+            # 命中情况
+            if _hits + _misses > 0:
+                _stat = self._get_group_stat(group)
+                _stat['hits'] += _hits
+                _stat['misses'] += _misses
+
+            # 抽样记录热点key
+            if name is not None and self.hot_key_sample_rate > 0 and random.random() < self.hot_key_sample_rate:
+                self._add_hot_key((group, name))
+
+    def record_load(self, name: str, group: str, duration: float):
+        """
+        记录自动缓存的加载耗时
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+        @param {float} duration - 加载耗时, 单位为秒
+        """
+        _ms = duration * 1000
+        with self._lock:
+            _load = self._loads.get((group, name), None)
+            if _load is None:
+                _load = {'count': 0, 'sum': 0.0, 'max': 0.0, 'last': 0.0}
+                self._loads[(group, name)] = _load
+
+            _load['count'] += 1
+            _load['sum'] += _ms
+            _load['max'] = max(_load['max'], _ms)
+            _load['last'] = _ms
+
+    def record_bytes(self, group: str, bytes_in: int = 0, bytes_out: int = 0):
+        """
+        记录缓存值的读写字节数
+
+        @param {str} group - 缓存所属分组
+        @param {int} bytes_in=0 - 从缓存服务读取的字节数
+        @param {int} bytes_out=0 - 写入缓存服务的字节数
+        """
+        with self._lock:
+            _stat = self._get_group_stat(group)
+            _stat['bytes_in'] += bytes_in
+            _stat['bytes_out'] += bytes_out
+
+    def get_metrics(self, reset: bool = False) -> dict:
+        """
+        获取统计指标
+
+        @param {bool} reset=False - 获取后是否重置统计数据
+
+        @returns {dict} - 统计指标字典, 格式为:
+            {
+                'groups': {
+                    分组标识: {'hits': 命中次数, 'misses': 未命中次数, 'hit_rate': 命中率, 'bytes_in': 读取字节数, 'bytes_out': 写入字节数},
+                    ...
+                },
+                'latency': {
+                    操作函数名: {
+                        'count': 次数, 'avg': 平均耗时(毫秒), 'max': 最大耗时(毫秒),
+                        'buckets': {'1': 耗时小于等于1毫秒的次数, ..., 'inf': 超过最大分段的次数}
+                    },
+                    ...
+                },
+                'loads': [{'group': 分组, 'name': 缓存名, 'count': 加载次数, 'avg': 平均耗时, 'max': 最大耗时, 'last': 最近耗时}, ...],
+                'hot_keys': [{'group': 分组, 'name': 缓存名, 'count': 估算的访问次数}, ...]  # 按访问次数倒序
+            }
+        """
+        with self._lock:
+            _groups = {}
+            for _group, _stat in self._groups.items():
+                _total = _stat['hits'] + _stat['misses']
+                _groups[_group] = dict(_stat)
+                _groups[_group]['hit_rate'] = None if _total == 0 else _stat['hits'] / _total
+
+            _latency = {}
+            _bucket_names = [str(_bucket) for _bucket in self.latency_buckets] + ['inf']
+            for _op, _stat in self._latency.items():
+                _latency[_op] = {
+                    'count': _stat['count'], 'avg': _stat['sum'] / _stat['count'], 'max': _stat['max'],
+                    'buckets': dict(zip(_bucket_names, _stat['buckets']))
+                }
+
+            _loads = [
+                {
+                    'group': _key[0], 'name': _key[1], 'count': _stat['count'],
+                    'avg': _stat['sum'] / _stat['count'], 'max': _stat['max'], 'last': _stat['last']
+                } for _key, _stat in self._loads.items()
+            ]
+
+            _hot_keys = [
+                {'group': _key[0], 'name': _key[1], 'count': round(_count / self.hot_key_sample_rate)}
+                for _key, _count in sorted(self._top_keys.items(), key=lambda _item: _item[1], reverse=True)
+            ]
+
+            if reset:
+                # 在同一个锁内重置, 避免丢失获取快照与重置之间记录的数据
+                self._reset_stat()
+
+        return {'groups': _groups, 'latency': _latency, 'loads': _loads, 'hot_keys': _hot_keys}
+
+    #############################
+    # 内部函数
+    #############################
+    def _reset_stat(self):
+        """
+        重置统计数据(调用方需持有锁)
+        """
+        self._groups = {}  # 按分组的统计, key为分组标识
+        self._latency = {}  # 按操作的耗时分布, key为操作函数名
+        self._loads = {}  # 自动缓存加载耗时, key为(group, name)
+        self._sketch = [[0] * self.sketch_width for _i in range(self.sketch_depth)]
+        self._top_keys = {}  # 热点key候选, key为(group, name), value为估算的抽样次数
+
+    def _get_group_stat(self, group: str) -> dict:
+        """
+        获取分组的统计字典(不存在则创建)
+
+        @param {str} group - 缓存所属分组
+
+        @returns {dict} - 分组统计字典
+        """
+        _stat = self._groups.get(group, None)
+        if _stat is None:
+            _stat = {'hits': 0, 'misses': 0, 'bytes_in': 0, 'bytes_out': 0}
+            self._groups[group] = _stat
+
+        return _stat
+
+    def _get_hit_count(self, op: str, result: Any) -> tuple:
+        """
+        获取操作结果的命中及未命中次数
+
+        @param {str} op - 操作函数名
+        @param {Any} result - 操作结果
+
+        @returns {tuple} - (命中次数, 未命中次数)
+        """
+        if op not in self.HIT_OPS:
+            return 0, 0
+
+        if op in ('get', 'hget'):
+            return (0, 1) if result is None else (1, 0)
+        elif op == 'hgetall':
+            return (1, 0) if result else (0, 1)
+
+        # mget和hmget按值统计
+        _values = result.values() if op == 'hmget' else result
+        if _values is None:
+            return 0, 0
+
+        _hits = len([_val for _val in _values if _val is not None])
+        return _hits, len(_values) - _hits
+
+    def _add_hot_key(self, key: tuple):
+        """
+        将抽样的key加入count-min sketch并更新热点key候选
+
+        @param {tuple} key - (group, name)
+        """
+        _count = None
+        for _i in range(self.sketch_depth):
+            _row = self._sketch[_i]
+            _index = hash((_i, key)) % self.sketch_width
+            _row[_index] += 1
+            _count = _row[_index] if _count is None else min(_count, _row[_index])
+
+        self._top_keys[key] = _count
+        if len(self._top_keys) > self.hot_key_top_k:
+            # 删除估算次数最小的候选
+            _min_key = min(self._top_keys, key=self._top_keys.get)
+            self._top_keys.pop(_min_key)
 
 
 class CacheAdapter(AdapterBaseFw):
@@ -41,6 +371,9 @@ class CacheAdapter(AdapterBaseFw):
         """
         return 'Cache'
 
+    # 进行指标统计的缓存操作函数
+    METRICS_OPS = CachePipeline.SUPPORT_OPS + ('keys', 'delete_group', 'get_group', 'set_list')
+
     #############################
     # 构造函数
     #############################
@@ -61,6 +394,17 @@ class CacheAdapter(AdapterBaseFw):
                         注: 函数执行结果为True才会重新加载函数, 如果不设置该函数, 视为每次都重新加载数据
                     check_args {list} - 缓存更新检查函数的固定入参列表
                     check_kwargs {dict} - 缓存更新检查函数的key-value入参字典
+                    ex {float} - 缓存过期时长, 单位为秒, 默认为None(不过期)
+                    lock_ex {float} - 缓存加载锁的租约时长, 单位为秒, 默认为30
+                    lock_wait {float} - 缓存不存在且其他进程正在加载时, 等待加载完成的最长时间, 单位为秒, 默认为5
+                    early_refresh_beta {float} - 概率提前刷新系数(需设置ex), 越大越倾向提前刷新, 默认为0(不提前刷新)
+                    stale_while_revalidate {bool} - 缓存过期后是否先返回旧值并在后台刷新(需设置ex), 默认为False
+                    stale_ex {float} - stale_while_revalidate模式下缓存过期后旧值的保留时长, 单位为秒, 默认与ex一致
+                    refresh_interval {float} - 后台定时刷新的间隔时长, 单位为秒, 默认为None(不定时刷新)
+                    refresh_crontab {str} - 后台定时刷新的crontab表达式(需设置refresh_scheduler), 默认为None
+                    refresh_on_master {bool} - 是否只在集群主服务执行定时刷新, 默认为True
+                    incremental {bool} - 是否启用增量加载(仅支持list和dict类型), 默认为False
+                    delta_max_size {int} - 增量加载的最大变更数量, 超过该数量将改为全量加载, 默认为None(不限制)
         @param {dict} auto_cache_init_handlers=None - 自动缓存管理初始化的函数对象索引
             'load_handlers' {dict} - 缓存数据获取函数索引
                 [id] {dict} - 函数对象索引id, key为索引id标识字符串
@@ -74,8 +418,17 @@ class CacheAdapter(AdapterBaseFw):
                                 'name': '',  # 缓存名
                                 'group': '',  # 缓存所属数组
                                 'cache_type': '',  # 缓存类型
+                                'version': '',  # 增量加载模式当前缓存数据的版本, 如果为None代表需全量加载
                             }
                         函数返回值根据缓存类型采取不同的返回方式:  base类型直接返回单个缓存值, list类型返回缓存值的list清单, dict类型返回缓存字典
+                        如果是增量加载模式, 函数返回值为字典, 格式为:
+                            {
+                                'version': '',  # 加载后的数据版本
+                                'full': False,  # 是否全量数据, 如果为True代表datas为全量数据
+                                'datas': ...,  # 全量数据(full为True时使用), 格式与非增量模式一致
+                                'upserts': ...,  # 增量更新的数据, dict类型为要新增或修改的key-value字典, list类型为要添加到列表末尾的值列表
+                                'deletes': []  # 增量删除的数据, dict类型为要删除的key列表, list类型为要从列表中删除的值列表
+                            }
                     args {list} - 默认的缓存获取函数的固定入参列表(当自动缓存管理参数不设置时使用该值传入)
                     kwargs {dict} - 默认的缓存获取函数的key-value入参字典(当自动缓存管理参数不设置时使用该值传入)
             'check_handlers' {dict} - 检查缓存数据是否需更新的检查函数索引
@@ -88,6 +441,19 @@ class CacheAdapter(AdapterBaseFw):
                         函数返回值为bool对象, 指示缓存数据是否需要更新
                     args {list} - 默认的缓存更新检查函数的固定入参列表(当自动缓存管理参数不设置时使用该值传入)
                     kwargs {dict} - 默认的缓存更新检查函数的key-value入参字典(当自动缓存管理参数不设置时使用该值传入)
+        @param {str|SchedulerAdapter} refresh_scheduler=None - 自动缓存定时刷新所使用的任务调度适配器
+            注: 如果传入的是str代表从SYS_ADAPTER_MANAGER中获取类型为Scheduler的对应适配器, 调度服务需自行启动;
+                如果不设置, 将使用内部定时器执行按间隔时长的刷新(不支持crontab)
+        @param {dict} metrics=None - 缓存指标统计参数, 如果不设置代表不进行统计
+            latency_buckets {list} - 操作耗时分布的分段上限列表, 单位为毫秒, 默认为[1, 5, 10, 50, 100, 500, 1000]
+            hot_key_sample_rate {float} - 热点key检测的抽样比例, 默认为0.01, 为0代表不检测热点key
+            hot_key_top_k {int} - 热点key检测保留的key数量, 默认为20
+            sketch_width {int} - 热点key检测count-min sketch每行的计数器数量, 默认为2048
+            sketch_depth {int} - 热点key检测count-min sketch的行数, 默认为4
+            report_interval {float} - 定时输出统计指标的间隔时长, 单位为秒, 默认为None(不定时输出)
+            report_handler {function|str} - 定时输出统计指标的处理函数, 函数定义为func(metrics: dict)
+                注: 如果传入的是str代表从SYS_ADAPTER_MANAGER中获取类型为DynamicObject的对应函数对象
+            reset_on_report {bool} - 定时输出统计指标后是否重置统计数据, 默认为True
         @param {str} logger_id=None - 日志对象标识, 可以选择application.yaml配置中的其中一个日志对象
         @param {kwargs} - 实现类的自定义参数
             ...
@@ -106,9 +472,36 @@ class CacheAdapter(AdapterBaseFw):
         # 适配器管理模块
         self.sys_adapter_manager = GlobalManager.GET_SYS_ADAPTER_MANAGER()
 
+        # 缓存指标统计
+        self._metrics = None
+        self._metrics_report_timer = None
+        _metrics_config = self._kwargs.get('metrics', None)
+        if _metrics_config is not None:
+            _metrics_config = dict(_metrics_config)
+            _report_interval = _metrics_config.pop('report_interval', None)
+            _report_handler = _metrics_config.pop('report_handler', None)
+            self._metrics_reset_on_report = _metrics_config.pop('reset_on_report', True)
+            self._metrics = CacheMetrics(**_metrics_config)
+
         # 执行实现类的初始化函数
         self._self_init()
 
+        if self._metrics is not None:
+            # 包裹缓存操作函数进行统计
+            for _op in self.METRICS_OPS:
+                setattr(self, _op, self._get_metrics_wrapped_op(_op, getattr(self, _op)))
+
+            # 定时输出统计指标
+            if _report_interval is not None and _report_handler is not None:
+                if type(_report_handler) == str:
+                    _report_handler = self.sys_adapter_manager.get_adapter('DynamicObject', _report_handler)
+
+                self._metrics_report_timer = Timer(
+                    _report_interval, self._report_metrics, args=[_report_handler]
+                )
+                self._metrics_report_timer.setDaemon(True)
+                self._metrics_report_timer.start()
+
         # 自动缓存管理初始化的函数对象索引参数
         self._auto_cache_init_handlers = {
             'load_handlers': {}, 'check_handlers': {}
@@ -142,6 +535,14 @@ class CacheAdapter(AdapterBaseFw):
                     'kwargs': _paras.get('kwargs', {})
                 }
 
+        # 自动缓存定时刷新的调度适配器
+        self._refresh_scheduler = self._kwargs.get('refresh_scheduler', None)
+        if type(self._refresh_scheduler) == str:
+            self._refresh_scheduler = self.sys_adapter_manager.get_adapter(
+                'Scheduler', self._refresh_scheduler
+            )
+        self._auto_cache_refresh_timers = {}  # 内部定时器, key为(group, name)
+
         # 自动缓存管理参数
         self._auto_cache = {}
         if self._kwargs.get('auto_cache', None) is not None:
@@ -170,6 +571,22 @@ class CacheAdapter(AdapterBaseFw):
             注: 函数执行结果为True才会重新加载函数, 如果不设置该函数, 视为每次都重新加载数据
         @param {list} check_args=None - 缓存更新检查函数的固定入参列表
         @param {dict} check_kwargs=None - 缓存更新检查函数的key-value入参字典
+        @param {float} ex=None - 缓存过期时长, 单位为秒, 不设置代表不过期
+        @param {float} lock_ex=30 - 缓存加载锁的租约时长, 单位为秒
+            注: 缓存不存在或需刷新时, 通过加载锁保证同一时间只有一个进程执行加载函数
+        @param {float} lock_wait=5 - 缓存不存在且其他进程正在加载时, 等待加载完成的最长时间, 单位为秒
+        @param {float} early_refresh_beta=0 - 概率提前刷新系数(需设置ex), 0代表不提前刷新
+            注: 根据加载耗时和剩余有效时间按概率提前刷新缓存(越接近过期概率越高), 建议取值为1
+        @param {bool} stale_while_revalidate=False - 缓存过期后是否先返回旧值并在后台刷新(需设置ex)
+        @param {float} stale_ex=None - stale_while_revalidate模式下缓存过期后旧值的保留时长, 单位为秒, 不设置代表与ex一致
+        @param {float} refresh_interval=None - 后台定时刷新的间隔时长, 单位为秒, 不设置代表不定时刷新
+            注: 定时刷新会执行检查函数和加载函数, 并以原子替换的方式更新缓存
+        @param {str} refresh_crontab=None - 后台定时刷新的crontab表达式(需设置refresh_scheduler)
+        @param {bool} refresh_on_master=True - 是否只在集群主服务执行定时刷新, 避免多个服务重复加载
+            注: 如果未启用集群功能, 则由当前服务执行刷新
+        @param {bool} incremental=False - 是否启用增量加载(仅支持list和dict类型)
+            注: 启用后加载函数可以根据传入的当前数据版本只返回变更的数据, 具体返回格式见auto_cache_init_handlers的说明
+        @param {int} delta_max_size=None - 增量加载的最大变更数量, 超过该数量将改为全量加载
         """
         # 校验参数
         if self._auto_cache.get(group, {}).get(name, None) is not None:
@@ -216,7 +633,18 @@ class CacheAdapter(AdapterBaseFw):
             'reload_on_exists': kwargs.get('reload_on_exists', False),
             'check_handler': _check_handler,
             'check_args': _check_args,
-            'check_kwargs': _check_kwargs
+            'check_kwargs': _check_kwargs,
+            'ex': kwargs.get('ex', None),
+            'lock_ex': kwargs.get('lock_ex', 30),
+            'lock_wait': kwargs.get('lock_wait', 5),
+            'early_refresh_beta': kwargs.get('early_refresh_beta', 0),
+            'stale_while_revalidate': kwargs.get('stale_while_revalidate', False),
+            'stale_ex': kwargs.get('stale_ex', None),
+            'refresh_interval': kwargs.get('refresh_interval', None),
+            'refresh_crontab': kwargs.get('refresh_crontab', None),
+            'refresh_on_master': kwargs.get('refresh_on_master', True),
+            'incremental': kwargs.get('incremental', False),
+            'delta_max_size': kwargs.get('delta_max_size', None)
         }
 
         # 判断是否立即加载数据
@@ -224,6 +652,9 @@ class CacheAdapter(AdapterBaseFw):
             if not self.exists(name, group=group) or _group_paras[name]['reload_on_exists']:
                 self.load_auto_cache(name, group=group, force=True)
 
+        # 启动定时刷新
+        self._start_auto_cache_refresh(name, group, _group_paras[name])
+
     def remove_auto_cache(self, name: str, group: str = None, delete_cache_data: bool = False):
         """
         移除设置自动缓存配置
@@ -237,20 +668,25 @@ class CacheAdapter(AdapterBaseFw):
             # 缓存配置不存在
             return
 
-        # 删除配置
+        # 删除配置并停止定时刷新
         self._auto_cache[group].pop(name)
+        self._stop_auto_cache_refresh(name, group)
 
         # 删除缓存数据
         if delete_cache_data:
             self.delete(name, group=group)
+            self.delete('meta_%s' % name, group=self._get_auto_cache_inner_group(group))
 
-    def load_auto_cache(self, name: str, group: str = None, force: bool = False):
+    def load_auto_cache(self, name: str, group: str = None, force: bool = False, full: bool = False) -> bool:
         """
         加载自动缓存数据
 
         @param {str} name - 缓存名
         @param {str} group=None - 缓存所属分组
         @param {bool} force=False - 是否忽略检查函数结果直接重新加载
+        @param {bool} full=False - 增量加载模式下是否强制全量加载
+
+        @returns {bool} - 是否执行了数据加载(检查函数结果为无需更新时返回False)
         """
         _paras = self._auto_cache.get(group, {}).get(name, None)
         if _paras is None:
@@ -261,8 +697,20 @@ class CacheAdapter(AdapterBaseFw):
             'cache_adapter': self,
             'name': name,  # 缓存名
             'group': group,  # 缓存所属数组
-            'cache_type': _paras['cache_type']  # 缓存类型
+            'cache_type': _paras['cache_type'],  # 缓存类型
+            'version': None  # 增量加载模式当前缓存数据的版本
         }
+        _inner_group = self._get_auto_cache_inner_group(group)
+        _incremental = _paras['incremental'] and _paras['cache_type'] in ('list', 'dict')
+        if _incremental and not full:
+            # 获取当前缓存数据的版本, 缓存不存在则需全量加载
+            with self.pipeline() as _pipe:
+                _pipe.exists(name, group=group)
+                _pipe.get('meta_%s' % name, group=_inner_group)
+
+            _exists, _old_meta = _pipe.results
+            if _exists and _old_meta is not None:
+                _cache_config['version'] = _old_meta.get('version', None)
 
         # 检查是否需要更新
         _check_ok = True
@@ -274,35 +722,108 @@ class CacheAdapter(AdapterBaseFw):
             )
 
         # 执行更新
+        _real_ex = self._get_auto_cache_real_ex(_paras)
         if not _check_ok:
-            return
-
+            if _paras['ex'] is not None:
+                # 数据无需更新, 延续缓存的有效期
+                _meta = self.get('meta_%s' % name, group=_inner_group)
+                if _meta is not None:
+                    _meta['expire_at'] = time.time() + _paras['ex']
+                    with self.pipeline() as _pipe:
+                        _pipe.set_expire(name, _real_ex, group=group)
+                        _pipe.set('meta_%s' % name, _meta, group=_inner_group, ex=_real_ex)
+            return False
+
+        _start = time.time()
         _datas = AsyncTools.sync_run_coroutine(
             _paras['load_handler'](
                 _cache_config, *_paras['load_args'], **_paras['load_kwargs']
             )
         )
-        if _paras['cache_type'] == 'list':
-            _temp_name = '{$load_auto_cache_temp$}_%s' % name
-            _ret = self.set_list(_temp_name, initial=_datas, group=group, over_write=True)
-            if _ret:
-                # 删除原来的缓存数据并重命名
-                self.delete(name, group=group)
-                _ret = self.rename(_temp_name, name, group=group)
-        elif _paras['cache_type'] == 'dict':
-            _temp_name = '{$load_auto_cache_temp$}_%s' % name
-            self.delete(_temp_name, group=group)
-            _ret = self.hmset(_temp_name, _datas, group=group)
-            if _ret:
-                # 删除原来的缓存数据并重命名
-                self.delete(name, group=group)
-                _ret = self.rename(_temp_name, name, group=group)
+
+        if self._metrics is not None:
+            self._metrics.record_load(name, group, time.time() - _start)
+
+        _version = None
+        if _incremental:
+            if not _datas.get('full', False):
+                if _cache_config['version'] is None:
+                    raise RuntimeError('load handler must return full datas when version is None')
+
+                _delta_size = len(_datas.get('upserts', [])) + len(_datas.get('deletes', []))
+                if _paras['delta_max_size'] is None or _delta_size <= _paras['delta_max_size']:
+                    # 应用增量数据, 缓存数据已不存在(例如获取版本后已过期)时改为全量加载
+                    if self._apply_auto_cache_delta(name, group, _paras, _datas, time.time() - _start):
+                        return True
+
+                # 变更数量过大或缓存数据已不存在, 改为全量加载
+                _cache_config['version'] = None
+                _datas = AsyncTools.sync_run_coroutine(
+                    _paras['load_handler'](
+                        _cache_config, *_paras['load_args'], **_paras['load_kwargs']
+                    )
+                )
+                if not _datas.get('full', False):
+                    raise RuntimeError('load handler must return full datas when version is None')
+
+            _version = _datas.get('version', None)
+            _datas = _datas['datas']
+
+        # 缓存的元数据, 记录逻辑过期时间、加载耗时和数据版本
+        _meta = {
+            'expire_at': None if _paras['ex'] is None else time.time() + _paras['ex'],
+            'delta': time.time() - _start,
+            'version': _version
+        }
+        if _paras['cache_type'] in ('list', 'dict'):
+            # 通过事务管道一次性完成临时缓存写入及替换, 避免替换过程中出现缓存不存在的情况
+            _temp_name = self._get_auto_cache_temp_name(name, group)
+            with self.pipeline(transaction=True) as _pipe:
+                if len(_datas) == 0:
+                    # 数据为空, 直接删除原缓存即可
+                    _pipe.delete(name, group=group)
+                elif _temp_name is None:
+                    # 无法生成同槽位的临时缓存名, 直接覆盖写入
+                    _pipe.delete(name, group=group)
+                    if _paras['cache_type'] == 'list':
+                        _pipe.rpush(name, _datas, group=group)
+                    else:
+                        _pipe.hmset(name, _datas, group=group)
+                    if _real_ex is not None:
+                        _pipe.set_expire(name, _real_ex, group=group)
+                else:
+                    _pipe.delete(_temp_name, group=group)
+                    if _paras['cache_type'] == 'list':
+                        _pipe.rpush(_temp_name, _datas, group=group)
+                    else:
+                        _pipe.hmset(_temp_name, _datas, group=group)
+
+                    # 删除原来的缓存数据并重命名
+                    _pipe.delete(name, group=group)
+                    _pipe.rename(_temp_name, name, group=group)
+                    if _real_ex is not None:
+                        _pipe.set_expire(name, _real_ex, group=group)
+
+                _pipe.set('meta_%s' % name, _meta, group=_inner_group, ex=_real_ex)
+
+            if len(_datas) == 0:
+                _ret = True
+            elif _temp_name is None:
+                _ret = _pipe.results[1]
+            else:
+                _ret = _pipe.results[1] and _pipe.results[3]
         else:
-            _ret = self.set(name, _datas, group=group)
+            with self.pipeline(transaction=True) as _pipe:
+                _pipe.set(name, _datas, group=group, ex=_real_ex)
+                _pipe.set('meta_%s' % name, _meta, group=_inner_group, ex=_real_ex)
+
+            _ret = _pipe.results[0]
 
         if not _ret:
             raise RuntimeError('set cache error')
 
+        return True
+
     def get_auto_cache(self, name: str, group: str = None) -> Any:
         """
         获取auto_cache设置的缓存值(对应函数get)
@@ -313,20 +834,7 @@ class CacheAdapter(AdapterBaseFw):
         @returns {Any} - 返回的缓存值
             注: 如果缓存不存在返回None
         """
-        _val = self.get(name, group=group)
-        if _val is None:
-            # 查找不到数据, 尝试自动加载后重新获取
-            try:
-                self.load_auto_cache(name, group=group)
-                _val = self.get(name, group=group)
-            except:
-                self.logger.warning(
-                    'load_auto_cache name[%s] group[%s] error: %s' % (
-                        name, group, traceback.format_exc()
-                    )
-                )
-
-        return _val
+        return self._get_auto_cache_value(name, group, 'get')
 
     def hget_auto_cache(self, name: str, key: str, group: str = None) -> Any:
         """
@@ -338,20 +846,7 @@ class CacheAdapter(AdapterBaseFw):
 
         @returns {Any} - 字典kv值的value
         """
-        _val = self.hget(name, key, group=group)
-        if _val is None:
-            # 查找不到数据, 尝试自动加载后重新获取
-            try:
-                self.load_auto_cache(name, group=group)
-                _val = self.hget(name, key, group=group)
-            except:
-                self.logger.warning(
-                    'load_auto_cache name[%s] group[%s] error: %s' % (
-                        name, group, traceback.format_exc()
-                    )
-                )
-
-        return _val
+        return self._get_auto_cache_value(name, group, 'hget', key)
 
     def hmget_auto_cache(self, name: str, keys: list, group: str = None) -> dict:
         """
@@ -364,20 +859,7 @@ class CacheAdapter(AdapterBaseFw):
         @returns {dict} - 相应清单的值
             注: 如果缓存不存在, 返回{}
         """
-        _val = self.hmget(name, keys, group=group)
-        if len(_val) == 0:
-            # 查找不到数据, 尝试自动加载后重新获取
-            try:
-                self.load_auto_cache(name, group=group)
-                _val = self.hmget(name, keys, group=group)
-            except:
-                self.logger.warning(
-                    'load_auto_cache name[%s] group[%s] error: %s' % (
-                        name, group, traceback.format_exc()
-                    )
-                )
-
-        return _val
+        return self._get_auto_cache_value(name, group, 'hmget', keys)
 
     def hgetall_auto_cache(self, name: str, group: str = None) -> dict:
         """
@@ -389,20 +871,169 @@ class CacheAdapter(AdapterBaseFw):
         @returns {dict} - 字典所有值
             注: 如果缓存不存在, 返回{}
         """
-        _val = self.hgetall(name, group=group)
-        if len(_val) == 0:
-            # 查找不到数据, 尝试自动加载后重新获取
-            try:
-                self.load_auto_cache(name, group=group)
-                _val = self.hgetall(name, group=group)
-            except:
-                self.logger.warning(
-                    'load_auto_cache name[%s] group[%s] error: %s' % (
-                        name, group, traceback.format_exc()
+        return self._get_auto_cache_value(name, group, 'hgetall')
+
+    #############################
+    # 缓存批量处理
+    #############################
+    def pipeline(self, transaction: bool = False) -> CachePipeline:
+        """
+        获取缓存批量处理管道
+
+        @param {bool} transaction=False - 是否以事务方式执行(要么全部执行, 要么全部不执行)
+
+        @returns {CachePipeline} - 管道对象, 支持with语句, 退出with语句时自动执行
+        """
+        return CachePipeline(self, transaction=transaction)
+
+    def mset_ex(self, nvs: dict, group: str = None, ex: Any = None, nx: bool = False) -> bool:
+        """
+        批量设置值(支持按name指定过期时间及nx模式)
+
+        @param {dict} nvs - 要设置的name-value字典
+        @param {str} group=None - 缓存所属分组标识
+        @param {float|dict} ex=None - 缓存过期时长, 单位为秒
+            注: 如果传入dict代表按name分别指定过期时长, 格式为{name: ex}
+        @param {bool} nx=False - 当缓存不存在时才进行设置
+
+        @returns {bool} - 返回结果(部分成功也是返回False)
+        """
+        if len(nvs) == 0:
+            return True
+
+        with self.pipeline() as _pipe:
+            for _name, _val in nvs.items():
+                _ex = ex.get(_name, None) if type(ex) == dict else ex
+                _pipe.set(_name, _val, group=group, ex=_ex, nx=nx)
+
+        return False not in _pipe.results
+
+    def mhset(self, name_kvs: dict, group: str = None) -> bool:
+        """
+        批量设置多个字典的kv值
+
+        @param {dict} name_kvs - 要设置的字典, key为字典名, value为该字典要设置的key-value值
+        @param {str} group=None - 缓存所在的分组
+
+        @returns {bool} - 返回结果(部分成功也是返回False)
+        """
+        with self.pipeline() as _pipe:
+            for _name, _kvs in name_kvs.items():
+                if len(_kvs) > 0:
+                    _pipe.hmset(_name, _kvs, group=group)
+
+        return False not in _pipe.results
+
+    def mincr(self, name_amounts: dict, group: str = None) -> dict:
+        """
+        批量增加计数器值
+        注: 如果计数器不存在, 将自动创建并设置初始值为0
+
+        @param {dict} name_amounts - 要增加的计数器字典, key为计数器名, value为增加数(可以为负数)
+        @param {str} group=None - 缓存所属分组
+
+        @returns {dict} - 返回增长后的值字典, key为计数器名
+        """
+        _names = list(name_amounts.keys())
+        with self.pipeline() as _pipe:
+            for _name in _names:
+                _pipe.incr_counter(_name, amount=name_amounts[_name], group=group)
+
+        return dict(zip(_names, _pipe.results))
+
+    #############################
+    # 缓存指标统计
+    #############################
+    def get_metrics(self, reset: bool = False) -> dict:
+        """
+        获取缓存指标统计数据
+
+        @param {bool} reset=False - 获取后是否重置统计数据
+
+        @returns {dict} - 统计指标字典, 格式见CacheMetrics.get_metrics, 如果未启用统计返回None
+        """
+        if self._metrics is None:
+            return None
+
+        return self._metrics.get_metrics(reset=reset)
+
+    #############################
+    # 缓存修饰符
+    #############################
+    def get_wrapped_cached_func(self, func, cache_options: dict):
+        """
+        获取包裹了结果缓存修饰符的函数对象
+
+        @param {function} func - 需要处理的函数对象
+        @param {dict} cache_options - 结果缓存参数, 参数与cached修饰符一致
+            注: cache_check_func可以传入标准的plugin模式插件配置
+
+        @returns {function} - 包裹结果缓存修饰符后的函数对象
+        """
+        _cache_options = {} if cache_options is None else dict(cache_options)
+        if type(_cache_options.get('cache_check_func', None)) == dict:
+            _cache_options['cache_check_func'] = TracerAdapter.get_func_by_config(
+                _cache_options['cache_check_func']
+            )
+
+        return self.cached(**_cache_options)(func)
+
+    def cached(self, key_paras: list = None, key_prefix: str = None, group: str = None, ex: float = None,
+            negative_ex: float = None, cache_check_func: Callable = None):
+        """
+        函数执行结果缓存的修饰符(cache-aside模式)
+        注: 支持修饰同步及异步函数, 修饰后函数的执行方式与原函数一致
+
+        @param {list} key_paras=None - 生成缓存key的参数表达式列表, 参数表达式与调用链的参数表达式一致, 例如:
+            network:xx - 从第一个入参(标准请求对象)的network中获取指定key的值
+            head:xx - 从第一个入参(标准请求对象)的headers中获取指定key的值
+            json:$.xx - 从第一个入参(标准请求对象)的msg中按JsonPath获取值
+            args:n - 获取函数指定位置的入参值
+            kwargs:xx - 获取函数指定名称的入参值
+            const:xx - 固定值
+            注: 如果不设置, 将使用函数所有入参的摘要作为key
+        @param {str} key_prefix=None - 缓存key的前缀, 如果不设置使用函数名(包含模块和类名)
+        @param {str} group=None - 缓存所属分组
+        @param {float} ex=None - 缓存过期时长, 单位为秒, 默认为None(不过期)
+        @param {float} negative_ex=None - 函数返回None时的缓存过期时长(负缓存), 单位为秒, 默认为None(不缓存None值)
+        @param {Callable} cache_check_func=None - 判断函数返回值是否可以缓存的自定义函数
+            函数格式为 func(return_obj) -> bool
+        """
+        def decorator(f):
+            _key_prefix = key_prefix
+            if _key_prefix is None:
+                _key_prefix = RunTool.get_function_name(f, is_with_class=True, is_with_module=True)
+
+            if inspect.iscoroutinefunction(f):
+                @wraps(f)
+                async def decorated_function(*args, **kwargs):
+                    # 缓存操作为同步阻塞调用, 放到线程池执行, 避免阻塞事件循环
+                    _loop = asyncio.get_running_loop()
+                    _key = self._get_cached_key(f, args, kwargs, _key_prefix, key_paras)
+                    _hit, _ret = await _loop.run_in_executor(None, self._get_cached_value, _key, group)
+                    if _hit:
+                        return _ret
+
+                    _ret = await f(*args, **kwargs)
+                    await _loop.run_in_executor(
+                        None, self._set_cached_value, _key, group, _ret, ex, negative_ex, cache_check_func
                     )
-                )
+                    return _ret
+            else:
+                @wraps(f)
+                def decorated_function(*args, **kwargs):
+                    _key = self._get_cached_key(f, args, kwargs, _key_prefix, key_paras)
+                    _hit, _ret = self._get_cached_value(_key, group)
+                    if _hit:
+                        return _ret
 
-        return _val
+                    _ret = f(*args, **kwargs)
+                    self._set_cached_value(_key, group, _ret, ex, negative_ex, cache_check_func)
+                    return _ret
+
+            return decorated_function
+
+        return decorator
 
     #############################
     # 需要实现类重载的内部函数
@@ -413,6 +1044,530 @@ class CacheAdapter(AdapterBaseFw):
         """
         pass
 
+    def _execute_pipeline(self, ops: list, transaction: bool = False) -> list:
+        """
+        执行批量处理管道中的操作
+        注: 默认为逐个执行的实现, 实现类可重载为真正的批量提交
+
+        @param {list} ops - 操作清单, 每个操作为(op, args, kwargs)
+        @param {bool} transaction=False - 是否以事务方式执行
+
+        @returns {list} - 执行结果列表
+        """
+        _results = []
+        for _op, _args, _kwargs in ops:
+            _results.append(getattr(self, _op)(*_args, **_kwargs))
+
+        return _results
+
+    def _apply_auto_cache_delta_data(self, name: str, group: str, cache_type: str, upserts: Any,
+            deletes: list, ex: float) -> bool:
+        """
+        将增量数据应用到自动缓存的数据(缓存数据不存在时不处理)
+        注: 默认为先检查再更新的实现, 实现类可重载为原子的检查及更新操作
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+        @param {str} cache_type - 缓存类型, list或dict
+        @param {Any} upserts - 新增或更新的数据, dict类型为字典, list类型为要添加的值列表
+        @param {list} deletes - 要删除的数据, dict类型为key列表, list类型为值列表
+        @param {float} ex - 缓存过期时长, None代表不过期
+
+        @returns {bool} - 是否已应用, 缓存数据不存在时返回False
+        """
+        if not self.exists(name, group=group):
+            return False
+
+        with self.pipeline(transaction=True) as _pipe:
+            if cache_type == 'dict':
+                if deletes:
+                    _pipe.hdel(name, deletes, group=group)
+                if upserts:
+                    _pipe.hmset(name, upserts, group=group)
+            else:
+                if deletes:
+                    for _value in deletes:
+                        _pipe.list_remove(name, _value, group=group)
+                if upserts:
+                    _pipe.rpush(name, upserts, group=group)
+
+            if ex is not None:
+                _pipe.set_expire(name, ex, group=group)
+
+        return True
+
+    def _release_auto_cache_lock(self, lock_name: str, group: str, token: str):
+        """
+        释放自动缓存的加载锁
+        注: 默认为先获取再删除的实现, 实现类可重载为原子的比较删除操作
+
+        @param {str} lock_name - 锁名
+        @param {str} group - 锁所在分组
+        @param {str} token - 获取锁时设置的令牌, 只有令牌一致才删除
+        """
+        if self.get(lock_name, group=group) == token:
+            self.delete(lock_name, group=group)
+
+    #############################
+    # 内部函数
+    #############################
+    def _get_metrics_wrapped_op(self, op: str, func: Callable) -> Callable:
+        """
+        获取包裹了指标统计的缓存操作函数
+
+        @param {str} op - 操作函数名
+        @param {Callable} func - 缓存操作函数(已绑定实例)
+
+        @returns {Callable} - 包裹后的函数
+        """
+        _signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapped_func(*args, **kwargs):
+            _start = time.perf_counter()
+            _ret = func(*args, **kwargs)
+            _duration = time.perf_counter() - _start
+            try:
+                _paras = _signature.bind(*args, **kwargs).arguments
+                self._metrics.record_op(
+                    op, _paras.get('group', None), _paras.get('name', None), _ret, _duration
+                )
+            except:
+                self.logger.warning('record cache metrics error: %s' % traceback.format_exc())
+
+            return _ret
+
+        return wrapped_func
+
+    def _report_metrics(self, report_handler: Callable):
+        """
+        定时输出缓存指标统计数据
+
+        @param {Callable} report_handler - 处理函数
+        """
+        try:
+            AsyncTools.sync_run_coroutine(
+                report_handler(self._metrics.get_metrics(reset=self._metrics_reset_on_report))
+            )
+        except:
+            self.logger.warning('report cache metrics error: %s' % traceback.format_exc())
+
+    def _get_cached_key(self, func: Callable, args: tuple, kwargs: dict, key_prefix: str, key_paras: list) -> str:
+        """
+        获取函数结果缓存的key
+
+        @param {Callable} func - 函数对象
+        @param {tuple} args - 固定位置入参
+        @param {dict} kwargs - key-value形式的入参
+        @param {str} key_prefix - 缓存key的前缀
+        @param {list} key_paras - 生成缓存key的参数表达式列表
+
+        @returns {str} - 缓存key
+        """
+        if key_paras is None:
+            # 使用所有入参的摘要
+            _str = json.dumps(
+                {'args': args, 'kwargs': kwargs}, ensure_ascii=False, sort_keys=True, default=str
+            )
+            return '%s:%s' % (key_prefix, hashlib.md5(_str.encode('utf-8')).hexdigest())
+
+        _method_info_obj = TracerAdapter._get_method_info_obj(func, args, kwargs)
+        _vals = [key_prefix]
+        for _para in key_paras:
+            _val = TracerAdapter._get_obj_info('para', _method_info_obj, _para)
+            if type(_val) != str:
+                _val = json.dumps(_val, ensure_ascii=False, sort_keys=True, default=str)
+            _vals.append(_val)
+
+        return ':'.join(_vals)
+
+    def _get_cached_value(self, key: str, group: str) -> tuple:
+        """
+        获取函数结果缓存的值
+
+        @param {str} key - 缓存key
+        @param {str} group - 缓存所属分组
+
+        @returns {tuple} - 返回(是否命中缓存, 缓存的函数返回值)
+        """
+        try:
+            _cache = self.get(key, group=group)
+        except:
+            self.logger.warning('get cached key[%s] group[%s] error: %s' % (
+                key, group, traceback.format_exc()
+            ))
+            return False, None
+
+        if type(_cache) != dict:
+            return False, None
+
+        _value = _cache.get('value', None)
+        if _cache.get('tuple', False):
+            _value = tuple(_value)
+
+        return True, _value
+
+    def _set_cached_value(self, key: str, group: str, value: Any, ex: float, negative_ex: float,
+            cache_check_func: Callable):
+        """
+        设置函数结果缓存的值
+
+        @param {str} key - 缓存key
+        @param {str} group - 缓存所属分组
+        @param {Any} value - 函数返回值
+        @param {float} ex - 缓存过期时长
+        @param {float} negative_ex - 函数返回None时的缓存过期时长, 为None代表不缓存
+        @param {Callable} cache_check_func - 判断函数返回值是否可以缓存的自定义函数
+        """
+        if value is None:
+            if negative_ex is None:
+                return
+            _ex = negative_ex
+        else:
+            _ex = ex
+
+        try:
+            if cache_check_func is not None and not cache_check_func(value):
+                return
+
+            self.set(key, {'tuple': type(value) == tuple, 'value': value}, group=group, ex=_ex)
+        except:
+            self.logger.warning('set cached key[%s] group[%s] error: %s' % (
+                key, group, traceback.format_exc()
+            ))
+
+    def _get_auto_cache_inner_group(self, group: str) -> str:
+        """
+        获取自动缓存内部数据(元数据、加载锁)所在的分组
+        注: 内部数据使用独立分组, 避免影响原分组的get_group等操作
+
+        @param {str} group - 缓存所属分组
+
+        @returns {str} - 内部数据所在的分组
+        """
+        return '$auto_cache$' if group is None else '$auto_cache$%s' % group
+
+    def _get_auto_cache_temp_name(self, name: str, group: str) -> str:
+        """
+        获取自动缓存全量加载时使用的临时缓存名
+        注: 临时缓存需与缓存在同一个redis cluster槽位才能重命名, 有分组时分组前缀即为hash tag;
+            无分组时如果缓存名已包含hash tag, 直接增加后缀即可, 否则将缓存名整体作为hash tag
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+
+        @returns {str} - 临时缓存名, 无法生成同槽位的临时缓存名时返回None
+        """
+        if group is not None:
+            return '%s_$load_auto_cache_temp$' % name
+
+        _start = name.find('{')
+        if _start >= 0 and name.find('}', _start + 1) > _start + 1:
+            # 缓存名包含有效的hash tag
+            return '%s_$load_auto_cache_temp$' % name
+
+        if '}' in name:
+            return None
+
+        return '{%s}_$load_auto_cache_temp$' % name
+
+    def _get_auto_cache_real_ex(self, paras: dict) -> float:
+        """
+        获取自动缓存实际存储的过期时长
+
+        @param {dict} paras - 自动缓存配置
+
+        @returns {float} - 实际存储的过期时长, None代表不过期
+        """
+        if paras['ex'] is None:
+            return None
+
+        if paras['stale_while_revalidate']:
+            # 需保留过期后的旧值
+            return paras['ex'] + (paras['ex'] if paras['stale_ex'] is None else paras['stale_ex'])
+        else:
+            return paras['ex']
+
+    def _apply_auto_cache_delta(self, name: str, group: str, paras: dict, delta: dict, load_time: float) -> bool:
+        """
+        应用自动缓存的增量数据
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+        @param {dict} paras - 自动缓存配置
+        @param {dict} delta - 加载函数返回的增量数据
+        @param {float} load_time - 加载耗时, 单位为秒
+
+        @returns {bool} - 是否已应用, 缓存数据已不存在时返回False(需改为全量加载)
+        """
+        _real_ex = self._get_auto_cache_real_ex(paras)
+        _meta = {
+            'expire_at': None if paras['ex'] is None else time.time() + paras['ex'],
+            'delta': load_time,
+            'version': delta.get('version', None)
+        }
+        _applied = self._apply_auto_cache_delta_data(
+            name, group, paras['cache_type'], delta.get('upserts', None), delta.get('deletes', None), _real_ex
+        )
+        if not _applied:
+            return False
+
+        if not self.set('meta_%s' % name, _meta, group=self._get_auto_cache_inner_group(group), ex=_real_ex):
+            raise RuntimeError('set cache error')
+
+        return True
+
+    def _get_auto_cache_refresh_job_id(self, name: str, group: str) -> str:
+        """
+        获取自动缓存定时刷新的任务id
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+
+        @returns {str} - 任务id
+        """
+        return 'auto_cache_refresh_%d_%s_%s' % (id(self), str(group), name)
+
+    def _start_auto_cache_refresh(self, name: str, group: str, paras: dict):
+        """
+        启动自动缓存的定时刷新
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+        @param {dict} paras - 自动缓存配置
+        """
+        if paras['refresh_interval'] is None and paras['refresh_crontab'] is None:
+            # 无需定时刷新
+            return
+
+        if self._refresh_scheduler is not None:
+            # 使用任务调度适配器
+            _job_type = 'interval' if paras['refresh_crontab'] is None else 'cron'
+            _result = self._refresh_scheduler.add_job(
+                self._get_auto_cache_refresh_job_id(name, group), self._scheduled_refresh_auto_cache,
+                args=[name, group], job_type=_job_type, interval_unit='s',
+                interval=paras['refresh_interval'], crontab=paras['refresh_crontab'],
+                replace_existing=True
+            )
+            if not _result.is_success():
+                raise RuntimeError('add auto cache refresh job error: %s' % str(_result))
+        else:
+            # 使用内部定时器
+            if paras['refresh_interval'] is None:
+                raise RuntimeError('refresh_crontab must be used with refresh_scheduler')
+
+            _timer = Timer(
+                paras['refresh_interval'], self._scheduled_refresh_auto_cache, args=[name, group]
+            )
+            _timer.setDaemon(True)
+            _timer.start()
+            self._auto_cache_refresh_timers[(group, name)] = _timer
+
+    def _stop_auto_cache_refresh(self, name: str, group: str):
+        """
+        停止自动缓存的定时刷新
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+        """
+        _timer = self._auto_cache_refresh_timers.pop((group, name), None)
+        if _timer is not None:
+            _timer.cancel()
+
+        if self._refresh_scheduler is not None:
+            _job_id = self._get_auto_cache_refresh_job_id(name, group)
+            if self._refresh_scheduler.job_exists(_job_id):
+                self._refresh_scheduler.remove_job(_job_id)
+
+    def _scheduled_refresh_auto_cache(self, name: str, group: str):
+        """
+        定时刷新自动缓存数据
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+        """
+        _paras = self._auto_cache.get(group, {}).get(name, None)
+        if _paras is None:
+            return
+
+        if _paras['refresh_on_master']:
+            # 只在集群主服务执行
+            _cluster = GlobalManager.GET_SYS_CLUSTER()
+            if _cluster is not None and not _cluster.master:
+                return
+
+        # 通过加载锁避免与其他进程的加载重复执行
+        _token = self._try_auto_cache_lock(name, group)
+        if _token is None:
+            return
+
+        try:
+            self.load_auto_cache(name, group=group)
+        except:
+            self.logger.warning(
+                'scheduled refresh auto cache name[%s] group[%s] error: %s' % (
+                    name, group, traceback.format_exc()
+                )
+            )
+        finally:
+            self._release_auto_cache_lock(
+                'lock_%s' % name, self._get_auto_cache_inner_group(group), _token
+            )
+
+    def _get_auto_cache_value(self, name: str, group: str, op: str, *args) -> Any:
+        """
+        获取自动缓存的值
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+        @param {str} op - 获取值的函数名
+        @param {args} - 获取值的函数除name以外的固定入参
+
+        @returns {Any} - 返回的缓存值
+        """
+        _paras = self._auto_cache.get(group, {}).get(name, None)
+
+        # 一次性获取缓存值、缓存是否存在以及元数据
+        with self.pipeline() as _pipe:
+            getattr(_pipe, op)(name, *args, group=group)
+            _pipe.exists(name, group=group)
+            _pipe.get('meta_%s' % name, group=self._get_auto_cache_inner_group(group))
+
+        _val, _exists, _meta = _pipe.results
+        try:
+            if not _exists:
+                # 缓存不存在, 加锁加载(只有一个进程执行加载, 其他进程等待加载完成), 然后重新获取
+                self._load_auto_cache_with_lock(name, group, wait=True)
+                _val = getattr(self, op)(name, *args, group=group)
+            elif _paras is not None and _meta is not None and self._is_auto_cache_need_refresh(_paras, _meta):
+                if _paras['stale_while_revalidate']:
+                    # 先返回旧值, 在后台刷新
+                    self._refresh_auto_cache_background(name, group)
+                elif self._load_auto_cache_with_lock(name, group, wait=False):
+                    # 提前刷新成功, 重新获取
+                    _val = getattr(self, op)(name, *args, group=group)
+        except:
+            self.logger.warning(
+                'load_auto_cache name[%s] group[%s] error: %s' % (
+                    name, group, traceback.format_exc()
+                )
+            )
+
+        return _val
+
+    def _is_auto_cache_need_refresh(self, paras: dict, meta: dict) -> bool:
+        """
+        判断自动缓存是否需要刷新
+
+        @param {dict} paras - 自动缓存配置
+        @param {dict} meta - 缓存的元数据
+
+        @returns {bool} - 是否需要刷新
+        """
+        _expire_at = meta.get('expire_at', None)
+        if _expire_at is None:
+            return False
+
+        _now = time.time()
+        if _now >= _expire_at:
+            # 已过期
+            return True
+
+        if paras['early_refresh_beta'] > 0:
+            # 概率提前刷新(XFetch), 加载耗时越长、越接近过期, 提前刷新的概率越高
+            return _now - meta.get('delta', 0) * paras['early_refresh_beta'] * math.log(
+                1.0 - random.random()
+            ) >= _expire_at
+
+        return False
+
+    def _try_auto_cache_lock(self, name: str, group: str) -> str:
+        """
+        尝试获取自动缓存的加载锁
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+
+        @returns {str} - 获取成功返回锁令牌, 失败返回None
+        """
+        _paras = self._auto_cache.get(group, {}).get(name, None)
+        _token = str(uuid.uuid1())
+        if self.set(
+            'lock_%s' % name, _token, group=self._get_auto_cache_inner_group(group),
+            ex=30 if _paras is None else _paras['lock_ex'], nx=True
+        ):
+            return _token
+
+        return None
+
+    def _load_auto_cache_with_lock(self, name: str, group: str, wait: bool = True) -> bool:
+        """
+        加锁加载自动缓存数据
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+        @param {bool} wait=True - 获取不到锁时是否等待其他进程加载完成
+
+        @returns {bool} - 是否由当前进程执行了加载
+        """
+        _inner_group = self._get_auto_cache_inner_group(group)
+        _token = self._try_auto_cache_lock(name, group)
+        if _token is not None:
+            try:
+                return self.load_auto_cache(name, group=group)
+            finally:
+                self._release_auto_cache_lock('lock_%s' % name, _inner_group, _token)
+
+        if wait:
+            # 等待其他进程加载完成
+            _paras = self._auto_cache.get(group, {}).get(name, None)
+            _end_time = time.time() + (5 if _paras is None else _paras['lock_wait'])
+            while time.time() < _end_time:
+                time.sleep(0.05)
+                if not self.exists('lock_%s' % name, group=_inner_group):
+                    break
+
+        return False
+
+    def _refresh_auto_cache_background(self, name: str, group: str):
+        """
+        在后台线程刷新自动缓存数据
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+        """
+        _token = self._try_auto_cache_lock(name, group)
+        if _token is None:
+            # 其他进程正在刷新
+            return
+
+        _thread = threading.Thread(
+            target=self._refresh_auto_cache_thread_fun, args=(name, group, _token),
+            name='AutoCacheRefresh', daemon=True
+        )
+        _thread.start()
+
+    def _refresh_auto_cache_thread_fun(self, name: str, group: str, token: str):
+        """
+        后台刷新自动缓存数据的线程函数
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+        @param {str} token - 加载锁令牌
+        """
+        try:
+            self.load_auto_cache(name, group=group)
+        except:
+            self.logger.warning(
+                'refresh auto cache name[%s] group[%s] error: %s' % (
+                    name, group, traceback.format_exc()
+                )
+            )
+        finally:
+            self._release_auto_cache_lock(
+                'lock_%s' % name, self._get_auto_cache_inner_group(group), token
+            )
+
     #############################
     # 需重载的通用缓存操作
     #############################
@@ -716,6 +1871,19 @@ class CacheAdapter(AdapterBaseFw):
         """
         raise NotImplementedError()
 
+    def list_remove(self, name: str, value: Any, count: int = 0, group: str = None) -> int:
+        """
+        从列表中删除指定值
+
+        @param {str} name - 列表名
+        @param {Any} value - 要删除的值
+        @param {int} count=0 - 要删除的数量, 0代表删除所有匹配的值, 正数代表从左边开始删除, 负数代表从右边开始删除
+        @param {str} group=None - 缓存所在分组
+
+        @returns {int} - 实际删除的数量
+        """
+        raise NotImplementedError()
+
     def lpop(self, name: str, group: str = None, count: int = 1) -> list:
         """
         从左边取出值并删除
@@ -0,0 +1,1038 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright 2022 黎慧剑
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+
+"""
+基于进程内存实现的缓存服务适配器
+注: 缓存数据只在当前进程内有效, 适用于单机部署、本地开发及测试场景
+
+@module cache_memory
+@file cache_memory.py
+"""
+import os
+import sys
+import re
+import copy
+import time
+import heapq
+import threading
+import itertools
+from collections import deque
+from typing import Any
+# 根据当前文件路径将包路径纳入, 在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir, os.path.pardir, os.path.pardir)))
+from HiveNetMicro.interface.extend.cache import CacheAdapter
+
+
+class MemoryCacheItem(object):
+    """
+    内存缓存的存储项
+    """
+
+    __slots__ = ('cache_type', 'value', 'expire_at', 'group', 'name')
+
+    def __init__(self, cache_type: str, value: Any, group: str, name: str, expire_at: float = None):
+        """
+        构造函数
+
+        @param {str} cache_type - 缓存类型, base-基础类型, counter-计数器, list-列表, dict-字典
+        @param {Any} value - 缓存值, list类型为deque, dict类型为dict
+        @param {str} group - 缓存所属分组标识
+        @param {str} name - 缓存名
+        @param {float} expire_at=None - 过期时间点(time.monotonic), None代表不过期
+        """
+        self.cache_type = cache_type
+        self.value = value
+        self.group = group
+        self.name = name
+        self.expire_at = expire_at
+
+
+class MemoryCacheAdapter(CacheAdapter):
+    """
+    基于进程内存实现的缓存服务适配器
+    注: 过期数据通过最小堆按过期时间排序, 在访问时惰性清理, 所有操作通过可重入锁保证线程安全
+    """
+
+    # 不可变的值类型, 存取时无需复制
+    _IMMUTABLE_TYPES = (str, int, float, bool, bytes, type(None))
+
+    #############################
+    # 构造函数
+    #############################
+    def __init__(self, **kwargs):
+        """
+        初始化适配器
+
+        @param {dict} auto_cache=None - 自动缓存管理参数, 参数与RedisCacheAdapter一致
+        @param {dict} auto_cache_init_handlers=None - 自动缓存管理初始化的函数对象索引, 参数与RedisCacheAdapter一致
+        @param {str|SchedulerAdapter} refresh_scheduler=None - 自动缓存定时刷新所使用的任务调度适配器
+        @param {dict} metrics=None - 缓存指标统计参数, 参数与RedisCacheAdapter一致
+            注: 内存缓存不进行序列化, 不统计读写字节数
+        @param {str} logger_id=None - 日志对象标识, 可以选择application.yaml配置中的其中一个日志对象
+        @param {kwargs} - 实现类的自定义参数
+            copy_value {bool} - 存取非基础类型的值(例如dict、list)时是否进行深复制, 默认为True
+                注: 设置为False可以提升性能, 但外部修改获取到的对象将直接影响缓存数据
+            clean_batch_size {int} - 每次操作时最多清理的过期数据数量, 默认为100
+        """
+        super().__init__(**kwargs)
+
+    #############################
+    # 需要实现类重载的内部函数
+    #############################
+    def _self_init(self):
+        """
+        实现类自定义的初始化函数
+        """
+        self._copy_value = self._kwargs.get('copy_value', True)
+        self._clean_batch_size = self._kwargs.get('clean_batch_size', 100)
+
+        # 缓存数据, key为真正的缓存名, value为MemoryCacheItem
+        self._datas = {}
+
+        # 分组索引, key为分组标识, value为分组下真正缓存名的集合
+        self._group_index = {}
+
+        # 过期时间最小堆, 每项为(expire_at, seq, real_name), 数据更新后旧项不删除, 出堆时再进行校验
+        self._expire_heap = []
+        self._expire_seq = itertools.count()
+
+        # 操作锁
+        self._lock = threading.RLock()
+
+    def _execute_pipeline(self, ops: list, transaction: bool = False) -> list:
+        """
+        执行批量处理管道中的操作
+        注: 执行期间持有操作锁, 其他线程的操作不会穿插执行
+
+        @param {list} ops - 操作清单, 每个操作为(op, args, kwargs)
+        @param {bool} transaction=False - 是否以事务方式执行
+
+        @returns {list} - 执行结果列表
+        """
+        with self._lock:
+            return super()._execute_pipeline(ops, transaction=transaction)
+
+    def _release_auto_cache_lock(self, lock_name: str, group: str, token: str):
+        """
+        释放自动缓存的加载锁
+
+        @param {str} lock_name - 锁名
+        @param {str} group - 锁所在分组
+        @param {str} token - 获取锁时设置的令牌, 只有令牌一致才删除
+        """
+        with self._lock:
+            super()._release_auto_cache_lock(lock_name, group, token)
+
+    #############################
+    # 需重载的通用缓存操作
+    #############################
+    def delete(self, name: str, group: str = None) -> bool:
+        """
+        删除缓存值
+
+        @param {str} name - 缓存名
+        @param {str} group=None - 缓存所属分组标识
+
+        @returns {bool} - 删除结果, 如果找不到name返回False
+        """
+        with self._lock:
+            self._clean_expired()
+            return self._remove_item(self._get_real_name(name, group))
+
+    def mdelete(self, names: list, group: str = None) -> bool:
+        """
+        批量删除缓存
+
+        @param {list} names - 缓存name列表
+        @param {str} group=None - 缓存所属分组标识
+
+        @returns {bool} - 处理结果
+        """
+        with self._lock:
+            self._clean_expired()
+            _count = 0
+            for _name in names:
+                if self._remove_item(self._get_real_name(_name, group)):
+                    _count += 1
+
+            return _count == len(names)
+
+    def delete_group(self, group: str) -> bool:
+        """
+        删除分组的所有缓存
+
+        @param {str} group - 缓存所属分组标识
+
+        @returns {bool} - 处理结果
+        """
+        with self._lock:
+            self._clean_expired()
+            _real_names = self._group_index.pop(group, None)
+            if _real_names is None:
+                return None
+
+            for _real_name in _real_names:
+                self._datas.pop(_real_name, None)
+
+            return True
+
+    def rename(self, src_name: str, dest_name: str, group: str = None) -> bool:
+        """
+        修改缓存名称
+        注: 如果目标缓存已存在将被覆盖
+
+        @param {str} src_name - 源名称
+        @param {str} dest_name - 目标名
+        @param {str} group=None - 缓存所在分组
+
+        @returns {bool} - 修改结果
+        """
+        with self._lock:
+            self._clean_expired()
+            _src_real_name = self._get_real_name(src_name, group)
+            _item = self._get_item(_src_real_name)
+            if _item is None:
+                raise KeyError('no such key: %s' % _src_real_name)
+
+            self._remove_item(_src_real_name)
+            _dest_real_name = self._get_real_name(dest_name, group)
+            self._remove_item(_dest_real_name)
+            _item.name = dest_name
+            self._add_item(_dest_real_name, _item)
+            return True
+
+    def exists(self, name: str, group: str = None) -> bool:
+        """
+        判断缓存名是否存在
+
+        @param {str} name - 缓存名
+        @param {str} group=None - 缓存所在分组
+
+        @returns {bool} - 是否存在
+        """
+        with self._lock:
+            return self._get_item(self._get_real_name(name, group)) is not None
+
+    def keys(self, pattern: str, group: str = None) -> list:
+        """
+        获取指定key列表
+
+        @param {str} pattern - 查询key的条件, 支持通配符如下:
+            * - 代表匹配任意字符, 例如'abc_*'
+            ? - 代表匹配一个字符, 例如'a?b'
+            [] - 代表匹配部分字符, 例如[ab]代表匹配a或b, [^ab]代表不匹配a和b, [1-9]代表匹配1到9的任意数字
+            \\x - 转义字符, 例如要匹配星号, 问号需要转义的字符, 例如'a\\*b'
+        @param {str} group=None - 缓存所属分组
+
+        @returns {list} - 返回的缓存列表
+        """
+        return list(self.scan(pattern, group=group))
+
+    def scan(self, pattern: str, group: str = None, count: int = 10):
+        """
+        通过迭代器方式查询key并返回
+        注: 查询时先获取key的快照, 迭代过程中对缓存的修改不影响返回的结果
+
+        @param {str} pattern - 查询key的条件, 通配符与keys一致
+        @param {str} group=None - 缓存所属分组, 为None时匹配所有缓存真正的name
+        @param {int} count=10 - 兼容参数, 内存缓存无需分批获取
+
+        @retruns {iterator} - 返回key字符串的迭代器
+        """
+        _re = re.compile(self._pattern_to_regex(pattern), re.S)
+        with self._lock:
+            self._clean_expired()
+            _now = time.monotonic()
+            if group is None:
+                _names = [
+                    _real_name for _real_name, _item in self._datas.items()
+                    if not self._is_expired(_item, _now)
+                ]
+            else:
+                _names = [
+                    self._datas[_real_name].name for _real_name in self._group_index.get(group, [])
+                    if not self._is_expired(self._datas[_real_name], _now)
+                ]
+
+        for _name in _names:
+            if _re.match(_name) is not None:
+                yield _name
+
+    #############################
+    # 需重载的基础类型值缓存操作
+    #############################
+    def set(self, name: str, value: Any, group: str = None, ex: float = None, nx: bool = False) -> bool:
+        """
+        设置缓存值
+
+        @param {str} name - 缓存名
+        @param {Any} value - 要设置的缓存的值
+        @param {str} group=None - 缓存所属分组标识, 分组内name应唯一
+        @param {float} ex=None - 缓存过期时长, 单位为秒
+        @param {bool} nx=False - 当缓存不存在时才进行设置, 默认为False, 代表直接覆盖
+
+        @returns {bool} - 返回设置结果
+        """
+        with self._lock:
+            self._clean_expired()
+            _real_name = self._get_real_name(name, group)
+            if nx and self._get_item(_real_name) is not None:
+                return False
+
+            self._set_item(_real_name, 'base', self._copy(value), group, name, ex=ex)
+            return True
+
+    def get(self, name: str, group: str = None) -> Any:
+        """
+        获取缓存值
+
+        @param {str} name - 缓存名
+        @param {str} group=None - 缓存所属分组标识
+
+        @returns {Any} - 返回的缓存值
+            注: 如果缓存不存在返回None
+        """
+        with self._lock:
+            _item = self._get_item(self._get_real_name(name, group), cache_types=('base', 'counter'))
+            return None if _item is None else self._copy(_item.value)
+
+    def mset(self, nvs: dict, group: str = None, ex: float = None) -> bool:
+        """
+        批量设置值
+
+        @param {dict} nvs - 要设置的name-value字典
+        @param {str} group=None - 缓存所属分组标识
+        @param {float} ex=None - 缓存过期时长, 单位为秒
+
+        @param {bool} - 返回结果(部分成功也是返回False)
+        """
+        with self._lock:
+            self._clean_expired()
+            for _name, _value in nvs.items():
+                self._set_item(
+                    self._get_real_name(_name, group), 'base', self._copy(_value), group, _name, ex=ex
+                )
+
+            return True
+
+    def mget(self, names: list, group: str = None) -> list:
+        """
+        批量获取值
+
+        @param {list} names - 要获取的name列表
+        @param {str} group=None - 缓存所属分组标识
+
+        @returns {list} - 以列表方式顺序返回对应name的值
+            注: 如果获取不到返回None
+        """
+        with self._lock:
+            _ret = []
+            for _name in names:
+                _item = self._get_item(self._get_real_name(_name, group))
+                if _item is None or _item.cache_type not in ('base', 'counter'):
+                    _ret.append(None)
+                else:
+                    _ret.append(self._copy(_item.value))
+
+            return _ret
+
+    def get_group(self, group: str) -> dict:
+        """
+        获取分组的所有值
+
+        @param {str} group - 缓存所属分组标识
+            注: 不支持分组为None的情况
+
+        @returns {dict} - 获取到的name-value缓存字典
+            注: 如果获取不到返回None, 非基础类型的缓存值返回None
+        """
+        with self._lock:
+            self._clean_expired()
+            _now = time.monotonic()
+            _ret = {}
+            for _real_name in self._group_index.get(group, []):
+                _item = self._datas[_real_name]
+                if self._is_expired(_item, _now):
+                    continue
+
+                _ret[_item.name] = self._copy(_item.value) if _item.cache_type in ('base', 'counter') else None
+
+            if len(_ret) == 0:
+                return None
+
+            return _ret
+
+    def set_expire(self, name: str, ex: float, group: str = None) -> bool:
+        """
+        更新缓存的过期时间
+
+        @param {str} name - 缓存名
+        @param {float} ex - 过期时间, 单位为秒
+            注: 如果传None代表缓存不过期
+        @param {str} group=None - 缓存所属分组标识
+
+        @returns {bool} - 设置结果
+        """
+        with self._lock:
+            self._clean_expired()
+            _real_name = self._get_real_name(name, group)
+            _item = self._get_item(_real_name)
+            if _item is None:
+                return False
+
+            self._set_item_expire(_real_name, _item, ex)
+            return True
+
+    #############################
+    # 需重载的计数器缓存操作
+    #############################
+    def set_counter(self, name: str, initial: int = 0, group: str = None, over_write: bool = False) -> bool:
+        """
+        设置计数器
+        注: counter实际上也是缓存, 可以直接通过get获取当前值, 以及delete删除
+
+        @param {str} name - 计数器名
+        @param {int} initial=0 - 设置初始值
+        @param {str} group=None - 缓存所属分组
+        @param {bool} over_write=False - 如果计数器已存在是否覆盖
+
+        @returns {bool} - 设置结果
+        """
+        with self._lock:
+            self._clean_expired()
+            _real_name = self._get_real_name(name, group)
+            if not over_write and self._get_item(_real_name) is not None:
+                return False
+
+            self._set_item(_real_name, 'counter', int(initial), group, name)
+            return True
+
+    def get_counter(self, name: str, group: str = None, auto_set: bool = True, initial: int = 0) -> int:
+        """
+        获取计数器当前值
+
+        @param {str} name - 计数器名
+        @param {str} group=None - 缓存所属分组
+        @param {bool} auto_set=True - 不存在是否自动设置计数器
+        @param {int} initial=0 - 设置初始值
+
+        @returns {int} - 返回当前计数器值, 不存在返回None
+        """
+        with self._lock:
+            _real_name = self._get_real_name(name, group)
+            _item = self._get_item(_real_name, cache_types=('base', 'counter'))
+            if _item is None:
+                if not auto_set:
+                    return None
+
+                self._set_item(_real_name, 'counter', int(initial), group, name)
+                return int(initial)
+
+            return int(_item.value)
+
+    def incr_counter(self, name: str, amount: int = 1, group: str = None) -> int:
+        """
+        增加计数器值
+        注: 如果计数器不存在, 将自动创建并设置初始值为0
+
+        @param {str} name - 计数器名
+        @param {int} amount=1 - 指定增加数
+        @param {str} group=None - 缓存所属分组
+
+        @returns {int} - 返回增长后的值
+        """
+        with self._lock:
+            self._clean_expired()
+            _real_name = self._get_real_name(name, group)
+            _item = self._get_item(_real_name, cache_types=('base', 'counter'))
+            if _item is None:
+                _item = self._set_item(_real_name, 'counter', 0, group, name)
+
+            # 保留原有的过期时间
+            _item.value = int(_item.value) + amount
+            _item.cache_type = 'counter'
+            return _item.value
+
+    def decr_counter(self, name: str, amount: int = 1, group: str = None) -> int:
+        """
+        减少计数器值
+        注: 如果计数器不存在, 将自动创建并设置初始值为0
+
+        @param {str} name - 计数器名
+        @param {int} amount=1 - 指定减少数
+        @param {str} group=None - 缓存所属分组
+
+        @returns {int} - 返回减少后的值
+        """
+        return self.incr_counter(name, amount=-amount, group=group)
+
+    #############################
+    # 需重载的列表类型缓存操作
+    #############################
+    def set_list(self, name: str, initial: list = [], group: str = None, over_write: bool = False) -> bool:
+        """
+        设置列表
+        注: 列表可通过delete删除, 但不能通过get等其他基础类型函数处理
+
+        @param {str} name - 列表名
+        @param {list} initial=[] - 设置初始值
+        @param {str} group=None - 缓存所属分组
+        @param {bool} over_write=False - 如果列表已存在是否覆盖
+
+        @returns {bool} - 设置结果
+        """
+        with self._lock:
+            self._clean_expired()
+            _real_name = self._get_real_name(name, group)
+            if over_write:
+                self._remove_item(_real_name)
+            elif self._get_item(_real_name) is not None:
+                # 列表已存在, 不覆盖, 返回失败
+                return False
+
+            # 与redis一致, 空列表不创建
+            if len(initial) > 0:
+                self._set_item(
+                    _real_name, 'list', deque(self._copy(_val) for _val in initial), group, name
+                )
+
+            return True
+
+    def list_len(self, name: str, group: str = None) -> int:
+        """
+        获取列表长度
+
+        @param {str} name - 列表名
+        @param {str} group=None - 缓存所在分组
+
+        @returns {int} - 返回列表长度
+        """
+        with self._lock:
+            _item = self._get_item(self._get_real_name(name, group), cache_types=('list', ))
+            return 0 if _item is None else len(_item.value)
+
+    def list_clear(self, name: str, group: str = None) -> bool:
+        """
+        清空列表
+
+        @param {str} name - 列表名
+        @param {str} group=None - 缓存的分组
+
+        @returns {bool} - 处理结果
+        """
+        with self._lock:
+            _real_name = self._get_real_name(name, group)
+            if self._get_item(_real_name, cache_types=('list', )) is not None:
+                self._remove_item(_real_name)
+
+            return True
+
+    def lpush(self, name: str, datas: list, group: str = None) -> bool:
+        """
+        在列表左边添加数据
+        注: 如果列表不存在将自动创建列表
+
+        @param {str} name - 列表名
+        @param {list} datas - 要添加的数据列表
+            注: 添加方式是逐个向左边添加, 因此添加完成后数据在列表中的顺序是相反的
+        @param {str} group=None - 缓存所在分组
+
+        @returns {bool} - 是否添加成功
+        """
+        with self._lock:
+            _list = self._get_list_for_write(name, group)
+            _list.extendleft(self._copy(_val) for _val in datas)
+            return len(_list) > 0
+
+    def rpush(self, name: str, datas: list, group: str = None) -> bool:
+        """
+        在列表右边添加数据
+        注: 如果列表不存在将自动创建列表
+
+        @param {str} name - 列表名
+        @param {list} datas - 要添加的数据列表
+        @param {str} group=None - 缓存所在分组
+
+        @returns {bool} - 是否添加成功
+        """
+        with self._lock:
+            _list = self._get_list_for_write(name, group)
+            _list.extend(self._copy(_val) for _val in datas)
+            return len(_list) > 0
+
+    def list_range(self, name: str, start: int = 0, end: int = None, group: str = None) -> list:
+        """
+        获取列表指定区域范围的值列表
+
+        @param {str} name - 列表名
+        @param {int} start=0 - 开始位置, 从0开始
+        @param {int} end=None - 结束为止(包含该位置), 如果为None代表获取到结尾
+        @param {str} group=None - 缓存所在的组
+
+        @returns {list} - 返回值列表
+        """
+        with self._lock:
+            _item = self._get_item(self._get_real_name(name, group), cache_types=('list', ))
+            if _item is None:
+                return []
+
+            # 与redis的LRANGE一致, 支持负数位置, 结束位置包含在结果中
+            _len = len(_item.value)
+            _start = start if start >= 0 else max(_len + start, 0)
+            _end = _len - 1 if end is None else (end if end >= 0 else _len + end)
+            _end = min(_end, _len - 1)
+            if _start > _end:
+                return []
+
+            return [self._copy(_val) for _val in itertools.islice(_item.value, _start, _end + 1)]
+
+    def list_remove(self, name: str, value: Any, count: int = 0, group: str = None) -> int:
+        """
+        从列表中删除指定值
+
+        @param {str} name - 列表名
+        @param {Any} value - 要删除的值
+        @param {int} count=0 - 要删除的数量, 0代表删除所有匹配的值, 正数代表从左边开始删除, 负数代表从右边开始删除
+        @param {str} group=None - 缓存所在分组
+
+        @returns {int} - 实际删除的数量
+        """
+        with self._lock:
+            _real_name = self._get_real_name(name, group)
+            _item = self._get_item(_real_name, cache_types=('list', ))
+            if _item is None:
+                return 0
+
+            _values = list(_item.value) if count >= 0 else list(reversed(_item.value))
+            _max = len(_values) if count == 0 else abs(count)
+            _removed = 0
+            _new_values = []
+            for _val in _values:
+                if _removed < _max and _val == value:
+                    _removed += 1
+                else:
+                    _new_values.append(_val)
+
+            if count < 0:
+                _new_values.reverse()
+
+            _item.value = deque(_new_values)
+            if len(_item.value) == 0:
+                self._remove_item(_real_name)
+
+            return _removed
+
+    def lpop(self, name: str, group: str = None, count: int = 1) -> list:
+        """
+        从左边取出值并删除
+
+        @param {str} name - 列表名
+        @param {str} group=None - 缓存所在分组
+        @param {int} count=1 - 要取出的数量
+
+        @returns {list} - 取出数据的列表
+            注: 如果没有值返回None
+        """
+        return self._pop_list(name, group, count, left=True)
+
+    def rpop(self, name: str, group: str = None, count: int = 1) -> list:
+        """
+        从右边取出值并删除
+        注: 如果取出多个, 结果列表中的排序是反序
+
+        @param {str} name - 列表名
+        @param {str} group=None - 缓存所在分组
+        @param {int} count=1 - 要取出的数量
+
+        @returns {list} - 取出数据的列表
+            注: 如果没有值返回None
+        """
+        return self._pop_list(name, group, count, left=False)
+
+    #############################
+    # 需重载的字典类型缓存(hash set)操作
+    #############################
+    def hset(self, name: str, key: str, value: Any, group: str = None) -> bool:
+        """
+        设置字典的单个kv值
+
+        @param {str} name - 字典名
+        @param {str} key - 要设置的字典kv值的key
+        @param {Any} value - 要设置的字典kv值的value
+        @param {str} group=None - 缓存所在的分组
+
+        @returns {bool} - 设置结果
+        """
+        with self._lock:
+            self._get_dict_for_write(name, group)[key] = self._copy(value)
+            return True
+
+    def hmset(self, name: str, kvs: dict, group: str = None) -> bool:
+        """
+        批量设置字典的多个kv值
+
+        @param {str} name - 字典名
+        @param {dict} kvs - 要设置的key-value值
+        @param {str} group=None - 缓存所在的分组
+
+        @returns {bool} - 设置结果
+        """
+        with self._lock:
+            _dict = self._get_dict_for_write(name, group)
+            for _key, _value in kvs.items():
+                _dict[_key] = self._copy(_value)
+
+            return True
+
+    def hget(self, name: str, key: str, group: str = None) -> Any:
+        """
+        获取字典缓存的指定值
+
+        @param {str} name - 字典名
+        @param {str} key - 要获取的字典kv值的key
+        @param {str} group=None - 缓存所在分组
+
+        @returns {Any} - 字典kv值的value
+        """
+        with self._lock:
+            _item = self._get_item(self._get_real_name(name, group), cache_types=('dict', ))
+            return None if _item is None else self._copy(_item.value.get(key, None))
+
+    def hmget(self, name: str, keys: list, group: str = None) -> dict:
+        """
+        获取字典中的多个值
+
+        @param {str} name - 字典名
+        @param {list} keys - 要获取的key值清单
+        @param {str} group=None - 缓存所在分组
+
+        @returns {dict} - 相应清单的值
+        """
+        with self._lock:
+            _item = self._get_item(self._get_real_name(name, group), cache_types=('dict', ))
+            _dict = {} if _item is None else _item.value
+            return {_key: self._copy(_dict.get(_key, None)) for _key in keys}
+
+    def hgetall(self, name: str, group: str = None) -> dict:
+        """
+        获取字典的所有值
+
+        @param {str} name - 字典名
+        @param {str} group=None - 缓存所在分组
+
+        @returns {dict} - 字典所有值
+            注: 如果缓存不存在, 返回{}
+        """
+        with self._lock:
+            _item = self._get_item(self._get_real_name(name, group), cache_types=('dict', ))
+            if _item is None:
+                return {}
+
+            return {_key: self._copy(_value) for _key, _value in _item.value.items()}
+
+    def hdel(self, name: str, keys: list, group: str = None) -> bool:
+        """
+        删除字典中指定的key
+
+        @param {str} name - 字典名
+        @param {list} keys - 要删除的key列表
+        @param {str} group=None - 缓存所在的分组
+
+        @returns {bool} - 处理结果
+        """
+        with self._lock:
+            _real_name = self._get_real_name(name, group)
+            _item = self._get_item(_real_name, cache_types=('dict', ))
+            if _item is not None:
+                for _key in keys:
+                    _item.value.pop(_key, None)
+
+                if len(_item.value) == 0:
+                    self._remove_item(_real_name)
+
+            return True
+
+    def hexists(self, name: str, key: str, group: str = None) -> bool:
+        """
+        判断key是否在字典中
+
+        @param {str} name - 字典名
+        @param {str} key - key值
+        @param {str} group=None - 缓存所在的分组
+
+        @returns {bool} - 判断结果
+        """
+        with self._lock:
+            _item = self._get_item(self._get_real_name(name, group), cache_types=('dict', ))
+            return False if _item is None else key in _item.value
+
+    def hkeys(self, name: str, group: str = None) -> list:
+        """
+        获取字典中的所有key清单
+
+        @param {str} name - 字典名
+        @param {str} group=None - 缓存所在的分组
+
+        @returns {list} - key清单
+        """
+        with self._lock:
+            _item = self._get_item(self._get_real_name(name, group), cache_types=('dict', ))
+            return [] if _item is None else list(_item.value.keys())
+
+    #############################
+    # 内部函数
+    #############################
+    def _get_real_name(self, name: str, group: str) -> str:
+        """
+        获取真正存储的name值
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组标识
+
+        @returns {str} - 真正保存的name
+        """
+        return name if group is None else '{$group=%s$}_%s' % (group, name)
+
+    def _copy(self, value: Any) -> Any:
+        """
+        复制缓存值(避免外部修改影响缓存数据)
+
+        @param {Any} value - 缓存值
+
+        @returns {Any} - 复制后的值
+        """
+        if not self._copy_value or isinstance(value, self._IMMUTABLE_TYPES):
+            return value
+
+        return copy.deepcopy(value)
+
+    def _is_expired(self, item: MemoryCacheItem, now: float) -> bool:
+        """
+        判断存储项是否已过期
+
+        @param {MemoryCacheItem} item - 存储项
+        @param {float} now - 当前时间(time.monotonic)
+
+        @returns {bool} - 是否已过期
+        """
+        return item.expire_at is not None and item.expire_at <= now
+
+    def _get_item(self, real_name: str, cache_types: tuple = None) -> MemoryCacheItem:
+        """
+        获取有效的存储项(过期的存储项将被删除)
+
+        @param {str} real_name - 真正的缓存名
+        @param {tuple} cache_types=None - 允许的缓存类型, 如果类型不匹配抛出异常, None代表不检查
+
+        @returns {MemoryCacheItem} - 存储项, 不存在返回None
+        """
+        _item = self._datas.get(real_name, None)
+        if _item is None:
+            return None
+
+        if self._is_expired(_item, time.monotonic()):
+            self._remove_item(real_name)
+            return None
+
+        if cache_types is not None and _item.cache_type not in cache_types:
+            raise TypeError(
+                'WRONGTYPE Operation against a key holding the wrong kind of value: %s' % real_name
+            )
+
+        return _item
+
+    def _add_item(self, real_name: str, item: MemoryCacheItem):
+        """
+        添加存储项并登记索引
+
+        @param {str} real_name - 真正的缓存名
+        @param {MemoryCacheItem} item - 存储项
+        """
+        self._datas[real_name] = item
+        if item.group is not None:
+            self._group_index.setdefault(item.group, set()).add(real_name)
+
+        if item.expire_at is not None:
+            heapq.heappush(self._expire_heap, (item.expire_at, next(self._expire_seq), real_name))
+
+    def _set_item(self, real_name: str, cache_type: str, value: Any, group: str, name: str,
+            ex: float = None) -> MemoryCacheItem:
+        """
+        设置存储项(覆盖已有的存储项)
+
+        @param {str} real_name - 真正的缓存名
+        @param {str} cache_type - 缓存类型
+        @param {Any} value - 缓存值
+        @param {str} group - 缓存所属分组标识
+        @param {str} name - 缓存名
+        @param {float} ex=None - 缓存过期时长, 单位为秒
+
+        @returns {MemoryCacheItem} - 存储项
+        """
+        _item = MemoryCacheItem(
+            cache_type, value, group, name,
+            expire_at=(None if ex is None else time.monotonic() + ex)
+        )
+        self._add_item(real_name, _item)
+        return _item
+
+    def _set_item_expire(self, real_name: str, item: MemoryCacheItem, ex: float):
+        """
+        更新存储项的过期时间
+
+        @param {str} real_name - 真正的缓存名
+        @param {MemoryCacheItem} item - 存储项
+        @param {float} ex - 过期时长, 单位为秒, None代表不过期
+        """
+        if ex is None:
+            # 旧的过期项在出堆时校验后丢弃
+            item.expire_at = None
+        else:
+            item.expire_at = time.monotonic() + ex
+            heapq.heappush(self._expire_heap, (item.expire_at, next(self._expire_seq), real_name))
+
+    def _remove_item(self, real_name: str) -> bool:
+        """
+        删除存储项
+
+        @param {str} real_name - 真正的缓存名
+
+        @returns {bool} - 是否删除了有效的存储项
+        """
+        _item = self._datas.pop(real_name, None)
+        if _item is None:
+            return False
+
+        if _item.group is not None:
+            _names = self._group_index.get(_item.group, None)
+            if _names is not None:
+                _names.discard(real_name)
+                if len(_names) == 0:
+                    self._group_index.pop(_item.group, None)
+
+        return not self._is_expired(_item, time.monotonic())
+
+    def _clean_expired(self):
+        """
+        清理已过期的存储项(每次最多清理clean_batch_size个)
+        """
+        _now = time.monotonic()
+        _count = 0
+        while len(self._expire_heap) > 0 and _count < self._clean_batch_size:
+            _expire_at, _seq, _real_name = self._expire_heap[0]
+            if _expire_at > _now:
+                break
+
+            heapq.heappop(self._expire_heap)
+            _count += 1
+            _item = self._datas.get(_real_name, None)
+            if _item is not None and _item.expire_at == _expire_at:
+                # 过期时间未被更新过, 删除存储项
+                self._remove_item(_real_name)
+
+    def _get_list_for_write(self, name: str, group: str) -> deque:
+        """
+        获取要写入的列表对象(不存在则创建)
+
+        @param {str} name - 列表名
+        @param {str} group - 缓存所在分组
+
+        @returns {deque} - 列表对象
+        """
+        self._clean_expired()
+        _real_name = self._get_real_name(name, group)
+        _item = self._get_item(_real_name, cache_types=('list', ))
+        if _item is None:
+            _item = self._set_item(_real_name, 'list', deque(), group, name)
+
+        return _item.value
+
+    def _get_dict_for_write(self, name: str, group: str) -> dict:
+        """
+        获取要写入的字典对象(不存在则创建)
+
+        @param {str} name - 字典名
+        @param {str} group - 缓存所在分组
+
+        @returns {dict} - 字典对象
+        """
+        self._clean_expired()
+        _real_name = self._get_real_name(name, group)
+        _item = self._get_item(_real_name, cache_types=('dict', ))
+        if _item is None:
+            _item = self._set_item(_real_name, 'dict', {}, group, name)
+
+        return _item.value
+
+    def _pop_list(self, name: str, group: str, count: int, left: bool = True) -> list:
+        """
+        从列表取出值并删除
+
+        @param {str} name - 列表名
+        @param {str} group - 缓存所在分组
+        @param {int} count - 要取出的数量
+        @param {bool} left=True - 是否从左边取出
+
+        @returns {list} - 取出数据的列表, 如果没有值返回None
+        """
+        with self._lock:
+            _real_name = self._get_real_name(name, group)
+            _item = self._get_item(_real_name, cache_types=('list', ))
+            if _item is None:
+                return None
+
+            _pop = _item.value.popleft if left else _item.value.pop
+            _values = [_pop() for _i in range(min(count, len(_item.value)))]
+            if len(_item.value) == 0:
+                self._remove_item(_real_name)
+
+            return _values
+
+    @classmethod
+    def _pattern_to_regex(cls, pattern: str) -> str:
+        """
+        将redis风格的通配符转换为正则表达式
+
+        @param {str} pattern - 通配符表达式
+
+        @returns {str} - 正则表达式
+        """
+        _regex = []
+        _i = 0
+        _len = len(pattern)
+        while _i < _len:
+            _char = pattern[_i]
+            if _char == '\\' and _i + 1 < _len:
+                _i += 1
+                _regex.append(re.escape(pattern[_i]))
+            elif _char == '*':
+                _regex.append('.*')
+            elif _char == '?':
+                _regex.append('.')
+            elif _char == '[':
+                _end = pattern.find(']', _i + 1)
+                if _end < 0:
+                    _regex.append(re.escape(_char))
+                else:
+                    _set = pattern[_i + 1:_end]
+                    _negate = _set.startswith('^')
+                    if _negate:
+                        _set = _set[1:]
+
+                    _set = ''.join(
+                        _c if _c == '-' else re.escape(_c) for _c in _set
+                    )
+                    _regex.append('[%s%s]' % ('^' if _negate else '', _set))
+                    _i = _end
+            else:
+                _regex.append(re.escape(_char))
+
+            _i += 1
+
+        return '%s$' % ''.join(_regex)
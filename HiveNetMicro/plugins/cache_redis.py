@@ -15,20 +15,206 @@
 import os
 import sys
 import math
+import time
 import datetime
+import re
 import json
+import zlib
+import pickle
+import inspect
+import importlib
 from typing import Any
 # 自动安装依赖库
 from HiveNetCore.utils.pyenv_tool import PythonEnvTools
-try:
-    import redis
-except ImportError:
-    PythonEnvTools.install_package('redis')
-    import redis
 # 根据当前文件路径将包路径纳入, 在非安装的情况下可以引用到
 sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir, os.path.pardir, os.path.pardir)))
 from HiveNetMicro.interface.extend.cache import CacheAdapter
+from HiveNetMicro.core.utils.redis_tool import RedisTool
+
+
+class RedisValueSerializer(object):
+    """
+    缓存值的序列化处理对象
+    注: 序列化后的数据格式为'\\x00' + 1个字节的类型标识 + 数据, 类型标识的低4位为序列化格式, 高4位为压缩格式;
+        字符串值(不以'\\x00'开头)直接以utf-8编码存储, 不增加类型标识
+    """
+
+    # 序列化格式标识
+    FORMATS = {'str': 0, 'json': 1, 'msgpack': 2, 'pickle': 3}
+
+    # 压缩格式标识
+    COMPRESSES = {'zlib': 1, 'zstd': 2, 'lz4': 3}
+
+    # 已导入的可选依赖库
+    _LIBS = {}
+
+    def __init__(self, format: str = 'json', compress: str = None, compress_threshold: int = 1024,
+            compress_level: int = None, json_obj=json):
+        """
+        构造函数
+
+        @param {str} format='json' - 序列化格式, 支持json, msgpack, pickle(使用协议5)
+        @param {str} compress=None - 压缩格式, 支持zlib, zstd, lz4, 不设置代表不压缩
+        @param {int} compress_threshold=1024 - 启用压缩的数据大小阈值, 单位为字节, 超过该大小才进行压缩
+        @param {int} compress_level=None - 压缩级别, 不设置代表使用压缩库的默认值
+        @param {object} json_obj=json - 用于进行json转换的对象
+        """
+        if format not in self.FORMATS.keys() or format == 'str':
+            raise ValueError('not support serializer format [%s]' % format)
+        if compress is not None and compress not in self.COMPRESSES.keys():
+            raise ValueError('not support serializer compress [%s]' % compress)
+
+        self.format = format
+        self.compress = compress
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+        self._json = json_obj
+
+        # 预先加载依赖库
+        if format == 'msgpack':
+            self._get_lib('msgpack')
+        if compress in ('zstd', 'lz4'):
+            self._get_lib(compress)
+
+    def dumps(self, value: Any) -> bytes:
+        """
+        序列化缓存值
+
+        @param {Any} value - 要保存的值
+
+        @returns {bytes} - 序列化后的数据
+        """
+        if type(value) == str:
+            _data = value.encode('utf-8')
+            if not _data.startswith(b'\x00'):
+                # 字符串直接存储
+                return _data
+
+            _format = 'str'
+        elif self.format == 'json':
+            _format = 'json'
+            _data = self._json.dumps(value, ensure_ascii=False).encode('utf-8')
+        elif self.format == 'msgpack':
+            _format = 'msgpack'
+            _data = self._get_lib('msgpack').packb(value, use_bin_type=True)
+        else:
+            _format = 'pickle'
+            _data = pickle.dumps(value, protocol=5)
+
+        _tag = self.FORMATS[_format]
+        if self.compress is not None and len(_data) > self.compress_threshold:
+            _tag |= self.COMPRESSES[self.compress] << 4
+            _data = self._compress_data(self.compress, _data, self.compress_level)
+
+        return b'\x00' + bytes([_tag]) + _data
+
+    def loads(self, data: bytes, allow_pickle: bool = False) -> Any:
+        """
+        反序列化缓存值
+
+        @param {bytes} data - 存储的数据
+        @param {bool} allow_pickle=False - 是否允许反序列化pickle格式的数据
+
+        @returns {Any} - 转换为真实类型的值
+        """
+        if data is None:
+            return None
+
+        if data.startswith(b'\x00') and len(data) > 1:
+            _tag = data[1]
+            _data = data[2:]
+            _compress = _tag >> 4
+            if _compress > 0:
+                for _name, _id in self.COMPRESSES.items():
+                    if _id == _compress:
+                        _data = self._decompress_data(_name, _data)
+                        break
+
+            _format = _tag & 0x0F
+            if _format == self.FORMATS['str']:
+                return _data.decode('utf-8')
+            elif _format == self.FORMATS['json']:
+                return self._json.loads(_data.decode('utf-8'))
+            elif _format == self.FORMATS['msgpack']:
+                return self._get_lib('msgpack').unpackb(_data, raw=False)
+            elif _format == self.FORMATS['pickle']:
+                if not allow_pickle:
+                    raise RuntimeError('pickle value is not allowed')
+                return pickle.loads(_data)
+
+        # 字符串或兼容旧版本的json格式
+        try:
+            _value = data.decode('utf-8')
+        except UnicodeDecodeError:
+            return data
+
+        if _value.startswith('{$json$}'):
+            return self._json.loads(_value[8:])
+        else:
+            return _value
+
+    #############################
+    # 内部函数
+    #############################
+    @classmethod
+    def _get_lib(cls, name: str):
+        """
+        获取可选依赖库(如果未安装则自动安装)
+
+        @param {str} name - 依赖库名, msgpack, zstd, lz4
+
+        @returns {module} - 依赖库对象
+        """
+        _lib = cls._LIBS.get(name, None)
+        if _lib is None:
+            _module, _package = {
+                'msgpack': ('msgpack', 'msgpack'), 'zstd': ('zstandard', 'zstandard'), 'lz4': ('lz4.frame', 'lz4')
+            }[name]
+            try:
+                _lib = importlib.import_module(_module)
+            except ImportError:
+                PythonEnvTools.install_package(_package)
+                _lib = importlib.import_module(_module)
+
+            cls._LIBS[name] = _lib
+
+        return _lib
+
+    @classmethod
+    def _compress_data(cls, compress: str, data: bytes, level: int = None) -> bytes:
+        """
+        压缩数据
+
+        @param {str} compress - 压缩格式
+        @param {bytes} data - 要压缩的数据
+        @param {int} level=None - 压缩级别
+
+        @returns {bytes} - 压缩后的数据
+        """
+        if compress == 'zlib':
+            return zlib.compress(data, -1 if level is None else level)
+        elif compress == 'zstd':
+            return cls._get_lib('zstd').ZstdCompressor(level=3 if level is None else level).compress(data)
+        else:
+            return cls._get_lib('lz4').compress(data, compression_level=0 if level is None else level)
+
+    @classmethod
+    def _decompress_data(cls, compress: str, data: bytes) -> bytes:
+        """
+        解压数据
+
+        @param {str} compress - 压缩格式
+        @param {bytes} data - 要解压的数据
+
+        @returns {bytes} - 解压后的数据
+        """
+        if compress == 'zlib':
+            return zlib.decompress(data)
+        elif compress == 'zstd':
+            return cls._get_lib('zstd').ZstdDecompressor().decompress(data)
+        else:
+            return cls._get_lib('lz4').decompress(data)
 
 
 class RedisCacheAdapter(CacheAdapter):
@@ -56,6 +242,17 @@ class RedisCacheAdapter(CacheAdapter):
                         注: 函数执行结果为True才会重新加载函数, 如果不设置该函数, 视为每次都重新加载数据
                     check_args {list} - 缓存更新检查函数的固定入参列表
                     check_kwargs {dict} - 缓存更新检查函数的key-value入参字典
+                    ex {float} - 缓存过期时长, 单位为秒, 默认为None(不过期)
+                    lock_ex {float} - 缓存加载锁的租约时长, 单位为秒, 默认为30
+                    lock_wait {float} - 缓存不存在且其他进程正在加载时, 等待加载完成的最长时间, 单位为秒, 默认为5
+                    early_refresh_beta {float} - 概率提前刷新系数(需设置ex), 越大越倾向提前刷新, 默认为0(不提前刷新)
+                    stale_while_revalidate {bool} - 缓存过期后是否先返回旧值并在后台刷新(需设置ex), 默认为False
+                    stale_ex {float} - stale_while_revalidate模式下缓存过期后旧值的保留时长, 单位为秒, 默认与ex一致
+                    refresh_interval {float} - 后台定时刷新的间隔时长, 单位为秒, 默认为None(不定时刷新)
+                    refresh_crontab {str} - 后台定时刷新的crontab表达式(需设置refresh_scheduler), 默认为None
+                    refresh_on_master {bool} - 是否只在集群主服务执行定时刷新, 默认为True
+                    incremental {bool} - 是否启用增量加载(仅支持list和dict类型), 默认为False
+                    delta_max_size {int} - 增量加载的最大变更数量, 超过该数量将改为全量加载, 默认为None(不限制)
         @param {dict} auto_cache_init_handlers=None - 自动缓存管理初始化的函数对象索引
             'load_handlers' {dict} - 缓存数据获取函数索引
                 [id] {dict} - 函数对象索引id, key为索引id标识字符串
@@ -69,8 +266,17 @@ class RedisCacheAdapter(CacheAdapter):
                                 'name': '',  # 缓存名
                                 'group': '',  # 缓存所属数组
                                 'cache_type': '',  # 缓存类型
+                                'version': '',  # 增量加载模式当前缓存数据的版本, 如果为None代表需全量加载
                             }
                         函数返回值根据缓存类型采取不同的返回方式:  base类型直接返回单个缓存值, list类型返回缓存值的list清单, dict类型返回缓存字典
+                        如果是增量加载模式, 函数返回值为字典, 格式为:
+                            {
+                                'version': '',  # 加载后的数据版本
+                                'full': False,  # 是否全量数据, 如果为True代表datas为全量数据
+                                'datas': ...,  # 全量数据(full为True时使用), 格式与非增量模式一致
+                                'upserts': ...,  # 增量更新的数据, dict类型为要新增或修改的key-value字典, list类型为要添加到列表末尾的值列表
+                                'deletes': []  # 增量删除的数据, dict类型为要删除的key列表, list类型为要从列表中删除的值列表
+                            }
                     args {list} - 默认的缓存获取函数的固定入参列表(当自动缓存管理参数不设置时使用该值传入)
                     kwargs {dict} - 默认的缓存获取函数的key-value入参字典(当自动缓存管理参数不设置时使用该值传入)
             'check_handlers' {dict} - 检查缓存数据是否需更新的检查函数索引
@@ -83,6 +289,20 @@ class RedisCacheAdapter(CacheAdapter):
                         函数返回值为bool对象, 指示缓存数据是否需要更新
                     args {list} - 默认的缓存更新检查函数的固定入参列表(当自动缓存管理参数不设置时使用该值传入)
                     kwargs {dict} - 默认的缓存更新检查函数的key-value入参字典(当自动缓存管理参数不设置时使用该值传入)
+        @param {str|SchedulerAdapter} refresh_scheduler=None - 自动缓存定时刷新所使用的任务调度适配器
+            注: 如果传入的是str代表从SYS_ADAPTER_MANAGER中获取类型为Scheduler的对应适配器, 调度服务需自行启动;
+                如果不设置, 将使用内部定时器执行按间隔时长的刷新(不支持crontab)
+        @param {dict} metrics=None - 缓存指标统计参数, 如果不设置代表不进行统计
+            latency_buckets {list} - 操作耗时分布的分段上限列表, 单位为毫秒, 默认为[1, 5, 10, 50, 100, 500, 1000]
+            hot_key_sample_rate {float} - 热点key检测的抽样比例, 默认为0.01, 为0代表不检测热点key
+            hot_key_top_k {int} - 热点key检测保留的key数量, 默认为20
+            sketch_width {int} - 热点key检测count-min sketch每行的计数器数量, 默认为2048
+            sketch_depth {int} - 热点key检测count-min sketch的行数, 默认为4
+            report_interval {float} - 定时输出统计指标的间隔时长, 单位为秒, 默认为None(不定时输出)
+            report_handler {function|str} - 定时输出统计指标的处理函数, 函数定义为func(metrics: dict)
+                注: 如果传入的是str代表从SYS_ADAPTER_MANAGER中获取类型为DynamicObject的对应函数对象
+            reset_on_report {bool} - 定时输出统计指标后是否重置统计数据, 默认为True
+            注: 读写字节数按缓存值序列化后的数据大小统计
         @param {str} logger_id=None - 日志对象标识, 可以选择application.yaml配置中的其中一个日志对象
         @param {kwargs} - 实现类的自定义参数
             redis_para {dict} - redis的连接参数字典, 具体参数见redis.Redis的初始化参数, 部分参数参考如下:
@@ -91,7 +311,31 @@ class RedisCacheAdapter(CacheAdapter):
                 port {int} - redis服务端口, 默认为6379
                 username {str} - 登录用户, 默认为None
                 password {str} - 登录密码, 默认为None
+                startup_nodes {list} - cluster模式的启动节点列表, 格式为[{'host': '', 'port': 6379}, ...]
+            redis_mode {str} - redis的部署模式, 默认为standalone, 支持的模式如下:
+                standalone - 单节点(或主从)模式
+                cluster - Redis Cluster集群模式
+                    注: 分组前缀'{$group=xxx$}'即为redis的hash tag, 同一分组的缓存落在同一个槽位, 分组操作及批量操作可在单节点执行;
+                        不同槽位的key无法进行事务处理, 因此该模式下事务管道将降级为非事务的管道执行
+                sentinel - 哨兵模式, 自动发现主节点及从节点
+            sentinel_para {dict} - 哨兵模式的参数, 参数如下:
+                sentinels {list} - 哨兵地址列表, 格式为[['127.0.0.1', 26379], ...]
+                service_name {str} - 主节点的服务名, 默认为'mymaster'
+                sentinel_kwargs {dict} - 连接哨兵的参数, 例如密码
+            read_from_replicas {bool} - 是否将只读命令(get/mget/get_group/keys/hget/hgetall等)发送到副本节点执行, 默认为False
+                注: 副本数据存在复制延迟, 写入后立即读取可能获取到旧数据, 对一致性要求高的场景不应开启
+            replica_para {dict} - standalone模式下只读副本的连接参数(将覆盖redis_para中的同名参数, 例如host/port)
             json {object} - 用于进行缓存值json转换的对象, 必须实现兼容原生json的dumps和loads函数, 默认使用原生json
+            serializer {dict} - 默认的缓存值序列化参数(非字符串的值才进行序列化), 参数如下:
+                format {str} - 序列化格式, 支持json, msgpack, pickle(协议5), 默认为json
+                    注: pickle格式反序列化存在执行任意代码的风险, 只应在可信的redis服务上使用;
+                        只有分组所用的序列化格式为pickle时, 才允许反序列化从该分组读取的pickle格式数据
+                compress {str} - 压缩格式, 支持zlib, zstd, lz4, 默认为None(不压缩)
+                compress_threshold {int} - 启用压缩的数据大小阈值, 单位为字节, 默认为1024
+                compress_level {int} - 压缩级别, 默认为None(使用压缩库的默认值)
+            group_serializers {dict} - 按分组指定的缓存值序列化参数, key为分组标识, value为序列化参数(与serializer一致)
+            scan_count {int} - 分组操作(get_group/delete_group/keys)通过SCAN遍历时每批获取的key数量, 默认为1000
+                注: 分组操作不使用KEYS命令, 避免在key数量很大时阻塞redis服务
         """
         super().__init__(**kwargs)
 
@@ -101,6 +345,8 @@ class RedisCacheAdapter(CacheAdapter):
         """
         # 关闭连接
         self._redis.close()
+        if self._redis_read is not self._redis:
+            self._redis_read.close()
 
     #############################
     # 需要实现类重载的内部函数
@@ -111,12 +357,110 @@ class RedisCacheAdapter(CacheAdapter):
         """
         # 处理连接处理
         self._redis_para = self._kwargs.get('redis_para', {})
-        self._redis_para['decode_responses'] = True
+        self._redis_para['decode_responses'] = False  # 需支持二进制的缓存值, 返回结果自行解码
         self._json = self._kwargs.get('json', json)
 
-        # 连接池和连接对象
-        self._conn_pool = redis.ConnectionPool(**self._redis_para)
-        self._redis = redis.Redis(connection_pool=self._conn_pool)
+        # 缓存值序列化对象
+        self._serializer = RedisValueSerializer(
+            json_obj=self._json, **self._kwargs.get('serializer', {})
+        )
+        self._group_serializers = {}
+        for _group, _paras in self._kwargs.get('group_serializers', {}).items():
+            self._group_serializers[_group] = RedisValueSerializer(json_obj=self._json, **_paras)
+
+        self._scan_count = self._kwargs.get('scan_count', 1000)
+
+        # 连接对象, 只读命令通过_redis_read执行(未启用副本读取时与_redis一致)
+        self._redis_mode = self._kwargs.get('redis_mode', 'standalone')
+        self._is_cluster = self._redis_mode == 'cluster'
+        self._redis, self._redis_read = RedisTool.create_clients(
+            redis_mode=self._redis_mode, redis_para=self._redis_para,
+            sentinel_para=self._kwargs.get('sentinel_para', None),
+            replica_para=self._kwargs.get('replica_para', None),
+            read_from_replicas=self._kwargs.get('read_from_replicas', False)
+        )
+
+        # 原子的比较删除脚本(用于释放加载锁)
+        self._release_lock_script = self._redis.register_script(
+            "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) else return 0 end"
+        )
+
+        # 原子的增量数据更新脚本(缓存不存在时不更新, 避免生成不完整的缓存)
+        self._apply_delta_script = self._redis.register_script(self._apply_delta_lua)
+
+    # 增量数据更新脚本, ARGV为: 缓存类型, 过期毫秒数(0代表不设置), 删除项数量, 删除项..., 新增项...
+    # 注: 新增项对于dict为key, value交替排列(每批1000个参数, 保证key, value不被拆开); 通过分批unpack避免参数过多导致lua栈溢出
+    _apply_delta_lua = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local function batch_call(cmd, first, last)
+    local i = first
+    while i <= last do
+        local j = math.min(i + 999, last)
+        redis.call(cmd, KEYS[1], unpack(ARGV, i, j))
+        i = j + 1
+    end
+end
+local upsert_first = 4 + tonumber(ARGV[3])
+if ARGV[1] == 'dict' then
+    batch_call('HDEL', 4, upsert_first - 1)
+    batch_call('HSET', upsert_first, #ARGV)
+else
+    for i = 4, upsert_first - 1 do
+        redis.call('LREM', KEYS[1], 0, ARGV[i])
+    end
+    batch_call('RPUSH', upsert_first, #ARGV)
+end
+if tonumber(ARGV[2]) > 0 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 1
+"""
+
+    def _apply_auto_cache_delta_data(self, name: str, group: str, cache_type: str, upserts,
+            deletes: list, ex: float) -> bool:
+        """
+        将增量数据应用到自动缓存的数据(缓存数据不存在时不处理)
+        注: 通过lua脚本原子完成检查及更新
+
+        @param {str} name - 缓存名
+        @param {str} group - 缓存所属分组
+        @param {str} cache_type - 缓存类型, list或dict
+        @param {Any} upserts - 新增或更新的数据, dict类型为字典, list类型为要添加的值列表
+        @param {list} deletes - 要删除的数据, dict类型为key列表, list类型为值列表
+        @param {float} ex - 缓存过期时长, None代表不过期
+
+        @returns {bool} - 是否已应用, 缓存数据不存在时返回False
+        """
+        _deletes = [] if deletes is None else list(deletes)
+        _args = [cache_type, 0 if ex is None else math.floor(ex * 1000)]
+        if cache_type == 'dict':
+            _args.append(len(_deletes))
+            _args.extend(_deletes)
+            # 每个dict的key对应一个参数, 按key, value交替排列
+            for _key, _val in self._get_mset_nvs({} if upserts is None else upserts, group, real_name=False).items():
+                _args.extend((_key, _val))
+        else:
+            _args.append(len(_deletes))
+            _args.extend([self._get_save_value(_val, group) for _val in _deletes])
+            _args.extend([self._get_save_value(_val, group) for _val in ([] if upserts is None else upserts)])
+
+        return self._apply_delta_script(
+            keys=[self._get_real_name(name, group)], args=_args, client=self._redis
+        ) == 1
+
+    def _release_auto_cache_lock(self, lock_name: str, group: str, token: str):
+        """
+        释放自动缓存的加载锁
+
+        @param {str} lock_name - 锁名
+        @param {str} group - 锁所在分组
+        @param {str} token - 获取锁时设置的令牌, 只有令牌一致才删除
+        """
+        self._release_lock_script(
+            keys=[self._get_real_name(lock_name, group)], args=[token], client=self._redis
+        )
 
     #############################
     # 需重载的通用缓存操作
@@ -151,11 +495,22 @@ class RedisCacheAdapter(CacheAdapter):
 
         @returns {bool} - 处理结果
         """
-        _names = self._redis.keys('{$group=%s$}_*' % group)
-        if _names is None or len(_names) == 0:
+        # 通过SCAN分批获取并删除, 使用UNLINK由redis在后台释放内存
+        _deleted_names = set()
+        _deleted_count = 0
+        for _names in self._scan_batch('%s*' % self._get_group_pattern(group), client=self._redis):
+            # SCAN可能返回重复的key, 需要排除
+            _names = [_name for _name in _names if _name not in _deleted_names]
+            if len(_names) == 0:
+                continue
+
+            _deleted_names.update(_names)
+            _deleted_count += self._redis.unlink(*_names)
+
+        if len(_deleted_names) == 0:
             return None
 
-        return self._redis.delete(*_names) == len(_names)
+        return _deleted_count == len(_deleted_names)
 
     def rename(self, src_name: str, dest_name: str, group: str = None) -> bool:
         """
@@ -196,21 +551,10 @@ class RedisCacheAdapter(CacheAdapter):
 
         @returns {list} - 返回的缓存列表
         """
-        # 生成真正的查询条件
-        if group is None:
-            _group = ''
-        else:
-            _group_len = len('{$group=%s$}_' % group)
-            _group = group.replace('*', 'x*').replace('?', 'x?').replace('[', 'x[').replace(']', 'x]')
-            _group = '{$group=%s$}_' % _group
-
-        _pattern = '%s%s' % (_group, pattern)
-
-        _keys = self._redis.keys(_pattern)
-        if group is None:
-            return _keys
-        else:
-            return [_key[_group_len:] for _key in _keys]
+        # 通过SCAN遍历获取, 避免KEYS命令阻塞redis服务
+        return list(dict.fromkeys(
+            self.scan(pattern, group=group, count=self._scan_count)
+        ))
 
     def scan(self, pattern: str, group: str = None, count: int = 10):
         """
@@ -231,12 +575,12 @@ class RedisCacheAdapter(CacheAdapter):
             _group = ''
         else:
             _group_len = len('{$group=%s$}_' % group)
-            _group = group.replace('*', 'x*').replace('?', 'x?').replace('[', 'x[').replace(']', 'x]')
-            _group = '{$group=%s$}_' % _group
+            _group = self._get_group_pattern(group)
 
         _pattern = '%s%s' % (_group, pattern)
 
-        for _key in self._redis.scan_iter(_pattern, count=count):
+        for _key in self._redis_read.scan_iter(_pattern, count=count):
+            _key = self._to_str(_key)
             if group is None:
                 yield _key
             else:
@@ -258,15 +602,8 @@ class RedisCacheAdapter(CacheAdapter):
         @returns {bool} - 返回设置结果
         """
         _px = None if ex is None else math.floor(ex * 1000)
-        if type(value) == str:
-            # 无需进行转换, 直接存储
-            _value = value
-        else:
-            # 转换为json格式存储
-            _value = '{$json$}%s' % self._json.dumps(value, ensure_ascii=False)
-
         _ret = self._redis.set(
-            self._get_real_name(name, group), _value, px=_px, nx=nx
+            self._get_real_name(name, group), self._get_save_value(value, group), px=_px, nx=nx
         )
         return False if _ret is None else _ret
 
@@ -280,8 +617,8 @@ class RedisCacheAdapter(CacheAdapter):
         @returns {Any} - 返回的缓存值
             注: 如果缓存不存在返回None
         """
-        _value = self._redis.get(self._get_real_name(name, group))
-        return self._get_real_value(_value)
+        _value = self._redis_read.get(self._get_real_name(name, group))
+        return self._get_real_value(_value, group)
 
     def mset(self, nvs: dict, group: str = None, ex: float = None) -> bool:
         """
@@ -294,18 +631,17 @@ class RedisCacheAdapter(CacheAdapter):
         @param {bool} - 返回结果(部分成功也是返回False)
         """
         _real_nvs = self._get_mset_nvs(nvs, group)
-        _ret = self._redis.mset(_real_nvs)
         if ex is None:
             # 不设置超时
-            return _ret
+            if self._is_cluster:
+                # 集群模式按槽位拆分执行
+                return self._redis.mset_nonatomic(_real_nvs)
+            return self._redis.mset(_real_nvs)
         else:
-            # 遍历设置超时
-            _result = True
-            for _name in _real_nvs.keys():
-                if not self.set_expire(_name, ex, group=None):
-                    _result = False
-
-            return _result
+            # 通过事务管道一次性设置值和超时
+            _pipe = self._get_pipeline(transaction=True)
+            _count, _convert = self._pipeline_mset(_pipe, _real_nvs, ex)
+            return _convert(_pipe.execute())
 
     def mget(self, names: list, group: str = None) -> list:
         """
@@ -318,11 +654,14 @@ class RedisCacheAdapter(CacheAdapter):
             注: 如果获取不到返回None
         """
         _names = self._get_real_name_list(names, group)
-        _ret = self._redis.mget(_names)
+        if self._is_cluster:
+            _ret = self._redis_read.mget_nonatomic(_names)
+        else:
+            _ret = self._redis_read.mget(_names)
         if _ret is None:
             return _ret
         else:
-            return [self._get_real_value(_val) for _val in _ret]
+            return [self._get_real_value(_val, group) for _val in _ret]
 
     def get_group(self, group: str) -> dict:
         """
@@ -334,23 +673,19 @@ class RedisCacheAdapter(CacheAdapter):
         @returns {dict} - 获取到的name-value缓存字典
             注: 如果获取不到返回None
         """
-        # 获取分组的key清单
-        _names = self._redis.keys('{$group=%s$}_*' % group)
-        if _names is None or len(_names) == 0:
-            return None
+        # 通过SCAN分批获取分组的key清单, 并按批次通过MGET获取值
+        _group_len = len('{$group=%s$}_' % group)
+        _ret = {}
+        for _names in self._scan_batch('%s*' % self._get_group_pattern(group), client=self._redis_read):
+            # 同一分组的key在同一个槽位, 集群模式下也可直接通过MGET获取
+            _values = self._redis_read.mget(_names)
+            for _i in range(len(_names)):
+                _ret[self._to_str(_names[_i])[_group_len:]] = self._get_real_value(_values[_i], group)
 
-        # 获取值
-        _values = self.mget(_names, group=None)
-        if _values is None:
+        if len(_ret) == 0:
             return None
-        else:
-            # 对应回key字典
-            _ret = {}
-            for _i in range(len(_names)):
-                _name = _names[_i][_names[_i].find('$}_') + 3:]
-                _ret[_name] = _values[_i]
 
-            return _ret
+        return _ret
 
     def set_expire(self, name: str, ex: float, group: str = None) -> bool:
         """
@@ -363,8 +698,13 @@ class RedisCacheAdapter(CacheAdapter):
 
         @returns {bool} - 设置结果
         """
+        _real_name = self._get_real_name(name, group)
+        if ex is None:
+            # 取消过期时间
+            return self._redis.persist(_real_name) or self._redis.exists(_real_name) > 0
+
         return self._redis.expire(
-            self._get_real_name(name, group), datetime.timedelta(seconds=ex)
+            _real_name, datetime.timedelta(seconds=ex)
         )
 
     #############################
@@ -456,18 +796,23 @@ class RedisCacheAdapter(CacheAdapter):
         @returns {bool} - 设置结果
         """
         _real_name = self._get_real_name(name, group)
+        _initial = [self._get_save_value(_val, group) for _val in initial]
+        if over_write:
+            # 覆盖模式, 通过事务管道一次性完成删除和创建
+            _pipe = self._get_pipeline(transaction=True)
+            _pipe.delete(_real_name)
+            if len(_initial) > 0:
+                _pipe.rpush(_real_name, *_initial)
+
+            _rets = _pipe.execute()
+            return True if len(_initial) == 0 else _rets[-1] > 0
+
         if self._redis.exists(_real_name) > 0:
-            # 列表已存在
-            if over_write:
-                self._redis.delete(_real_name)
-            else:
-                # 不覆盖, 返回失败
-                return False
+            # 列表已存在, 不覆盖, 返回失败
+            return False
 
         # 创建列表
-        if len(initial) > 0:
-            # 处理列表值
-            _initial = [self._get_save_value_str(_val) for _val in initial]
+        if len(_initial) > 0:
             return self._redis.rpush(_real_name, *_initial) > 0
         else:
             # 不能创建空列表, 直接返回成功即可
@@ -484,7 +829,7 @@ class RedisCacheAdapter(CacheAdapter):
             注: None代表name不存在
         """
         _real_name = self._get_real_name(name, group)
-        return self._redis.llen(_real_name)
+        return self._redis_read.llen(_real_name)
 
     def list_clear(self, name: str, group: str = None) -> bool:
         """
@@ -517,7 +862,7 @@ class RedisCacheAdapter(CacheAdapter):
         _real_name = self._get_real_name(name, group)
 
         # 修改值
-        _datas = [self._get_save_value_str(_val) for _val in datas]
+        _datas = [self._get_save_value(_val, group) for _val in datas]
 
         # 添加到列表左边
         return self._redis.lpush(_real_name, *_datas) > 0
@@ -536,7 +881,7 @@ class RedisCacheAdapter(CacheAdapter):
         _real_name = self._get_real_name(name, group)
 
         # 修改值
-        _datas = [self._get_save_value_str(_val) for _val in datas]
+        _datas = [self._get_save_value(_val, group) for _val in datas]
 
         # 添加到列表左边
         return self._redis.rpush(_real_name, *_datas) > 0
@@ -553,10 +898,24 @@ class RedisCacheAdapter(CacheAdapter):
         @returns {list} - 返回值列表
         """
         _real_name = self._get_real_name(name, group)
-        _end = end if end is not None else self._redis.llen(_real_name)
-        _values = self._redis.lrange(_real_name, start, _end)
+        _end = end if end is not None else -1
+        _values = self._redis_read.lrange(_real_name, start, _end)
+
+        return [self._get_real_value(_val, group) for _val in _values]
+
+    def list_remove(self, name: str, value: Any, count: int = 0, group: str = None) -> int:
+        """
+        从列表中删除指定值
 
-        return [self._get_real_value(_val) for _val in _values]
+        @param {str} name - 列表名
+        @param {Any} value - 要删除的值
+        @param {int} count=0 - 要删除的数量, 0代表删除所有匹配的值, 正数代表从左边开始删除, 负数代表从右边开始删除
+        @param {str} group=None - 缓存所在分组
+
+        @returns {int} - 实际删除的数量
+        """
+        _real_name = self._get_real_name(name, group)
+        return self._redis.lrem(_real_name, count, self._get_save_value(value, group))
 
     def lpop(self, name: str, group: str = None, count: int = 1) -> list:
         """
@@ -574,7 +933,7 @@ class RedisCacheAdapter(CacheAdapter):
         if _values is None:
             return None
 
-        return [self._get_real_value(_val) for _val in _values]
+        return [self._get_real_value(_val, group) for _val in _values]
 
     def rpop(self, name: str, group: str = None, count: int = 1) -> list:
         """
@@ -593,7 +952,7 @@ class RedisCacheAdapter(CacheAdapter):
         if _values is None:
             return None
 
-        return [self._get_real_value(_val) for _val in _values]
+        return [self._get_real_value(_val, group) for _val in _values]
 
     #############################
     # 需重载的字典类型缓存(hash set)操作
@@ -610,7 +969,7 @@ class RedisCacheAdapter(CacheAdapter):
         @returns {bool} - 设置结果
         """
         _real_name = self._get_real_name(name, group)
-        _ret = self._redis.hset(_real_name, key, self._get_save_value_str(value))
+        _ret = self._redis.hset(_real_name, key, self._get_save_value(value, group))
         return False if _ret is None else True
 
     def hmset(self, name: str, kvs: dict, group: str = None) -> bool:
@@ -624,7 +983,7 @@ class RedisCacheAdapter(CacheAdapter):
         @returns {bool} - 设置结果
         """
         _real_name = self._get_real_name(name, group)
-        _kvs = self._get_mset_nvs(kvs, None)
+        _kvs = self._get_mset_nvs(kvs, group, real_name=False)
         _ret = self._redis.hset(_real_name, None, None, _kvs)
         return False if _ret is None else True
 
@@ -639,7 +998,7 @@ class RedisCacheAdapter(CacheAdapter):
         @returns {Any} - 字典kv值的value
         """
         _real_name = self._get_real_name(name, group)
-        return self._get_real_value(self._redis.hget(_real_name, key))
+        return self._get_real_value(self._redis_read.hget(_real_name, key), group)
 
     def hmget(self, name: str, keys: list, group: str = None) -> dict:
         """
@@ -653,13 +1012,13 @@ class RedisCacheAdapter(CacheAdapter):
             注: 如果缓存不存在, 返回{}
         """
         _real_name = self._get_real_name(name, group)
-        _values = self._redis.hmget(_real_name, keys)
+        _values = self._redis_read.hmget(_real_name, keys)
         if _values is None:
             return None
 
         _ret = {}
         for _i in range(len(keys)):
-            _ret[keys[_i]] = self._get_real_value(_values[_i])
+            _ret[keys[_i]] = self._get_real_value(_values[_i], group)
 
         return _ret
 
@@ -674,13 +1033,13 @@ class RedisCacheAdapter(CacheAdapter):
             注: 如果缓存不存在, 返回{}
         """
         _real_name = self._get_real_name(name, group)
-        _kvs = self._redis.hgetall(_real_name)
+        _kvs = self._redis_read.hgetall(_real_name)
         if _kvs is None:
             return None
 
         _ret = {}
         for _key, _value in _kvs.items():
-            _ret[_key] = self._get_real_value(_value)
+            _ret[self._to_str(_key)] = self._get_real_value(_value, group)
 
         return _ret
 
@@ -709,7 +1068,7 @@ class RedisCacheAdapter(CacheAdapter):
         @returns {bool} - 判断结果
         """
         _real_name = self._get_real_name(name, group)
-        return self._redis.hexists(_real_name, key)
+        return self._redis_read.hexists(_real_name, key)
 
     def hkeys(self, name: str, group: str = None) -> list:
         """
@@ -721,7 +1080,214 @@ class RedisCacheAdapter(CacheAdapter):
         @returns {list} - key清单
         """
         _real_name = self._get_real_name(name, group)
-        return self._redis.hkeys(_real_name)
+        return [self._to_str(_key) for _key in self._redis_read.hkeys(_real_name)]
+
+    #############################
+    # 批量处理管道
+    #############################
+    def _execute_pipeline(self, ops: list, transaction: bool = False) -> list:
+        """
+        执行批量处理管道中的操作
+        注: 所有操作通过redis的pipeline一次性提交(transaction为True时通过MULTI/EXEC提交)
+
+        @param {list} ops - 操作清单, 每个操作为(op, args, kwargs)
+        @param {bool} transaction=False - 是否以事务方式执行
+
+        @returns {list} - 执行结果列表
+        """
+        if len(ops) == 0:
+            return []
+
+        _start = time.perf_counter()
+        _pipe = self._get_pipeline(transaction=transaction)
+        _converts = []
+        _paras_list = []
+        for _op, _args, _kwargs in ops:
+            # 按函数定义获取标准的参数字典
+            _bound = inspect.signature(getattr(self, _op)).bind(*_args, **_kwargs)
+            _bound.apply_defaults()
+            _paras_list.append(_bound.arguments)
+            _converts.append(
+                self._add_pipeline_cmd(_pipe, _op, _bound.arguments)
+            )
+
+        # 执行并转换结果, 一个操作可能对应多个redis命令
+        _rets = _pipe.execute()
+        _results = []
+        _pos = 0
+        for _count, _convert in _converts:
+            _results.append(_convert(_rets[_pos: _pos + _count]))
+            _pos += _count
+
+        if self._metrics is not None:
+            # 管道中的操作不经过操作函数, 需单独统计, 耗时按操作数量平均分摊
+            _duration = (time.perf_counter() - _start) / len(ops)
+            for _i in range(len(ops)):
+                self._metrics.record_op(
+                    ops[_i][0], _paras_list[_i].get('group', None), _paras_list[_i].get('name', None),
+                    _results[_i], _duration
+                )
+
+        return _results
+
+    def _add_pipeline_cmd(self, pipe, op: str, paras: dict) -> tuple:
+        """
+        向redis管道添加操作对应的命令
+
+        @param {redis.client.Pipeline} pipe - redis管道对象
+        @param {str} op - 操作函数名
+        @param {dict} paras - 操作函数的参数字典
+
+        @returns {tuple} - 返回(命令数量, 结果转换函数)
+            注: 结果转换函数的入参为该操作对应的命令执行结果列表
+        """
+        _group = paras.get('group', None)
+        _real_name = self._get_real_name(paras['name'], _group) if 'name' in paras.keys() else None
+        if op in ('delete', 'list_clear'):
+            pipe.delete(_real_name)
+            if op == 'delete':
+                return 1, lambda rets: rets[0] == 1
+            else:
+                return 1, lambda rets: True
+        elif op == 'mdelete':
+            _len = len(paras['names'])
+            if self._is_cluster and _group is None:
+                # 集群模式下无分组的key可能在不同槽位, 需逐个删除
+                for _name in paras['names']:
+                    pipe.delete(_name)
+                return _len, lambda rets: sum(rets) == _len
+
+            pipe.delete(*self._get_real_name_list(paras['names'], _group))
+            return 1, lambda rets: rets[0] == _len
+        elif op == 'rename':
+            pipe.rename(
+                self._get_real_name(paras['src_name'], _group),
+                self._get_real_name(paras['dest_name'], _group)
+            )
+            return 1, lambda rets: bool(rets[0])
+        elif op == 'exists':
+            pipe.exists(_real_name)
+            return 1, lambda rets: rets[0] > 0
+        elif op == 'set':
+            _px = None if paras['ex'] is None else math.floor(paras['ex'] * 1000)
+            pipe.set(
+                _real_name, self._get_save_value(paras['value'], _group), px=_px, nx=paras['nx']
+            )
+            return 1, lambda rets: False if rets[0] is None else rets[0]
+        elif op == 'get':
+            pipe.get(_real_name)
+            return 1, lambda rets: self._get_real_value(rets[0], _group)
+        elif op == 'mset':
+            return self._pipeline_mset(
+                pipe, self._get_mset_nvs(paras['nvs'], _group), paras['ex']
+            )
+        elif op == 'mget':
+            if self._is_cluster and _group is None:
+                # 集群模式下无分组的key可能在不同槽位, 需逐个获取
+                for _name in paras['names']:
+                    pipe.get(_name)
+                return len(paras['names']), lambda rets: [
+                    self._get_real_value(_val, _group) for _val in rets
+                ]
+
+            pipe.mget(self._get_real_name_list(paras['names'], _group))
+            return 1, lambda rets: None if rets[0] is None else [
+                self._get_real_value(_val, _group) for _val in rets[0]
+            ]
+        elif op == 'set_expire':
+            if paras['ex'] is None:
+                pipe.persist(_real_name)
+                pipe.exists(_real_name)
+                return 2, lambda rets: bool(rets[0]) or rets[1] > 0
+            else:
+                pipe.pexpire(_real_name, math.floor(paras['ex'] * 1000))
+                return 1, lambda rets: bool(rets[0])
+        elif op == 'set_counter':
+            pipe.set(_real_name, paras['initial'], nx=(not paras['over_write']))
+            return 1, lambda rets: False if rets[0] is None else rets[0]
+        elif op == 'incr_counter':
+            pipe.incr(_real_name, amount=paras['amount'])
+            return 1, lambda rets: rets[0]
+        elif op == 'decr_counter':
+            pipe.decr(_real_name, amount=paras['amount'])
+            return 1, lambda rets: rets[0]
+        elif op == 'list_len':
+            pipe.llen(_real_name)
+            return 1, lambda rets: rets[0]
+        elif op in ('lpush', 'rpush'):
+            _datas = [self._get_save_value(_val, _group) for _val in paras['datas']]
+            getattr(pipe, op)(_real_name, *_datas)
+            return 1, lambda rets: rets[0] > 0
+        elif op == 'list_range':
+            pipe.lrange(_real_name, paras['start'], -1 if paras['end'] is None else paras['end'])
+            return 1, lambda rets: [self._get_real_value(_val, _group) for _val in rets[0]]
+        elif op == 'list_remove':
+            pipe.lrem(_real_name, paras['count'], self._get_save_value(paras['value'], _group))
+            return 1, lambda rets: rets[0]
+        elif op in ('lpop', 'rpop'):
+            getattr(pipe, op)(_real_name, paras['count'])
+            return 1, lambda rets: None if rets[0] is None else [
+                self._get_real_value(_val, _group) for _val in rets[0]
+            ]
+        elif op == 'hset':
+            pipe.hset(_real_name, paras['key'], self._get_save_value(paras['value'], _group))
+            return 1, lambda rets: False if rets[0] is None else True
+        elif op == 'hmset':
+            pipe.hset(_real_name, None, None, self._get_mset_nvs(paras['kvs'], _group, real_name=False))
+            return 1, lambda rets: False if rets[0] is None else True
+        elif op == 'hget':
+            pipe.hget(_real_name, paras['key'])
+            return 1, lambda rets: self._get_real_value(rets[0], _group)
+        elif op == 'hmget':
+            _keys = paras['keys']
+            pipe.hmget(_real_name, _keys)
+            return 1, lambda rets: None if rets[0] is None else {
+                _keys[_i]: self._get_real_value(rets[0][_i], _group) for _i in range(len(_keys))
+            }
+        elif op == 'hgetall':
+            pipe.hgetall(_real_name)
+            return 1, lambda rets: None if rets[0] is None else {
+                self._to_str(_key): self._get_real_value(_value, _group) for _key, _value in rets[0].items()
+            }
+        elif op == 'hdel':
+            pipe.hdel(_real_name, *paras['keys'])
+            return 1, lambda rets: False if rets[0] is None else True
+        elif op == 'hexists':
+            pipe.hexists(_real_name, paras['key'])
+            return 1, lambda rets: rets[0]
+        elif op == 'hkeys':
+            pipe.hkeys(_real_name)
+            return 1, lambda rets: [self._to_str(_key) for _key in rets[0]]
+        else:
+            raise NotImplementedError('pipeline not support op [%s]' % op)
+
+    def _pipeline_mset(self, pipe, real_nvs: dict, ex: float) -> tuple:
+        """
+        向redis管道添加mset对应的命令
+
+        @param {redis.client.Pipeline} pipe - redis管道对象
+        @param {dict} real_nvs - 已转换为真实存储格式的name-value字典
+        @param {float} ex - 缓存过期时长, 单位为秒
+
+        @returns {tuple} - 返回(命令数量, 结果转换函数)
+        """
+        if self._is_cluster:
+            # 集群模式下key可能在不同槽位, 逐个设置
+            _px = None if ex is None else math.floor(ex * 1000)
+            for _name, _value in real_nvs.items():
+                pipe.set(_name, _value, px=_px)
+
+            return len(real_nvs), lambda rets: False not in [bool(_ret) for _ret in rets]
+
+        pipe.mset(real_nvs)
+        if ex is None:
+            return 1, lambda rets: rets[0]
+
+        _px = math.floor(ex * 1000)
+        for _name in real_nvs.keys():
+            pipe.pexpire(_name, _px)
+
+        return 1 + len(real_nvs), lambda rets: False not in [bool(_ret) for _ret in rets]
 
     #############################
     # 内部函数
@@ -737,20 +1303,80 @@ class RedisCacheAdapter(CacheAdapter):
         """
         return name if group is None else '{$group=%s$}_%s' % (group, name)
 
-    def _get_mset_nvs(self, nvs: dict, group: str) -> dict:
+    def _get_group_pattern(self, group: str) -> str:
+        """
+        获取分组匹配的key前缀条件(对分组标识中的通配符进行转义)
+
+        @param {str} group - 缓存所属分组标识
+
+        @returns {str} - 可用于SCAN匹配的key前缀
+        """
+        return '{$group=%s$}_' % re.sub(r'([\\*?\[\]])', r'\\\1', group)
+
+    def _get_pipeline(self, transaction: bool = False):
+        """
+        获取redis管道对象
+
+        @param {bool} transaction=False - 是否以事务方式执行
+            注: cluster模式不支持跨槽位的事务, 将降级为非事务管道
+
+        @returns {redis.client.Pipeline} - 管道对象
+        """
+        if self._is_cluster:
+            return self._redis.pipeline(transaction=False)
+
+        return self._redis.pipeline(transaction=transaction)
+
+    def _scan_batch(self, pattern: str, client=None):
+        """
+        通过SCAN按批次获取匹配的key清单
+
+        @param {str} pattern - key的匹配条件
+        @param {redis.Redis} client=None - 执行SCAN的连接对象, 默认为主连接对象
+
+        @returns {iterator} - 每次返回一批key的列表
+        """
+        _client = self._redis if client is None else client
+        if self._is_cluster:
+            # 集群模式需遍历所有节点, 通过scan_iter获取后按批次返回
+            _names = []
+            for _name in _client.scan_iter(match=pattern, count=self._scan_count):
+                _names.append(_name)
+                if len(_names) >= self._scan_count:
+                    yield _names
+                    _names = []
+
+            if len(_names) > 0:
+                yield _names
+
+            return
+
+        _cursor = 0
+        while True:
+            _cursor, _names = _client.scan(
+                cursor=_cursor, match=pattern, count=self._scan_count
+            )
+            if len(_names) > 0:
+                yield _names
+
+            if _cursor == 0:
+                break
+
+    def _get_mset_nvs(self, nvs: dict, group: str, real_name: bool = True) -> dict:
         """
         获取mset设置的真正nvs字典
 
         @param {dict} nvs - 要设置的name-value字典
         @param {str} group=None - 缓存所属分组标识
+        @param {bool} real_name=True - 是否将name转换为真正存储的name(字典的key不需要转换)
 
         @returns {dict} - 返回标准的设置字典
         """
         _real_nvs = {}
         for _name, _val in nvs.items():
-            _val = self._get_save_value_str(_val)
+            _val = self._get_save_value(_val, group)
 
-            if group is None:
+            if group is None or not real_name:
                 _real_nvs[_name] = _val
             else:
                 _real_nvs[self._get_real_name(_name, group)] = _val
@@ -771,29 +1397,46 @@ class RedisCacheAdapter(CacheAdapter):
         else:
             return [self._get_real_name(_name, group) for _name in names]
 
-    def _get_save_value_str(self, value: Any) -> str:
+    def _get_save_value(self, value: Any, group: str = None) -> bytes:
         """
-        获取值的保存字符串格式
+        获取值的保存格式
 
         @param {Any} value - 要保存的值
+        @param {str} group=None - 缓存所属分组标识, 用于选择分组的序列化参数
 
-        @returns {str} - 转换后的字符串
+        @returns {bytes} - 转换后的数据
         """
-        if type(value) != str:
-            # 转换为json格式存储
-            return '{$json$}%s' % self._json.dumps(value, ensure_ascii=False)
-        else:
-            return value
+        _data = self._group_serializers.get(group, self._serializer).dumps(value)
+        if self._metrics is not None:
+            self._metrics.record_bytes(group, bytes_out=len(_data))
+
+        return _data
 
-    def _get_real_value(self, value: str) -> Any:
+    def _get_real_value(self, value: bytes, group: str = None) -> Any:
         """
         获取真实类型的缓存值
 
-        @param {str} value - 存储的String格式数据
+        @param {bytes} value - 存储的数据
+        @param {str} group=None - 缓存所属分组标识, 用于选择分组的序列化参数及统计读取字节数
 
         @returns {Any} - 转换为真实类型的值
         """
-        if type(value) == str and value.startswith('{$json$}'):
-            return self._json.loads(value[8:])
-        else:
+        if type(value) != bytes:
             return value
+
+        if self._metrics is not None:
+            self._metrics.record_bytes(group, bytes_in=len(value))
+
+        # 是否允许pickle由所读取分组的序列化格式决定, 避免其他分组写入的pickle数据被反序列化
+        _serializer = self._group_serializers.get(group, self._serializer)
+        return _serializer.loads(value, allow_pickle=_serializer.format == 'pickle')
+
+    def _to_str(self, value) -> str:
+        """
+        将redis返回的key转换为字符串
+
+        @param {bytes|str} value - redis返回的key
+
+        @returns {str} - 字符串
+        """
+        return value.decode('utf-8') if type(value) == bytes else value
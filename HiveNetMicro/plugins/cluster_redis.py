@@ -14,21 +14,16 @@
 import os
 import sys
 import json
+import time
 import datetime
 import json
 from HiveNetCore.generic import CResult
 from HiveNetCore.utils.exception_tool import ExceptionTool
-# 自动安装依赖库
-from HiveNetCore.utils.pyenv_tool import PythonEnvTools
-try:
-    import redis
-except ImportError:
-    PythonEnvTools.install_package('redis')
-    import redis
 # 根据当前文件路径将包路径纳入, 在非安装的情况下可以引用到
 sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir, os.path.pardir, os.path.pardir)))
 from HiveNetMicro.interface.adapter.cluster import ClusterAdapter
+from HiveNetMicro.core.utils.redis_tool import RedisTool
 
 
 class RedisClusterAdapter(ClusterAdapter):
@@ -67,11 +62,21 @@ class RedisClusterAdapter(ClusterAdapter):
             heart_beat {float} - 续约心跳间隔时长, 单位为秒, 默认为4
             enable_event {bool} - 服务是否开启集群事件接收处理, 默认为False
             event_interval {float} - 事件接收检查间隔, 单位为秒, 默认为2
+                注: block模式下为获取事件出现异常后的重试等待时长
             event_each_get {int} - 每次从服务器获取的事件数, 默认为10
+            event_mode {str} - 事件接收模式, 默认为poll
+                poll - 通过定时器按event_interval间隔轮询获取事件
+                block - 通过独立线程使用BLPOP阻塞等待事件, 事件到达后立即处理, 空闲时不产生轮询请求
+                    注: 阻塞等待会独占一个连接, redis_para的socket_timeout(如有设置)应大于event_block_timeout
+            event_block_timeout {float} - block模式下每次阻塞等待事件的最长时间, 单位为秒, 默认为5
             after_register {function} - 当注册集群成功后触发执行的函数, 函数入参为adapter对象(self)
             after_deregister {function}  - 当取消注册集群后触发执行的函数, 函数入参为adapter对象(self)
             after_own_master {function} - 当服务变为集群主服务后触发执行的函数, 函数入参为adapter对象(self)
+                注: 可通过adapter.master_token获取本次抢占的防护令牌(fencing token), 令牌保存在redis中, 每次主服务变更递增
             after_lost_master {function} - 当服务变为失去集群主服务后触发执行的函数, 函数入参为adapter对象(self)
+            enable_member_view {bool} - 是否在本地维护当前集群模块的成员视图, 默认为False
+            after_member_join {function} - 当有成员加入集群模块后触发执行的函数, 函数入参为(adapter对象, 成员信息字典)
+            after_member_leave {function} - 当有成员离开集群模块后触发执行的函数, 函数入参为(adapter对象, 成员信息字典)
             实现类定义的参数...
             redis_para {dict} - redis的连接参数字典, 具体参数见redis.Redis的初始化参数, 部分参数参考如下:
                 max_connections {int} - 最大连接数, 默认为None
@@ -79,6 +84,18 @@ class RedisClusterAdapter(ClusterAdapter):
                 port {int} - redis服务端口, 默认为6379
                 username {str} - 登录用户, 默认为None
                 password {str} - 登录密码, 默认为None
+                startup_nodes {list} - cluster模式的启动节点列表, 格式为[{'host': '', 'port': 6379}, ...]
+            redis_mode {str} - redis的部署模式, 支持standalone/cluster/sentinel, 默认为standalone
+                注: cluster模式下同类集群信息的key以'{$group=xxx$}'作为hash tag, 落在同一个槽位
+            sentinel_para {dict} - 哨兵模式的参数, 参数如下:
+                sentinels {list} - 哨兵地址列表, 格式为[['127.0.0.1', 26379], ...]
+                service_name {str} - 主节点的服务名, 默认为'mymaster'
+                sentinel_kwargs {dict} - 连接哨兵的参数, 例如密码
+            read_from_replicas {bool} - 集群信息清单查询(get_cluster_list)是否从副本节点读取, 默认为False
+                注: 主服务抢占、注册续约及事件处理始终在主节点执行
+            replica_para {dict} - standalone模式下只读副本的连接参数(将覆盖redis_para中的同名参数, 例如host/port)
+            scan_count {int} - 通过SCAN遍历集群信息时每批获取的key数量, 默认为1000
+                注: 集群信息查询不使用KEYS命令, 避免在key数量很大时阻塞redis服务
 
         @param {str} logger_id=None - 日志对象标识, 可以选择application.yaml配置中的其中一个日志对象
         @param {bool} is_manage=False - 指定适配器是否以管理工具方式启动
@@ -106,15 +123,142 @@ class RedisClusterAdapter(ClusterAdapter):
         self._cache_master = '{$group=cluster_master$}{$%s$}{$%s$}{$%s$}' % (
             self._namespace, self._sys_id, self._module_id
         ) # 当前集群模块的集群master服务器，值为服务器的server_id
+        self._cache_master_fencing = '{$group=cluster_master$}_fencing{$%s$}{$%s$}{$%s$}' % (
+            self._namespace, self._sys_id, self._module_id
+        )  # 集群master的防护令牌计数器, 与master在同一槽位, 每次master变更递增
+        self._cache_members = '{$group=cluster_member$}{$%s$}{$%s$}{$%s$}' % (
+            self._namespace, self._sys_id, self._module_id
+        )  # 当前集群模块的成员索引, 值为成员server_id的集合, 成员续约时添加, 取消注册或获取时发现已过期则移除
 
         # 超时时间
         self._expire_timedelta = datetime.timedelta(seconds=self._expire)
+        self._expire_px = int(self._expire * 1000)
 
-        # Redis连接池和连接对象
+        # Redis连接对象, 只读查询通过_redis_read执行(未启用副本读取时与_redis一致)
         self._redis_para = self._init_config.get('redis_para', {})
         self._redis_para['decode_responses'] = True
-        self._conn_pool = redis.ConnectionPool(**self._redis_para)
-        self._redis = redis.Redis(connection_pool=self._conn_pool)
+        self._is_cluster = self._init_config.get('redis_mode', 'standalone') == 'cluster'
+        self._redis, self._redis_read = RedisTool.create_clients(
+            redis_mode=self._init_config.get('redis_mode', 'standalone'), redis_para=self._redis_para,
+            sentinel_para=self._init_config.get('sentinel_para', None),
+            replica_para=self._init_config.get('replica_para', None),
+            read_from_replicas=self._init_config.get('read_from_replicas', False)
+        )
+        self._scan_count = self._init_config.get('scan_count', 1000)
+
+        # 集群master抢占/续约脚本, 返回防护令牌, 抢占失败返回0
+        self._own_master_script = self._redis.register_script(
+            "local _cur = redis.call('GET', KEYS[1]) "
+            "if _cur == false then "
+            "redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2]) "
+            "return redis.call('INCR', KEYS[2]) "
+            "elseif _cur == ARGV[1] then "
+            "redis.call('PEXPIRE', KEYS[1], ARGV[2]) "
+            "local _token = redis.call('GET', KEYS[2]) "
+            "if _token == false then _token = redis.call('INCR', KEYS[2]) end "
+            "return tonumber(_token) "
+            "end "
+            "return 0"
+        )
+
+        # 集群master释放脚本(比较删除)
+        self._lost_master_script = self._redis.register_script(
+            "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) else return 0 end"
+        )
+
+        # 集群master防护令牌检查脚本
+        self._check_master_token_script = self._redis.register_script(
+            "if redis.call('GET', KEYS[1]) == ARGV[1] and redis.call('GET', KEYS[2]) == ARGV[2] "
+            "then return 1 else return 0 end"
+        )
+
+        # 分布式信号量脚本
+        # KEYS: 1-持有者(zset, score为到期时间), 2-防护令牌计数器, 3-公平等待队列(zset, score为排队号), 4-等待者到期时间(zset)
+        _time_script = (
+            "local _time = redis.call('TIME') "
+            "local _now = tonumber(_time[1]) * 1000 + math.floor(tonumber(_time[2]) / 1000) "
+        )
+        _expire_script = (
+            "if redis.call('PTTL', KEYS[1]) < _ttl then redis.call('PEXPIRE', KEYS[1], _ttl) end "
+        )
+        self._acquire_semaphore_script = self._redis.register_script(
+            _time_script +
+            "local _permits = tonumber(ARGV[2]) "
+            "local _ttl = tonumber(ARGV[3]) "
+            "redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', _now) "
+            "if ARGV[4] == '1' and not redis.call('ZSCORE', KEYS[1], ARGV[1]) then "
+            "local _stale = redis.call('ZRANGEBYSCORE', KEYS[4], '-inf', _now) "
+            "for _, _id in ipairs(_stale) do redis.call('ZREM', KEYS[3], _id) end "
+            "redis.call('ZREMRANGEBYSCORE', KEYS[4], '-inf', _now) "
+            "if not redis.call('ZSCORE', KEYS[3], ARGV[1]) then "
+            "redis.call('ZADD', KEYS[3], redis.call('INCR', KEYS[2]), ARGV[1]) "
+            "end "
+            "redis.call('ZADD', KEYS[4], _now + _ttl, ARGV[1]) "
+            "if redis.call('PTTL', KEYS[3]) < _ttl then redis.call('PEXPIRE', KEYS[3], _ttl) end "
+            "if redis.call('PTTL', KEYS[4]) < _ttl then redis.call('PEXPIRE', KEYS[4], _ttl) end "
+            "if redis.call('ZRANK', KEYS[3], ARGV[1]) >= _permits - redis.call('ZCARD', KEYS[1]) then return 0 end "
+            "redis.call('ZREM', KEYS[3], ARGV[1]) "
+            "redis.call('ZREM', KEYS[4], ARGV[1]) "
+            "elseif not redis.call('ZSCORE', KEYS[1], ARGV[1]) and redis.call('ZCARD', KEYS[1]) >= _permits then "
+            "return 0 "
+            "end "
+            "redis.call('ZADD', KEYS[1], _now + _ttl, ARGV[1]) " +
+            _expire_script +
+            "return redis.call('INCR', KEYS[2])"
+        )
+        self._renew_semaphore_script = self._redis.register_script(
+            _time_script +
+            "local _ttl = tonumber(ARGV[2]) "
+            "local _score = redis.call('ZSCORE', KEYS[1], ARGV[1]) "
+            "if not _score or tonumber(_score) <= _now then return 0 end "
+            "redis.call('ZADD', KEYS[1], _now + _ttl, ARGV[1]) " +
+            _expire_script +
+            "return 1"
+        )
+        self._release_semaphore_script = self._redis.register_script(
+            "local _ret = redis.call('ZREM', KEYS[1], ARGV[1]) "
+            "redis.call('ZREM', KEYS[3], ARGV[1]) "
+            "redis.call('ZREM', KEYS[4], ARGV[1]) "
+            "return _ret"
+        )
+
+        # 限流令牌获取脚本(GCRA算法), 时间单位为微秒, 返回{获取到的令牌数, 需等待的时长}
+        # KEYS: 1-理论到达时间(TAT); ARGV: 1-令牌发放间隔, 2-允许的突发数, 3-至少需要的令牌数, 4-希望获取的令牌数
+        self._acquire_rate_tokens_script = self._redis.register_script(
+            "local _time = redis.call('TIME') "
+            "local _now = tonumber(_time[1]) * 1000000 + tonumber(_time[2]) "
+            "local _interval = tonumber(ARGV[1]) "
+            "local _burst = tonumber(ARGV[2]) "
+            "local _need = tonumber(ARGV[3]) "
+            "local _tat = tonumber(redis.call('GET', KEYS[1]) or '0') "
+            "if _tat < _now then _tat = _now end "
+            "local _available = math.floor((_now + _burst * _interval - _tat) / _interval) "
+            "if _available < _need then return {0, _tat + (_need - _burst) * _interval - _now} end "
+            "local _grant = math.min(tonumber(ARGV[4]), _available) "
+            "_tat = _tat + _grant * _interval "
+            "redis.call('SET', KEYS[1], string.format('%.0f', _tat), 'PX', math.ceil((_tat - _now) / 1000)) "
+            "return {_grant, 0}"
+        )
+
+        # 集群注册/续约脚本, 续约返回1, 重新注册返回2
+        # 注: cluster模式下注册信息和事件队列的key不在同一槽位, 不能使用该脚本
+        self._register_script = self._redis.register_script(
+            "redis.call('SADD', KEYS[4], ARGV[4]) "
+            "redis.call('PEXPIRE', KEYS[4], ARGV[2]) "
+            "if redis.call('PEXPIRE', KEYS[1], ARGV[2]) == 1 then "
+            "if ARGV[3] == '1' then "
+            "redis.call('PEXPIRE', KEYS[2], ARGV[2]) "
+            "redis.call('PEXPIRE', KEYS[3], ARGV[2]) "
+            "end "
+            "return 1 "
+            "end "
+            "if ARGV[3] == '1' then "
+            "redis.call('DEL', KEYS[3]) "
+            "redis.call('SET', KEYS[2], '1', 'PX', ARGV[2]) "
+            "end "
+            "redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2]) "
+            "return 2"
+        )
 
     #############################
     # 需实现类继承实现的公共函数
@@ -189,10 +333,10 @@ class RedisClusterAdapter(ClusterAdapter):
         )
 
         # 获取信息
-        _name_keys = self._redis.keys(_cache_name_pattern)
-        _app_names = self._redis.mget(_name_keys)
-        _master_keys = self._redis.keys(_cache_master_pattern)
-        _master_server_ids = self._redis.mget(_master_keys)
+        _name_keys = self._scan_keys(_cache_name_pattern, client=self._redis_read)
+        _app_names = self._batch_mget(_name_keys, client=self._redis_read)
+        _master_keys = self._scan_keys(_cache_master_pattern, client=self._redis_read)
+        _master_server_ids = dict(zip(_master_keys, self._batch_mget(_master_keys, client=self._redis_read)))
 
         # 生成结果
         _clusters = []
@@ -212,10 +356,7 @@ class RedisClusterAdapter(ClusterAdapter):
             _cache_master = '{$group=cluster_master$}{$%s$}{$%s$}{$%s$}' % (
                 namespace, _infos['sys_id'], _infos['module_id']
             )
-            _master_index = -1
-            if _cache_master in _master_keys:
-                _master_index = _master_keys.index(_cache_master)
-            if _master_index >= 0 and _master_server_ids[_master_index] == _infos['server_id']:
+            if _master_server_ids.get(_cache_master, None) == _infos['server_id']:
                 _infos['master'] = True
 
             _clusters.append(_infos)
@@ -278,8 +419,17 @@ class RedisClusterAdapter(ClusterAdapter):
         @param {str} module_id=None - 模块标识(标准为3位字符), 不传代表获取上一级的所有信息
 
         @returns {CResult} - 处理结果
+            注: 可通过result.delivery获取投递统计信息, 格式为:
+            {
+                'targets': 0,  # 广播的目标服务数量
+                'delivered': 0,  # 投递成功的数量
+                'failed': 0,  # 投递失败的数量
+                'duration': 0.0  # 投递耗时, 单位为毫秒
+            }
         """
         _result = CResult()
+        _result.delivery = {'targets': 0, 'delivered': 0, 'failed': 0, 'duration': 0.0}
+        _start = time.perf_counter()
         with ExceptionTool.ignored_cresult(
             result_obj=_result, logger=self.logger, self_log_msg='broadcast cluster event error'
         ):
@@ -299,14 +449,39 @@ class RedisClusterAdapter(ClusterAdapter):
                 '*' if sys_id is None or module_id is None else module_id
             )
 
-            _keys = self._redis.keys(_cache_events_pattern)
-            for _key in _keys:
-                _cache_name = _key.replace('{$group=cluster_event_exists$}', '{$group=cluster_event$}')
-                _ret = self._redis.rpush(_cache_name, _event_str)
-                if _ret == 1:
-                    # 重新创建, 设置超时时间
-                    self._redis.expire(_cache_name, self._expire_timedelta)
-
+            _keys = self._scan_keys(_cache_events_pattern)
+            _result.delivery['targets'] = len(_keys)
+            for _i in range(0, len(_keys), self._scan_count):
+                # 按批次通过管道一次提交所有目标的RPUSH
+                _cache_names = [
+                    _key.replace('{$group=cluster_event_exists$}', '{$group=cluster_event$}')
+                    for _key in _keys[_i: _i + self._scan_count]
+                ]
+                _pipe = self._redis.pipeline(transaction=False)
+                for _cache_name in _cache_names:
+                    _pipe.rpush(_cache_name, _event_str)
+
+                _expire_names = []
+                for _j, _ret in enumerate(_pipe.execute(raise_on_error=False)):
+                    if isinstance(_ret, Exception) or _ret <= 0:
+                        _result.delivery['failed'] += 1
+                        continue
+
+                    _result.delivery['delivered'] += 1
+                    if _ret == 1:
+                        # 重新创建的队列, 需设置超时时间
+                        _expire_names.append(_cache_names[_j])
+
+                if len(_expire_names) > 0:
+                    _pipe = self._redis.pipeline(transaction=False)
+                    for _cache_name in _expire_names:
+                        _pipe.pexpire(_cache_name, self._expire_px)
+                    _pipe.execute(raise_on_error=False)
+
+            if _result.delivery['failed'] > 0:
+                raise RuntimeError('broadcast cluster event failed: %s' % str(_result.delivery))
+
+        _result.delivery['duration'] = (time.perf_counter() - _start) * 1000
         return _result
 
     #############################
@@ -319,14 +494,26 @@ class RedisClusterAdapter(ClusterAdapter):
 
         @returns {bool} - 处理结果
         """
+        if not self._is_cluster:
+            # 通过脚本一次完成续约(或重新注册)
+            _ret = self._register_script(
+                keys=[self._cache_name, self._cache_events_exists, self._cache_events, self._cache_members],
+                args=[self._app_name, self._expire_px, '1' if self._enable_event else '0', self._server_id],
+                client=self._redis
+            )
+            return _ret > 0
+
+        # cluster模式下key不在同一槽位, 通过管道一次提交续约命令, 缓存不存在时PEXPIRE返回False
+        _pipe = self._redis.pipeline(transaction=False)
+        _pipe.pexpire(self._cache_name, self._expire_px)
+        if self._enable_event:
+            _pipe.pexpire(self._cache_events_exists, self._expire_px)
+            _pipe.pexpire(self._cache_events, self._expire_px)
+        _pipe.sadd(self._cache_members, self._server_id)
+        _pipe.pexpire(self._cache_members, self._expire_px)
+
         _ret = True
-        # 尝试直接延续超时, 如果缓存不存在会返回False
-        if self._redis.expire(self._cache_name, self._expire_timedelta):
-            # 缓存已存在, 延续事件超时时间
-            if self._enable_event:
-                self._redis.expire(self._cache_events_exists, self._expire_timedelta)
-                self._redis.expire(self._cache_events, self._expire_timedelta)
-        else:
+        if not _pipe.execute()[0]:
             # 缓存不存在, 需要重新注册
             if self._enable_event:
                 _ret = self._set_event()
@@ -346,8 +533,46 @@ class RedisClusterAdapter(ClusterAdapter):
 
         @returns {bool} - 处理结果
         """
+        self._redis.srem(self._cache_members, self._server_id)
         return self._redis.delete(self._cache_name, self._cache_events_exists, self._cache_events) > 0
 
+    def _get_member_list_self(self) -> list:
+        """
+        获取当前集群模块的成员清单, 用于刷新成员视图
+        注: 通过成员索引获取, 避免每次心跳都SCAN遍历全部集群信息; 索引中集群信息已过期的成员将被移除
+
+        @returns {list} - 成员信息清单, 格式与get_cluster_list一致
+        """
+        _server_ids = sorted(self._redis_read.smembers(self._cache_members))
+        _app_names = self._batch_mget([
+            '{$group=cluster_info$}{$%s$}{$%s$}{$%s$}{$%s$}' % (
+                self._namespace, self._sys_id, self._module_id, _server_id
+            ) for _server_id in _server_ids
+        ], client=self._redis_read)
+        _master_server_id = self._redis_read.get(self._cache_master)
+
+        _members = []
+        _expired = []
+        for _server_id, _app_name in zip(_server_ids, _app_names):
+            if _app_name is None:
+                # 集群信息已过期, 成员下次续约时会重新加入索引
+                _expired.append(_server_id)
+                continue
+
+            _members.append({
+                'namespace': self._namespace,
+                'sys_id': self._sys_id,
+                'module_id': self._module_id,
+                'server_id': _server_id,
+                'app_name': _app_name,
+                'master': _server_id == _master_server_id
+            })
+
+        if len(_expired) > 0:
+            self._redis.srem(self._cache_members, *_expired)
+
+        return _members
+
     def _try_own_master_self(self) -> bool:
         """
         尝试抢占集群主服务
@@ -355,20 +580,16 @@ class RedisClusterAdapter(ClusterAdapter):
 
         @returns {bool} - 抢占结果
         """
-        _ret = self._redis.set(
-            self._cache_master, self._server_id, ex=self._expire_timedelta, nx=True
+        # 通过脚本原子完成抢占或续约, 避免多次请求间出现多个主服务的情况
+        _token = self._own_master_script(
+            keys=[self._cache_master, self._cache_master_fencing],
+            args=[self._server_id, self._expire_px], client=self._redis
         )
-        if _ret is None or not _ret:
-            # 抢占失败, 看看是不是自己
-            if self._redis.get(self._cache_master) == self._server_id:
-                # 是自己，续约时长
-                self._redis.expire(self._cache_master, self._expire_timedelta)
-                return True
-            else:
-                return False
-        else:
-            # 抢占成功
+        if _token > 0:
+            self._master_token = _token
             return True
+        else:
+            return False
 
     def _try_lost_master_self(self) -> bool:
         """
@@ -376,13 +597,90 @@ class RedisClusterAdapter(ClusterAdapter):
 
         @returns {bool} - 处理结果
         """
-        if self._redis.get(self._cache_master) == self._server_id:
-            # 当前主服务是自己, 删除
-            _ret = self._redis.delete(self._cache_master)
-            return _ret > 0
-        else:
-            # 主服务不是自己
-            return False
+        # 只有当前主服务是自己才删除
+        _ret = self._lost_master_script(
+            keys=[self._cache_master], args=[self._server_id], client=self._redis
+        )
+        return _ret > 0
+
+    def _check_master_token_self(self, token: int) -> bool:
+        """
+        检查防护令牌是否仍为当前有效的集群主服务令牌
+
+        @param {int} token - 要检查的令牌
+
+        @returns {bool} - 检查结果
+        """
+        _ret = self._check_master_token_script(
+            keys=[self._cache_master, self._cache_master_fencing],
+            args=[self._server_id, str(token)], client=self._redis
+        )
+        return _ret == 1
+
+    def _acquire_semaphore_self(self, name: str, holder_id: str, permits: int, ttl: float, fair: bool) -> int:
+        """
+        尝试获取分布式信号量
+
+        @param {str} name - 信号量名称
+        @param {str} holder_id - 持有者标识
+        @param {int} permits - 允许同时持有的数量
+        @param {float} ttl - 持有的租约时长, 单位为秒
+        @param {bool} fair - 是否公平获取, 如果是应将持有者加入等待队列, 只有排在前面的等待者可以获取
+
+        @returns {int} - 获取成功返回防护令牌, 获取失败返回0
+        """
+        return self._acquire_semaphore_script(
+            keys=self._get_semaphore_keys(name),
+            args=[holder_id, permits, int(ttl * 1000), '1' if fair else '0'], client=self._redis
+        )
+
+    def _renew_semaphore_self(self, name: str, holder_id: str, ttl: float) -> bool:
+        """
+        续约分布式信号量
+
+        @param {str} name - 信号量名称
+        @param {str} holder_id - 持有者标识
+        @param {float} ttl - 持有的租约时长, 单位为秒
+
+        @returns {bool} - 续约结果, 已不再持有返回False
+        """
+        return self._renew_semaphore_script(
+            keys=self._get_semaphore_keys(name)[0: 1], args=[holder_id, int(ttl * 1000)], client=self._redis
+        ) == 1
+
+    def _release_semaphore_self(self, name: str, holder_id: str) -> bool:
+        """
+        释放分布式信号量(同时从等待队列中移除)
+
+        @param {str} name - 信号量名称
+        @param {str} holder_id - 持有者标识
+
+        @returns {bool} - 释放结果, 未持有返回False
+        """
+        return self._release_semaphore_script(
+            keys=self._get_semaphore_keys(name), args=[holder_id], client=self._redis
+        ) == 1
+
+    def _acquire_rate_tokens_self(self, name: str, key: str, interval: int, burst: int, need: int,
+            want: int) -> tuple:
+        """
+        按GCRA算法从集群获取限流令牌
+
+        @param {str} name - 限流器名称
+        @param {str} key - 限流维度的key
+        @param {int} interval - 令牌的发放间隔, 单位为微秒
+        @param {int} burst - 允许的突发请求数
+        @param {int} need - 本次至少需要获取的令牌数
+        @param {int} want - 本次希望获取的令牌数(包含预取), 可用令牌充足时最多获取该数量
+
+        @returns {tuple} - 返回(获取到的令牌数, 需等待的时长(秒)), 可用令牌少于need时获取到的令牌数为0
+        """
+        # 以限流器及维度key作为hash tag, cluster模式下不同维度的限额分散到不同槽位
+        _ret = self._acquire_rate_tokens_script(
+            keys=['{$cluster_rate$%s$%s$%s$%s$}' % (self._namespace, self._sys_id, name, key)],
+            args=[interval, burst, need, want], client=self._redis
+        )
+        return int(_ret[0]), int(_ret[1]) / 1000000
 
     def _get_events_self(self):
         """
@@ -409,6 +707,34 @@ class RedisClusterAdapter(ClusterAdapter):
             for _item in _ret:
                 yield json.loads(_item)
 
+    def _block_get_events_self(self, timeout: float):
+        """
+        阻塞等待并获取当前服务的集群事件迭代数据(event_mode为block时使用)
+
+        @param {float} timeout - 最长的阻塞等待时间, 单位为秒
+
+        @returns {iterator} - 当前收到的事件迭代数据, 格式与_get_events_self一致, 超时没有事件返回None
+        """
+        # 通过BLPOP等待第一个事件, 事件队列在服务离线期间保留的事件(未超时)也会在重新上线后获取到
+        _ret = self._redis.blpop([self._cache_events], timeout=timeout)
+        if _ret is None:
+            return None
+
+        # 获取到事件后, 将队列中其余的事件一并取出处理
+        return self._iter_block_events(_ret[1])
+
+    def _iter_block_events(self, first_event: str):
+        """
+        阻塞获取到第一个事件后的事件迭代函数
+
+        @param {str} first_event - 阻塞获取到的第一个事件字符串
+
+        @returns {iterator} - 事件迭代数据
+        """
+        yield json.loads(first_event)
+        for _item in self._get_events_self():
+            yield _item
+
     def _clear_all_cluster(self, namespace: str, sys_id: str = None, module_id: str = None, server_id: str = None) -> bool:
         """
         清空所有集群信息(仅管理使用)
@@ -460,15 +786,76 @@ class RedisClusterAdapter(ClusterAdapter):
                 ) # 当前集群模块的集群master服务器，值为服务器的server_id
                 _clear_keys.append(_cache_master)
 
-        # 清除对应的key
+        # 从成员索引中移除
+        if len(_clear_clusters) > 0:
+            _pipe = self._redis.pipeline(transaction=False)
+            for _cluster in _clear_clusters:
+                _pipe.srem('{$group=cluster_member$}{$%s$}{$%s$}{$%s$}' % (
+                    _cluster[0], _cluster[1], _cluster[2]
+                ), _cluster[3])
+            _pipe.execute()
+
+        # 分批清除对应的key, 使用UNLINK由redis在后台释放内存
         if len(_clear_keys) == 0:
             return True
         else:
-            return self._redis.delete(*_clear_keys) > 0
+            _deleted = 0
+            for _i in range(0, len(_clear_keys), self._scan_count):
+                _deleted += self._redis.unlink(*_clear_keys[_i: _i + self._scan_count])
+
+            return _deleted > 0
 
     #############################
     # 内部函数
     #############################
+    def _scan_keys(self, pattern: str, client=None) -> list:
+        """
+        通过SCAN遍历获取匹配的key清单
+
+        @param {str} pattern - key的匹配条件
+        @param {redis.Redis} client=None - 执行SCAN的连接对象, 默认为主连接对象
+
+        @returns {list} - 匹配的key清单(已去重)
+        """
+        _client = self._redis if client is None else client
+        return list(dict.fromkeys(
+            _client.scan_iter(match=pattern, count=self._scan_count)
+        ))
+
+    def _batch_mget(self, keys: list, client=None) -> list:
+        """
+        分批通过MGET获取值
+
+        @param {list} keys - 要获取的key清单
+        @param {redis.Redis} client=None - 执行MGET的连接对象, 默认为主连接对象
+
+        @returns {list} - 与key清单顺序对应的值列表
+        """
+        _client = self._redis if client is None else client
+        _values = []
+        for _i in range(0, len(keys), self._scan_count):
+            if self._is_cluster:
+                # 集群模式下key可能在不同槽位, 按槽位拆分获取
+                _values.extend(_client.mget_nonatomic(keys[_i: _i + self._scan_count]))
+            else:
+                _values.extend(_client.mget(keys[_i: _i + self._scan_count]))
+
+        return _values
+
+    def _get_semaphore_keys(self, name: str) -> list:
+        """
+        获取分布式信号量对应的redis key清单
+        注: 以信号量自身作为hash tag, cluster模式下同一信号量的key在同一槽位, 不同信号量分散到不同槽位
+
+        @param {str} name - 信号量名称
+
+        @returns {list} - [持有者, 防护令牌计数器, 公平等待队列, 等待者到期时间]
+        """
+        _prefix = '{$cluster_lock$%s$%s$%s$}' % (self._namespace, self._sys_id, name)
+        return [
+            '%s_holders' % _prefix, '%s_fencing' % _prefix, '%s_queue' % _prefix, '%s_queue_expire' % _prefix
+        ]
+
     def _set_event(self) -> bool:
         """
         设置事件列表缓存
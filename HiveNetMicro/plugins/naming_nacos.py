@@ -15,30 +15,38 @@
 """
 import os
 from queue import Empty
-from random import random
 import sys
 import copy
+import json
+import time
+import random
 import asyncio
+import hashlib
+import threading
 import traceback
 from multiprocessing import Process, Queue
-from HiveNetCore.utils.run_tool import AsyncTools
 # 根据当前文件路径将包路径纳入, 在非安装的情况下可以引用到
 sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir, os.path.pardir, os.path.pardir)))
-from HiveNetMicro.interface.adapter.naming import NamingAdapter
+from HiveNetMicro.interface.adapter.naming import NamingAdapter, NamingInstanceSnapshot
 from HiveNetMicro.core.global_manager import GlobalManager
 import HiveNetMicro.core.nacos as nacos
 from HiveNetMicro.core.nacos.listener import SubscribeListener
 from HiveNetMicro.core.logger_manager import LoggerManager
+from HiveNetMicro.core.utils.shared_snapshot import SharedSnapshot
 
 
 class HeartbeatProcess(Process):
     """
     进行心跳同步的子进程类
+    注: 在同一个事件循环中通过共享的http会话发送所有实例的心跳, 每个实例的发送时间加入随机抖动,
+        避免多个主机同时发送; 发送失败时先按正常间隔重试, 连续失败超过重试次数后再按指数退避延长该实例的发送间隔,
+        退避间隔不超过心跳超时时间的一半, 避免实例因退避被服务端判定为不健康
     """
     def __init__(self, nacos_server_addresses: str, nacos_init_client_config: dict,
             heartbeat_interval: float, instance_deal_queue: Queue, logger_config: dict,
-            *args, **kwargs):
+            *args, jitter: float = 0.1, hb_timeout: float = 6.0, max_backoff: float = None,
+            retry_times: int = 2, concurrency: int = 10, **kwargs):
         """
         初始化类
 
@@ -52,9 +60,23 @@ class HeartbeatProcess(Process):
                 'config': '', # 日志配置
                 'log_path': '',  # 日志所在路径
             }
+        @param {float} jitter=0.1 - 心跳间隔的随机抖动比例, 例如0.1代表在间隔的±10%范围内随机
+        @param {float} hb_timeout=6.0 - 服务端的心跳超时时间, 单位为秒
+        @param {float} max_backoff=None - 发送失败时退避间隔的最大值, 单位为秒, 默认为hb_timeout的一半
+            注: 设置值超过hb_timeout的一半时按hb_timeout的一半处理
+        @param {int} retry_times=2 - 发送失败时按正常间隔重试的次数, 超过该次数才开始退避
+        @param {int} concurrency=10 - 同时发送心跳的最大请求数
         """
         super(HeartbeatProcess, self).__init__(*args, **kwargs)
         self._heartbeat_interval = heartbeat_interval
+        self._jitter = jitter
+        self._retry_times = retry_times
+        # 退避间隔不能超过心跳超时时间的一半, 否则一次退避就可能导致实例被判定为不健康
+        _backoff_limit = hb_timeout / 2
+        self._max_backoff = max(
+            _backoff_limit if max_backoff is None else min(max_backoff, _backoff_limit), heartbeat_interval
+        )
+        self._concurrency = concurrency
 
         # nacos客户端初始化参数
         self.nacos_server_addresses = nacos_server_addresses
@@ -63,10 +85,13 @@ class HeartbeatProcess(Process):
 
         # 当前已注册的服务清单, key为'group_name@@service_name', value为{'ip:port': 服务创建参数}
         self._instances = dict()
+        # 实例的心跳发送计划, key为('group_name@@service_name', 'ip:port'), value为[下次发送时间, 连续失败次数, 是否发送中]
+        self._schedules = dict()
         self._is_stop = False  # 通知心跳续约线程停止的变量
 
         # 日志配置
         self.logger_config = logger_config
+        self._logger = None
 
     def run(self):
         """
@@ -74,44 +99,107 @@ class HeartbeatProcess(Process):
         """
         # 设置日志对象
         _logger_manager = LoggerManager(self.logger_config['log_path'])
-        _logger = _logger_manager.create_logger(
+        self._logger = _logger_manager.create_logger(
             self.logger_config['logger_id'], self.logger_config['config']
         )
-        if _logger is not None:
-            nacos.client.logger = _logger
+        if self._logger is not None:
+            nacos.client.logger = self._logger
 
         # 初始化nacos客户端
         _client = nacos.NacosClient(self.nacos_server_addresses, **self.nacos_init_client_config)
-        while not self._is_stop:
-            try:
-                # 同步检查是不是要更新实例对象
-                while True:
-                    try:
-                        _op = self.instance_deal_queue.get_nowait()
-                        self.instance_deal(_op)
-                    except Empty:
-                        break
-                    except:
-                        if _logger is not None:
-                            _logger.error('HiveNetMicro-Process-Heartbeat get instance deal from queue error: %s' % traceback.format_exc())
-                        break
-
-                # 生成协程任务
-                _asyncio_gather_paras = []
-                for _name, _instances in self._instances.items():
-                    for _ip_key, _paras in _instances.items():
-                        _asyncio_gather_paras.append(
-                            _client.async_send_heartbeat(*_paras['args'], **_paras['kwargs'])
-                        )
-
-                # 并发执行协程
-                AsyncTools.sync_call(asyncio.gather, *_asyncio_gather_paras)
-
-                # 等待间隔时长
-                AsyncTools.sync_call(asyncio.sleep, self._heartbeat_interval)
-            except:
-                if _logger is not None:
-                    _logger.error('HiveNetMicro-Process-Heartbeat run error: %s' % traceback.format_exc())
+
+        # 使用常驻的事件循环处理
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+        try:
+            _loop.run_until_complete(self._heartbeat_forever(_client))
+        finally:
+            _loop.close()
+
+    async def _heartbeat_forever(self, client):
+        """
+        心跳发送的主循环
+
+        @param {nacos.NacosClient} client - nacos客户端
+        """
+        _semaphore = asyncio.Semaphore(self._concurrency)
+        # 检查实例变更队列的最大间隔
+        _max_wait = min(self._heartbeat_interval, 1.0)
+        # 使用nacos客户端传输层在当前事件循环的常驻会话
+        _session = client.transport.get_session()
+        try:
+            while not self._is_stop:
+                try:
+                    # 同步检查是不是要更新实例对象
+                    while True:
+                        try:
+                            _op = self.instance_deal_queue.get_nowait()
+                            self.instance_deal(_op)
+                        except Empty:
+                            break
+                        except:
+                            if self._logger is not None:
+                                self._logger.error('HiveNetMicro-Process-Heartbeat get instance deal from queue error: %s' % traceback.format_exc())
+                            break
+
+                    # 发送到期的心跳
+                    _now = time.monotonic()
+                    _next_time = _now + _max_wait
+                    for _name, _instances in self._instances.items():
+                        for _ip_key, _paras in _instances.items():
+                            _schedule = self._schedules.get((_name, _ip_key), None)
+                            if _schedule is None:
+                                # 新实例在一个间隔内随机分布首次发送时间
+                                _schedule = [_now + random.uniform(0, self._heartbeat_interval), 0, False]
+                                self._schedules[(_name, _ip_key)] = _schedule
+
+                            if _schedule[2]:
+                                continue
+                            if _schedule[0] <= _now:
+                                _schedule[2] = True
+                                asyncio.ensure_future(
+                                    self._send_heartbeat(client, _session, _semaphore, _schedule, _paras)
+                                )
+                            else:
+                                _next_time = min(_next_time, _schedule[0])
+
+                    await asyncio.sleep(max(_next_time - time.monotonic(), 0.01))
+                except:
+                    if self._logger is not None:
+                        self._logger.error('HiveNetMicro-Process-Heartbeat run error: %s' % traceback.format_exc())
+                    await asyncio.sleep(_max_wait)
+        finally:
+            await client.transport.close_session()
+
+    async def _send_heartbeat(self, client, session, semaphore, schedule: list, paras: dict):
+        """
+        发送单个实例的心跳, 并计算下次发送时间
+
+        @param {nacos.NacosClient} client - nacos客户端
+        @param {aiohttp.ClientSession} session - 共享的http会话
+        @param {asyncio.Semaphore} semaphore - 控制并发请求数的信号量
+        @param {list} schedule - 实例的心跳发送计划
+        @param {dict} paras - 实例的心跳参数
+        """
+        try:
+            async with semaphore:
+                await client.async_send_heartbeat(*paras['args'], session=session, **paras['kwargs'])
+            schedule[1] = 0
+            _interval = self._heartbeat_interval
+        except:
+            # 发送失败, 先按正常间隔重试, 超过重试次数后按指数退避
+            schedule[1] += 1
+            _interval = min(
+                self._heartbeat_interval * (2 ** max(schedule[1] - self._retry_times, 0)), self._max_backoff
+            )
+            if self._logger is not None:
+                self._logger.warning('HiveNetMicro-Process-Heartbeat send heartbeat [%s] error, retry after %.1f seconds: %s' % (
+                    str(paras['args']), _interval, traceback.format_exc()
+                ))
+        finally:
+            schedule[2] = False
+
+        schedule[0] = time.monotonic() + _interval * random.uniform(1 - self._jitter, 1 + self._jitter)
 
     def instance_deal(self, op: dict):
         """
@@ -130,6 +218,11 @@ class HeartbeatProcess(Process):
             # 删除
             self._instances.pop(op['key'], None)
 
+        # 清除已删除实例的心跳发送计划
+        for _key in list(self._schedules.keys()):
+            if _key[1] not in self._instances.get(_key[0], {}):
+                self._schedules.pop(_key, None)
+
 
 class NacosNamingAdapter(NamingAdapter):
     """
@@ -153,6 +246,15 @@ class NacosNamingAdapter(NamingAdapter):
             auto_create_mamespace {bool} - 命名空间不存在是否自动创建命名空间, 默认为True
             default_options {dict} - nacos默认参数值, 所支持的参数详见nacos的sdk
                 TIMEOUT {float} - 默认超时时间, 单位为秒
+                SUBSCRIBE_CONCURRENCY {int} - 服务订阅同时执行的查询请求数, 默认为16
+                SUBSCRIBE_UDP_PUSH {bool} - 服务订阅是否接收nacos服务端的UDP变更推送, 默认为False
+                    注: 需要nacos服务端可访问到本机的UDP端口, 启用后仍保留定时查询作为兜底
+                SUBSCRIBE_UDP_PORT {int} - 接收UDP推送的端口, 默认为0(随机端口)
+                SUBSCRIBE_CLIENT_IP {str} - 接收UDP推送的本机地址, 默认自动获取与nacos服务端通讯的地址
+                TRANSPORT_POOL_SIZE {int} - 异步请求每个事件循环的连接池大小, 默认为10
+                TRANSPORT_EJECT_FAILURES {int} - 服务端连续失败多少次后暂时剔除, 默认为3
+                TRANSPORT_EJECT_TIME {float} - 服务端剔除的基础时长(连续失败时翻倍), 单位为秒, 默认为10
+                TRANSPORT_RETRY_RATIO {float} - 重试预算, 每个请求可增加的重试次数, 默认为0.2
                 ...
             default_instance_options {dict} - nacos默认的注册实例的参数, 所支持的参数见nacos的sdk
                 weight {float} - 权重, 默认为1.0, 权重越大, 分配给该实例的流量越大
@@ -163,6 +265,28 @@ class NacosNamingAdapter(NamingAdapter):
                 interval {float} - 心跳续约的时间间隔, 单位为秒, 默认为3.0
                 hb_timeout {float} - 设置心跳超时时间(超过这个时间收不到心跳则服务设置为不健康), 单位为秒, 默认为6.0
                 ip_timeout {float} - 设置实例删除的超时时间(超过这个时间收不到心跳则实例下线), 单位为秒, 默认为9.0
+                jitter {float} - 心跳间隔的随机抖动比例, 避免多个主机同时发送心跳, 默认为0.1
+                max_backoff {float} - 心跳发送失败时退避间隔的最大值, 单位为秒, 默认为hb_timeout的一半
+                    注: 设置值超过hb_timeout的一半时按hb_timeout的一半处理
+                retry_times {int} - 心跳发送失败时按正常间隔重试的次数, 超过该次数才开始退避, 默认为2
+                concurrency {int} - 同时发送心跳的最大请求数, 默认为10
+            locality {dict} - 当前应用的位置属性, 用于就近选择实例, 例如{'zone': 'az1'}
+                注: 注册实例时会将位置属性(cluster_name除外)添加到实例的metadata中;
+                    cluster_name默认为当前应用所在的集群名
+            shared_cache {dict} - 多进程共享实例缓存参数
+                enable {bool} - 是否启用, 默认为False
+                    注: 启用后只有主进程向nacos订阅服务, 并将实例快照发布到共享内存, 工作进程直接从共享内存读取
+                name {str} - 共享内存名称, 默认按运行数据目录和命名空间自动生成
+                size {int} - 共享内存大小, 单位为字节, 默认为1048576
+                publish_delay {float} - 实例清单变更后延迟发布的时长(合并多次变更), 单位为秒, 默认为0.1
+            disk_cache {dict} - 实例清单本地文件缓存参数
+                注: 订阅的实例清单保存到运行数据目录, 启动时优先使用文件中的实例清单, 再异步与注册中心同步,
+                    以加快启动速度, 并在注册中心不可用时仍可调用远程服务
+                enable {bool} - 是否启用, 默认为False(没有运行数据目录且未指定path时不启用)
+                path {str} - 缓存文件路径, 默认按命名空间在运行数据目录下生成
+                max_age {float} - 缓存文件的最大有效时长, 超过该时长的缓存文件不使用, 单位为秒, 默认为3600, 设置为0代表不限制
+                    注: 不限制时可能使用长时间停机前保存的已失效实例清单, 请谨慎设置
+                save_delay {float} - 实例清单变更后延迟保存的时长(合并多次变更), 单位为秒, 默认为1.0
         @param {str} namespace=None - 指定当前连接要设置的命名空间
         @param {str} cluster_name=None - 当前应用所在的集群名
         @param {str} logger_id=None - 日志对象标识, 可以选择application.yaml配置中的其中一个日志对象
@@ -194,6 +318,22 @@ class NacosNamingAdapter(NamingAdapter):
         if self.heartbeat_options is None:
             self.heartbeat_options = {}
 
+        # 当前应用的位置属性
+        self.locality_values = self.init_config.pop('locality', None)
+        if self.locality_values is None:
+            self.locality_values = {}
+        self.locality_values.setdefault('cluster_name', cluster_name)
+
+        # 多进程共享实例缓存参数
+        self.shared_cache_options = self.init_config.pop('shared_cache', None)
+        if self.shared_cache_options is None:
+            self.shared_cache_options = {}
+
+        # 实例清单本地文件缓存参数
+        self.disk_cache_options = self.init_config.pop('disk_cache', None)
+        if self.disk_cache_options is None:
+            self.disk_cache_options = {}
+
         # 健康检测模式
         self.heartbeat_mode = self.heartbeat_options.get('check_type', 'server')
 
@@ -241,6 +381,46 @@ class NacosNamingAdapter(NamingAdapter):
         # 远程实例订阅本地缓存
         # 格式为 { 'group_name@@service_name': {'instanceId': {...}, ...}}
         self._subscribe_cache = dict()
+        # 订阅缓存的更新锁, 串行化订阅监听线程和实例清单同步线程对缓存及快照的更新
+        self._subscribe_lock = threading.RLock()
+        # 订阅实例的快照, 在订阅信息更新时重建并整体替换, 格式为 { 'group_name@@service_name': NamingInstanceSnapshot }
+        self._subscribe_snapshots = dict()
+
+        # 多进程共享实例缓存, 主进程负责订阅和发布实例快照, 工作进程只读取共享内存中的快照
+        self._shared_snapshot = None
+        self._is_shared_reader = False
+        self._shared_version = None  # 工作进程当前已加载的快照版本
+        self._shared_snapshots = dict()  # 工作进程从共享内存加载的快照, 格式与_subscribe_snapshots一致
+        self._shared_publish_timer = None
+        self._shared_publish_lock = threading.Lock()
+        if self.shared_cache_options.get('enable', False):
+            _shared_name = self.shared_cache_options.get('name', None)
+            if _shared_name is None:
+                _shared_name = 'hnm_naming_%s' % hashlib.md5(('%s:%s' % (
+                    self.global_config.get('running_data_path', ''), namespace
+                )).encode('utf-8')).hexdigest()[0:16]
+            self._is_shared_reader = not self.global_config.get('is_main_process', True)
+            self._shared_snapshot = SharedSnapshot(
+                _shared_name, size=self.shared_cache_options.get('size', 1048576),
+                is_writer=not self._is_shared_reader
+            )
+
+        # 实例清单本地文件缓存, 启动时加载, 订阅服务时作为初始实例清单使用
+        # 格式为 { 'group_name@@service_name': [实例信息, ...] }
+        self._disk_snapshots = dict()
+        self._disk_cache_file = None
+        self._disk_save_timer = None
+        self._disk_save_lock = threading.Lock()
+        if self.disk_cache_options.get('enable', False) and not self._is_shared_reader:
+            self._disk_cache_file = self.disk_cache_options.get('path', None)
+            if self._disk_cache_file is None and self.global_config.get('running_data_path', None):
+                self._disk_cache_file = os.path.join(
+                    self.global_config['running_data_path'], 'naming_nacos_%s.json' % hashlib.md5(
+                        str(namespace).encode('utf-8')
+                    ).hexdigest()[0:16]
+                )
+            if self._disk_cache_file is not None:
+                self._disk_snapshots = self._load_disk_snapshots()
 
         # 心跳管理
         # 当前已注册的服务清单, key为'group_name@@service_name', value为{'ip:port': 服务创建参数}
@@ -262,6 +442,11 @@ class NacosNamingAdapter(NamingAdapter):
             self._heartbeat_process = HeartbeatProcess(
                 _server_addresses, _init_client_config, self._heartbeat_interval,
                 self._instance_deal_queue, _logger_config,
+                jitter=self.heartbeat_options.get('jitter', 0.1),
+                hb_timeout=self.heartbeat_options.get('hb_timeout', 6.0),
+                max_backoff=self.heartbeat_options.get('max_backoff', None),
+                retry_times=self.heartbeat_options.get('retry_times', 2),
+                concurrency=self.heartbeat_options.get('concurrency', 10),
                 name='HiveNetMicro-Process-Heartbeat'
             )
             self._heartbeat_process.daemon = True
@@ -298,6 +483,10 @@ class NacosNamingAdapter(NamingAdapter):
             _metadata['preserved.heart.beat.interval'] = self.heartbeat_options['HEART_BEAT_INTERVAL']
             _metadata['preserved.heart.beat.timeout'] = self.heartbeat_options['HEART_BEAT_TIMEOUT']
             _metadata['preserved.ip.delete.timeout'] = self.heartbeat_options['IP_DELETE_TIMEOUT']
+            # 添加位置属性
+            for _key, _val in self.locality_values.items():
+                if _key != 'cluster_name' and _val is not None:
+                    _metadata.setdefault(_key, _val)
 
             _kwargs = {
                 'group_name': _group_name,
@@ -427,44 +616,23 @@ class NacosNamingAdapter(NamingAdapter):
                 ...
             ]
         """
-        # 先尝试从本地缓存获取
-        _group_name = group_name if group_name is not None else 'DEFAULT_GROUP'
-        _resp = self._subscribe_cache.get('%s@@%s' % (_group_name, service_name), None)
-        if _resp is not None:
-            # 本地缓存获取
-            _resp = list(_resp.values())
-
-        if _resp is None or len(_resp) == 0:
-            # 本地查找不到服务信息, 需要从服务器端获取
-            _server_resp = await self.client.async_list_naming_instance(
-                service_name, group_name=_group_name, healthy_only=healthy_only
-            )
-            _resp = _server_resp.get('hosts', [])
-
-        _list = []
-        for _host in _resp:
-            if healthy_only and not _host.get('healthy', False):
-                # 只获取健康的, 非健康的实例忽略掉
-                continue
-
-            _list.append({
-                'instance_id': _host.get('instanceId'),
-                'ip': _host.get('ip'),
-                'port': _host.get('port'),
-                'metadata': _host.get('metadata'),
-                'healthy': _host.get('healthy'),
-                'weight': _host.get('weight')
-            })
+        _snapshot = await self._get_snapshot(service_name, group_name=group_name, healthy_only=healthy_only)
+        return _snapshot.list(healthy_only=healthy_only)
 
-        return _list
-
-    async def get_instance(self, service_name: str, group_name: str = None, healthy_only: bool = True) -> dict:
+    async def get_instance(self, service_name: str, group_name: str = None, healthy_only: bool = True,
+            locality: dict = None) -> dict:
         """
         获取一个可用的实例
 
         @param {str} service_name - 服务名
         @param {str} group_name=None - 所属分组, 如不传则默认为'DEFAULT_GROUP'
         @param {bool} healthy_only=True - 是否只列出健康的实例
+        @param {dict} locality=None - 就近选择实例的参数, 不传代表不考虑实例位置
+            enable {bool} - 是否启用, 默认为True
+            levels {list} - 位置属性清单, 按优先顺序排列, 默认为['cluster_name', 'zone']
+                注: 本地的位置属性值通过初始化参数的locality设置
+            min_healthy {int} - 本地健康实例数低于该值时使用下一级位置的实例, 默认为1
+            min_healthy_ratio {float} - 本地健康实例比例低于该值时使用下一级位置的实例, 默认为0.0
 
         @returns {dict} - 实例信息, 如果找不到返回None, 实例信息格式如下
             {
@@ -479,47 +647,15 @@ class NacosNamingAdapter(NamingAdapter):
                 ...
             }
         """
-        _group_name = group_name if group_name is not None else 'DEFAULT_GROUP'
-        _instance_list = await self.list_instance(service_name, group_name=_group_name, healthy_only=healthy_only)
-        _len = len(_instance_list)
-        if _len == 0:
-            return None
-        elif _len == 1:
-            return _instance_list[0]
-
-        if healthy_only:
-            _healthy_list = _instance_list
-            _unhealthy_list = []
-        else:
-            # 区分健康列表和非健康列表
-            _healthy_list = []
-            _unhealthy_list = []
-            for _instance in _instance_list:
-                if _instance['healthy']:
-                    _healthy_list.append(_instance)
-                else:
-                    _unhealthy_list.append(_instance)
-
-        _deal_list = _healthy_list
-        while True:
-            if len(_deal_list) > 0:
-                # 通过负载均衡权重算法选择其中一个实例返回
-                _total_weight = 0.0  # 权重加总数据
-                _match_areas = []  # 匹配区间数组
-                for _info in _instance_list:
-                    _match_areas.append(_total_weight + _info['weight'])
-                    _total_weight += _info['weight']
-                _random = random() * _total_weight  # 用来匹配的随机数
-                for _match_index in range(_len):
-                    if _random < _match_areas[_match_index]:
-                        return _instance_list[_match_index]
-
-                # 可能算法存在问题匹配不到的情况, 返回第一个
-                return _instance_list[0]
-            else:
-                # 健康列表没有, 从不健康列表获取
-                _deal_list = _unhealthy_list
-                continue
+        _snapshot = await self._get_snapshot(service_name, group_name=group_name, healthy_only=healthy_only)
+        if locality is None or not locality.get('enable', True):
+            return _snapshot.choose(healthy_only=healthy_only)
+
+        return _snapshot.choose_local(
+            [(_key, self.locality_values.get(_key, None)) for _key in locality.get('levels', ['cluster_name', 'zone'])],
+            healthy_only=healthy_only, min_healthy=locality.get('min_healthy', 1),
+            min_healthy_ratio=locality.get('min_healthy_ratio', 0.0)
+        )
 
     def add_subscribe(self, service_name: str, group_name: str = None, interval: float = 5):
         """
@@ -530,11 +666,16 @@ class NacosNamingAdapter(NamingAdapter):
         @param {str} group_name=None - 所属分组, 如不传则默认为'DEFAULT_GROUP'
         @param {float} interval=5 - 服务信息变更检查时间间隔, 单位为秒
         """
+        if self._is_shared_reader:
+            # 工作进程使用主进程共享的实例快照, 无需订阅
+            return
+
         _group_name = group_name if group_name is not None else 'DEFAULT_GROUP'
         # 创建缓存字典值
         _cached_key = '%s@@%s' % (_group_name, service_name)
-        if _cached_key not in self._subscribe_cache.keys():
-            self._subscribe_cache[_cached_key] = {}
+        with self._subscribe_lock:
+            if _cached_key not in self._subscribe_cache.keys():
+                self._subscribe_cache[_cached_key] = {}
 
         # 启动监听线程
         _listener = SubscribeListener(
@@ -545,19 +686,28 @@ class NacosNamingAdapter(NamingAdapter):
             group_name=_group_name, healthy_only=False
         )
 
+        _disk_instances = self._disk_snapshots.pop(_cached_key, None)
+        if _disk_instances:
+            # 先使用本地文件缓存的实例清单, 再异步从服务器获取并覆盖
+            with self._subscribe_lock:
+                for _info in _disk_instances:
+                    self._subscribe_cache[_cached_key].setdefault(_info['instance_id'], _info)
+                self._update_snapshot(_cached_key)
+            _thread = threading.Thread(
+                target=self._reconcile_subscribe, args=(service_name, _group_name, interval),
+                name='HiveNetMicro-Thread-NamingReconcile', daemon=True
+            )
+            _thread.start()
+            return
+
         # 从服务器获取当前服务清单放入缓存(线程只会监听变化)
         _server_resp = self.client.list_naming_instance(
             service_name, group_name=_group_name, healthy_only=False
         )
-        for _host in _server_resp.get('hosts', []):
-            self._subscribe_cache[_cached_key][_host['instanceId']] = {
-                'instanceId': _host['instanceId'],
-                'ip': _host['ip'],
-                'port': _host['port'],
-                'metadata': _host['metadata'],
-                'healthy': _host['healthy'],
-                'weight': _host['weight']
-            }
+        with self._subscribe_lock:
+            for _host in _server_resp.get('hosts', []):
+                self._subscribe_cache[_cached_key][_host['instanceId']] = self._format_host(_host)
+            self._update_snapshot(_cached_key)
 
     def remove_subscribe(self, service_name: str, group_name: str = None):
         """
@@ -566,12 +716,19 @@ class NacosNamingAdapter(NamingAdapter):
         @param {str} service_name - 服务名
         @param {str} group_name=None - 所属分组, 如不传则默认为'DEFAULT_GROUP'
         """
+        if self._is_shared_reader:
+            return
+
         _group_name = group_name if group_name is not None else 'DEFAULT_GROUP'
         self.client.unsubscribe(
             service_name, listener_name='subscribe-%s@@%s' % (_group_name, service_name)
         )
         # 从缓存中清除
-        self._subscribe_cache.pop('%s@@%s' % (_group_name, service_name), None)
+        with self._subscribe_lock:
+            self._subscribe_snapshots.pop('%s@@%s' % (_group_name, service_name), None)
+            self._subscribe_cache.pop('%s@@%s' % (_group_name, service_name), None)
+        self._delay_publish_shared_snapshots()
+        self._delay_save_disk_snapshots()
 
     #############################
     # 内部函数
@@ -584,21 +741,235 @@ class NacosNamingAdapter(NamingAdapter):
         _event = args[0]
         _instance: nacos.client.SubscribedLocalInstance = args[1]
         _cached_key = _instance.instance['serviceName']
-        if _event in ('ADDED', 'MODIFIED'):
-            # 新增或修改
-            if _cached_key not in self._subscribe_cache.keys():
-                self._subscribe_cache[_cached_key] = {}
+        with self._subscribe_lock:
+            if _event in ('ADDED', 'MODIFIED'):
+                # 新增或修改
+                if _cached_key not in self._subscribe_cache.keys():
+                    self._subscribe_cache[_cached_key] = {}
+
+                # 添加需要缓存的字典
+                _host = dict(_instance.instance)
+                _host['instanceId'] = _instance.instance_id
+                self._subscribe_cache[_cached_key][_instance.instance_id] = self._format_host(_host)
+            else:
+                # 删除
+                if _cached_key not in self._subscribe_cache.keys():
+                    return
 
-            # 添加需要缓存的字典
-            self._subscribe_cache[_cached_key][_instance.instance_id] = {
-                'instanceId': _instance.instance_id,
-                'ip': _instance.instance.get('ip', None),
-                'port': _instance.instance.get('port', None),
-                'metadata': _instance.instance.get('metadata', None),
-                'healthy': _instance.instance.get('healthy', True),
-                'weight': _instance.instance.get('weight', 1)
-            }
-        else:
-            # 删除
-            if _cached_key in self._subscribe_cache.keys():
                 self._subscribe_cache[_cached_key].pop(_instance.instance_id, None)
+
+            self._update_snapshot(_cached_key)
+
+    def _update_snapshot(self, cached_key: str):
+        """
+        按订阅缓存重建服务实例快照并整体替换
+        注: 调用方需持有订阅缓存的更新锁
+
+        @param {str} cached_key - 缓存标识, 格式为'group_name@@service_name'
+        """
+        self._subscribe_snapshots[cached_key] = NamingInstanceSnapshot(
+            list(self._subscribe_cache[cached_key].values())
+        )
+        self._delay_publish_shared_snapshots()
+        self._delay_save_disk_snapshots()
+
+    def _reconcile_subscribe(self, service_name: str, group_name: str, interval: float):
+        """
+        从服务器获取服务实例清单并覆盖本地文件缓存加载的实例清单(在独立线程中执行)
+        注: 服务器不可用时按订阅间隔重试, 直到获取成功或取消订阅
+
+        @param {str} service_name - 服务名
+        @param {str} group_name - 所属分组
+        @param {float} interval - 重试间隔, 单位为秒
+        """
+        _cached_key = '%s@@%s' % (group_name, service_name)
+        while _cached_key in self._subscribe_cache.keys():
+            try:
+                _server_resp = self.client.list_naming_instance(
+                    service_name, group_name=group_name, healthy_only=False
+                )
+            except:
+                self.logger.warning('reconcile naming instances [%s] error, retry after %s seconds: %s' % (
+                    _cached_key, str(interval), traceback.format_exc()
+                ))
+                time.sleep(interval)
+                continue
+
+            with self._subscribe_lock:
+                if _cached_key not in self._subscribe_cache.keys():
+                    # 已取消订阅
+                    return
+
+                self._subscribe_cache[_cached_key] = {
+                    _host['instanceId']: self._format_host(_host) for _host in _server_resp.get('hosts', [])
+                }
+                self._update_snapshot(_cached_key)
+            return
+
+    def _load_disk_snapshots(self) -> dict:
+        """
+        从本地缓存文件加载实例清单
+
+        @returns {dict} - 实例清单字典, 格式为 { 'group_name@@service_name': [实例信息, ...] }
+        """
+        if not os.path.exists(self._disk_cache_file):
+            return {}
+
+        try:
+            with open(self._disk_cache_file, 'r', encoding='utf-8') as _f:
+                _data = json.load(_f)
+
+            _max_age = self.disk_cache_options.get('max_age', 3600)
+            if _max_age > 0 and time.time() - _data.get('time', 0) > _max_age:
+                self.logger.info('naming disk cache [%s] expired, ignored' % self._disk_cache_file)
+                return {}
+
+            return _data.get('services', {})
+        except:
+            self.logger.warning('load naming disk cache [%s] error: %s' % (
+                self._disk_cache_file, traceback.format_exc()
+            ))
+            return {}
+
+    def _delay_save_disk_snapshots(self):
+        """
+        延迟保存实例清单到本地缓存文件(只有主进程保存)
+        注: 延迟期间的多次变更合并为一次保存
+        """
+        if self._disk_cache_file is None or not self.global_config.get('is_main_process', True):
+            return
+
+        with self._disk_save_lock:
+            if self._disk_save_timer is not None:
+                return
+
+            self._disk_save_timer = threading.Timer(
+                self.disk_cache_options.get('save_delay', 1.0), self._save_disk_snapshots
+            )
+            self._disk_save_timer.daemon = True
+            self._disk_save_timer.start()
+
+    def _save_disk_snapshots(self):
+        """
+        保存实例清单到本地缓存文件
+        注: 先写入临时文件再替换, 保证缓存文件的完整性
+        """
+        with self._disk_save_lock:
+            self._disk_save_timer = None
+
+        _services = {
+            _key: list(_snapshot.instances) for _key, _snapshot in list(self._subscribe_snapshots.items())
+        }
+        # 尚未同步的文件缓存实例清单保留
+        for _key, _instances in list(self._disk_snapshots.items()):
+            _services.setdefault(_key, _instances)
+
+        _temp_file = '%s.%d.tmp' % (self._disk_cache_file, os.getpid())
+        try:
+            with open(_temp_file, 'w', encoding='utf-8') as _f:
+                json.dump(
+                    {'time': time.time(), 'services': _services}, _f,
+                    ensure_ascii=False, separators=(',', ':')
+                )
+            os.replace(_temp_file, self._disk_cache_file)
+        except:
+            self.logger.error('save naming disk cache [%s] error: %s' % (
+                self._disk_cache_file, traceback.format_exc()
+            ))
+
+    def _delay_publish_shared_snapshots(self):
+        """
+        延迟发布实例快照到共享内存(主进程)
+        注: 延迟期间的多次变更合并为一次发布, 避免每个实例变更都序列化全部订阅服务的快照
+        """
+        if self._shared_snapshot is None:
+            return
+
+        with self._shared_publish_lock:
+            if self._shared_publish_timer is not None:
+                return
+
+            self._shared_publish_timer = threading.Timer(
+                self.shared_cache_options.get('publish_delay', 0.1), self._publish_shared_snapshots
+            )
+            self._shared_publish_timer.daemon = True
+            self._shared_publish_timer.start()
+
+    def _publish_shared_snapshots(self):
+        """
+        将所有订阅服务的实例快照发布到共享内存(主进程)
+        """
+        with self._shared_publish_lock:
+            self._shared_publish_timer = None
+
+        try:
+            self._shared_snapshot.publish({
+                _key: list(_snapshot.instances) for _key, _snapshot in list(self._subscribe_snapshots.items())
+            })
+        except:
+            self.logger.error('publish shared naming snapshot error: %s' % traceback.format_exc())
+
+    def _get_shared_snapshots(self) -> dict:
+        """
+        获取主进程共享的实例快照(工作进程)
+        注: 只有共享内存的版本号变化时才重新加载, 读取过程无需加锁
+
+        @returns {dict} - 实例快照字典, 格式为 { 'group_name@@service_name': NamingInstanceSnapshot }
+        """
+        _version = self._shared_snapshot.version
+        if _version is not None and _version != self._shared_version:
+            _ret = self._shared_snapshot.read()
+            if _ret is not None:
+                self._shared_snapshots = {
+                    _key: NamingInstanceSnapshot(_val) for _key, _val in _ret[1].items()
+                }
+                self._shared_version = _ret[0]
+
+        return self._shared_snapshots
+
+    async def _get_snapshot(self, service_name: str, group_name: str = None,
+            healthy_only: bool = True) -> NamingInstanceSnapshot:
+        """
+        获取服务实例快照, 优先从订阅的本地快照获取
+
+        @param {str} service_name - 服务名
+        @param {str} group_name=None - 所属分组, 如不传则默认为'DEFAULT_GROUP'
+        @param {bool} healthy_only=True - 从服务器端获取时是否只获取健康的实例
+
+        @returns {NamingInstanceSnapshot} - 服务实例快照
+            注: 启用多进程共享实例缓存时, 工作进程从主进程共享的快照获取
+        """
+        _group_name = group_name if group_name is not None else 'DEFAULT_GROUP'
+        _cached_key = '%s@@%s' % (_group_name, service_name)
+        if self._is_shared_reader:
+            _snapshot = self._get_shared_snapshots().get(_cached_key, None)
+        else:
+            _snapshot = self._subscribe_snapshots.get(_cached_key, None)
+        if _snapshot is None or len(_snapshot.instances) == 0:
+            # 本地查找不到服务信息, 需要从服务器端获取
+            _server_resp = await self.client.async_list_naming_instance(
+                service_name, group_name=_group_name, healthy_only=healthy_only
+            )
+            _snapshot = NamingInstanceSnapshot([
+                self._format_host(_host) for _host in _server_resp.get('hosts', [])
+            ])
+
+        return _snapshot
+
+    def _format_host(self, host: dict) -> dict:
+        """
+        将nacos的实例信息转换为标准实例信息
+
+        @param {dict} host - nacos的实例信息
+
+        @returns {dict} - 标准实例信息
+        """
+        return {
+            'instance_id': host.get('instanceId', None),
+            'ip': host.get('ip', None),
+            'port': host.get('port', None),
+            'metadata': host.get('metadata', None),
+            'healthy': host.get('healthy', True),
+            'weight': host.get('weight', 1.0),
+            'cluster_name': host.get('clusterName', None)
+        }
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""
+测试内存缓存服务
+
+@module test_cache_memory
+@file test_cache_memory.py
+"""
+import os
+import sys
+import time
+import asyncio
+import unittest
+from HiveNetCore.utils.test_tool import TestTool
+# 根据当前文件路径将包路径纳入, 在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+from HiveNetMicro.plugins.cache_memory import MemoryCacheAdapter
+
+
+#############################
+# 缓存获取函数
+#############################
+def load_handler_dict(cache_config, dc):
+    return dc
+
+
+class TestMemoryCacheAdapter(unittest.TestCase):
+    """
+    测试内存缓存服务
+    """
+
+    def test_common(self):
+        # 测试通用缓存操作
+        _adapter = MemoryCacheAdapter()
+
+        _tips = '测试缓存改名'
+        _group = 'common'
+        _ret = _adapter.hset('d1', 'a', 'val_a', group=_group)
+        self.assertTrue(_ret, '%s, 设置字典值失败: %s' % (_tips, str(_ret)))
+        _ret = _adapter.rename('d1', 'd2', group=_group)
+        self.assertTrue(_ret, '%s, 改名操作失败: %s' % (_tips, str(_ret)))
+        _ret = _adapter.hget('d1', 'a', group=_group)
+        self.assertTrue(_ret is None, '%s, 获取旧缓存字典值失败: %s' % (_tips, str(_ret)))
+        _ret = _adapter.hget('d2', 'a', group=_group)
+        self.assertTrue(_ret == 'val_a', '%s, 检查改名后获取失败: %s' % (_tips, str(_ret)))
+
+        _tips = '测试查找缓存key'
+        _group = 'find'
+        _ret = _adapter.mset({'abc': 1, 'abcd': 2, 'abcdef': 3, 'abcefg': 4, 'add': 5}, group=_group)
+        self.assertTrue(_ret, '%s, 批量添加缓存: %s' % (_tips, str(_ret)))
+        _expect = ['abc', 'abcd', 'abcdef', 'abcefg']
+        _ret = _adapter.keys('abc*', group=_group)
+        self.assertTrue(
+            TestTool.cmp_list(_ret, _expect, sorted=True), '%s, keys查询失败: %s' % (_tips, str(_ret))
+        )
+        _ret = _adapter.keys('a[^b]?', group=_group)
+        self.assertTrue(
+            TestTool.cmp_list(_ret, ['add']), '%s, keys通配符查询失败: %s' % (_tips, str(_ret))
+        )
+        _ret = _adapter.get_group(_group)
+        self.assertTrue(len(_ret) == 5, '%s, 获取分组失败: %s' % (_tips, str(_ret)))
+        _ret = _adapter.delete_group(_group)
+        self.assertTrue(_ret and _adapter.get_group(_group) is None, '%s, 删除分组失败: %s' % (_tips, str(_ret)))
+
+    def test_single_value(self):
+        # 测试单值缓存及过期处理
+        _adapter = MemoryCacheAdapter()
+
+        _tips = '测试设置和获取值'
+        _value = {'a': [1, 2], 'b': 'str'}
+        _ret = _adapter.set('s1', _value)
+        self.assertTrue(_ret, '%s, 设置值失败: %s' % (_tips, str(_ret)))
+        _value['a'].append(3)
+        _ret = _adapter.get('s1')
+        self.assertTrue(
+            TestTool.cmp_dict(_ret, {'a': [1, 2], 'b': 'str'}), '%s, 获取值失败: %s' % (_tips, str(_ret))
+        )
+        _ret = _adapter.set('s1', 'new', nx=True)
+        self.assertTrue(not _ret, '%s, nx设置失败: %s' % (_tips, str(_ret)))
+
+        _tips = '测试过期'
+        _adapter.set('s2', 'val', ex=0.5)
+        _adapter.mset({'m1': 1, 'm2': 2}, ex=0.5)
+        _ret = _adapter.mget(['s2', 'm1', 'm2', 'm3'])
+        self.assertTrue(
+            TestTool.cmp_list(_ret, ['val', 1, 2, None]), '%s, 获取值失败: %s' % (_tips, str(_ret))
+        )
+        _ret = _adapter.set_expire('m2', None)
+        self.assertTrue(_ret, '%s, 取消过期失败: %s' % (_tips, str(_ret)))
+        time.sleep(0.6)
+        _ret = _adapter.mget(['s2', 'm1', 'm2'])
+        self.assertTrue(
+            TestTool.cmp_list(_ret, [None, None, 2]), '%s, 过期后获取值失败: %s' % (_tips, str(_ret))
+        )
+
+        _tips = '测试计数器'
+        _ret = _adapter.incr_counter('c1', amount=3)
+        self.assertTrue(_ret == 3, '%s, 增加计数失败: %s' % (_tips, str(_ret)))
+        _ret = _adapter.decr_counter('c1')
+        self.assertTrue(_ret == 2, '%s, 减少计数失败: %s' % (_tips, str(_ret)))
+        _ret = _adapter.get_counter('c2', initial=10)
+        self.assertTrue(_ret == 10, '%s, 获取计数失败: %s' % (_tips, str(_ret)))
+
+    def test_list_dict(self):
+        # 测试列表和字典缓存
+        _adapter = MemoryCacheAdapter()
+
+        _tips = '测试列表'
+        _adapter.set_list('l1', [1, 2, 3])
+        _adapter.lpush('l1', ['a', 'b'])
+        _adapter.rpush('l1', [{'c': 1}])
+        _ret = _adapter.list_range('l1')
+        self.assertTrue(
+            TestTool.cmp_list(_ret, ['b', 'a', 1, 2, 3, {'c': 1}]), '%s, 获取列表失败: %s' % (_tips, str(_ret))
+        )
+        _ret = _adapter.list_range('l1', 1, -2)
+        self.assertTrue(
+            TestTool.cmp_list(_ret, ['a', 1, 2, 3]), '%s, 获取列表范围失败: %s' % (_tips, str(_ret))
+        )
+        _ret = _adapter.lpop('l1', count=2)
+        self.assertTrue(TestTool.cmp_list(_ret, ['b', 'a']), '%s, lpop失败: %s' % (_tips, str(_ret)))
+        _ret = _adapter.list_remove('l1', 2)
+        self.assertTrue(_ret == 1, '%s, 删除值失败: %s' % (_tips, str(_ret)))
+        _ret = _adapter.rpop('l1', count=5)
+        self.assertTrue(
+            TestTool.cmp_list(_ret, [{'c': 1}, 3, 1]), '%s, rpop失败: %s' % (_tips, str(_ret))
+        )
+        _ret = _adapter.exists('l1')
+        self.assertTrue(not _ret, '%s, 空列表应删除: %s' % (_tips, str(_ret)))
+
+        _tips = '测试字典'
+        _adapter.hmset('d1', {'a': 1, 'b': [1, 2]}, group='dict')
+        _ret = _adapter.hmget('d1', ['a', 'c'], group='dict')
+        self.assertTrue(
+            TestTool.cmp_dict(_ret, {'a': 1, 'c': None}), '%s, hmget失败: %s' % (_tips, str(_ret))
+        )
+        _adapter.hdel('d1', ['a'], group='dict')
+        _ret = _adapter.hgetall('d1', group='dict')
+        self.assertTrue(
+            TestTool.cmp_dict(_ret, {'b': [1, 2]}), '%s, hgetall失败: %s' % (_tips, str(_ret))
+        )
+
+        _tips = '测试类型错误'
+        try:
+            _adapter.get('d1', group='dict')
+            _ret = False
+        except TypeError:
+            _ret = True
+        self.assertTrue(_ret, '%s, 获取非基础类型值应抛出异常' % _tips)
+
+    def test_pipeline_auto_cache(self):
+        # 测试管道及自动缓存
+        _adapter = MemoryCacheAdapter()
+
+        _tips = '测试管道'
+        with _adapter.pipeline(transaction=True) as _pipe:
+            _pipe.set('p1', 10, group='pipeline')
+            _pipe.get('p1', group='pipeline')
+            _pipe.incr_counter('pc', amount=3, group='pipeline')
+        _ret = _pipe.results
+        self.assertTrue(
+            TestTool.cmp_list(_ret, [True, 10, 3]), '%s, 管道执行结果失败: %s' % (_tips, str(_ret))
+        )
+
+        _tips = '测试自动缓存'
+        _adapter.set_auto_cache(
+            'test_dict', load_handler_dict, group='test', cache_type='dict', load_args=[{'a': 1}], ex=10
+        )
+        _ret = _adapter.hgetall_auto_cache('test_dict', group='test')
+        self.assertTrue(
+            TestTool.cmp_dict(_ret, {'a': 1}), '%s, 获取自动缓存失败: %s' % (_tips, str(_ret))
+        )
+
+    def test_cached(self):
+        # 测试函数结果缓存修饰符
+        _adapter = MemoryCacheAdapter()
+        _calls = []
+
+        @_adapter.cached(key_paras=['json:$.id', 'head:user'], group='cached', ex=10, negative_ex=10)
+        def query(request):
+            _calls.append(request['msg']['id'])
+            if request['msg']['id'] == 0:
+                return None
+            return ('ok', request['msg']['id'])
+
+        @_adapter.cached(key_prefix='async_query', group='cached')
+        async def async_query(a, b=1):
+            _calls.append(a)
+            return {'sum': a + b}
+
+        _tips = '测试同步函数'
+        _request = {'network': {}, 'headers': {'user': 'u1'}, 'msg': {'id': 1}}
+        _ret = [query(_request), query(_request)]
+        self.assertTrue(
+            _ret[0] == ('ok', 1) and _ret[1] == ('ok', 1) and len(_calls) == 1,
+            '%s, 缓存结果失败: %s, %s' % (_tips, str(_ret), str(_calls))
+        )
+        _ret = _adapter.keys('*', group='cached')
+        self.assertTrue(
+            len(_ret) == 1 and _ret[0].endswith('query:1:u1'),
+            '%s, 缓存key失败: %s' % (_tips, str(_ret))
+        )
+
+        _tips = '测试负缓存'
+        _request = {'network': {}, 'headers': {'user': 'u1'}, 'msg': {'id': 0}}
+        _ret = [query(_request), query(_request)]
+        self.assertTrue(
+            _ret == [None, None] and len(_calls) == 2, '%s, 缓存None失败: %s' % (_tips, str(_calls))
+        )
+
+        _tips = '测试异步函数'
+        _ret = asyncio.run(async_query(1, b=2))
+        _ret = asyncio.run(async_query(1, b=2))
+        self.assertTrue(
+            TestTool.cmp_dict(_ret, {'sum': 3}) and len(_calls) == 3, '%s, 缓存结果失败: %s' % (_tips, str(_calls))
+        )
+        asyncio.run(async_query(2))
+        self.assertTrue(len(_calls) == 4, '%s, 不同入参缓存失败: %s' % (_tips, str(_calls)))
+
+    def test_metrics(self):
+        # 测试缓存指标统计
+        _reports = []
+        _adapter = MemoryCacheAdapter(
+            metrics={
+                'hot_key_sample_rate': 1, 'hot_key_top_k': 2, 'report_interval': 0.2,
+                'report_handler': lambda metrics: _reports.append(metrics)
+            }
+        )
+
+        _tips = '测试命中统计'
+        _group = 'metrics'
+        _adapter.set('k1', 'v1', group=_group)
+        for _i in range(5):
+            _adapter.get('k1', group=_group)
+        _adapter.get('k2', group=_group)
+        with _adapter.pipeline() as _pipe:
+            _pipe.get('k3', group=_group)
+        _ret = _adapter.get_metrics()
+        self.assertTrue(
+            _ret['groups'][_group]['hits'] == 5 and _ret['groups'][_group]['misses'] == 2,
+            '%s, 命中统计失败: %s' % (_tips, str(_ret['groups']))
+        )
+        self.assertTrue(_ret['latency']['get']['count'] == 7, '%s, 耗时统计失败: %s' % (_tips, str(_ret['latency'])))
+
+        _tips = '测试热点key'
+        self.assertTrue(
+            len(_ret['hot_keys']) == 2 and _ret['hot_keys'][0]['name'] == 'k1' and _ret['hot_keys'][0]['count'] >= 6,
+            '%s, 热点key统计失败: %s' % (_tips, str(_ret['hot_keys']))
+        )
+
+        _tips = '测试定时输出'
+        time.sleep(0.3)
+        self.assertTrue(len(_reports) > 0, '%s, 定时输出失败' % _tips)
+        _ret = _adapter.get_metrics()
+        self.assertTrue(len(_ret['groups']) == 0, '%s, 输出后重置失败: %s' % (_tips, str(_ret)))
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    unittest.main()
@@ -10,12 +10,16 @@
 import os
 import sys
 import time
+import threading
 import unittest
+from unittest import mock
+import fakeredis
 from HiveNetCore.utils.test_tool import TestTool
 # 根据当前文件路径将包路径纳入, 在非安装的情况下可以引用到
 sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir)))
-from HiveNetMicro.plugins.extend.cache_redis import RedisCacheAdapter
+from HiveNetMicro.core.utils.redis_tool import RedisTool
+from HiveNetMicro.plugins.cache_redis import RedisCacheAdapter
 
 
 #############################
@@ -36,6 +40,36 @@ def load_handler_dict(cache_config, dc):
     return dc
 
 
+LOAD_SLOW_TIMES = []
+
+
+def load_handler_slow(cache_config, value):
+    LOAD_SLOW_TIMES.append(time.time())
+    time.sleep(0.5)
+    return value
+
+
+REFRESH_COUNT = [0]
+
+
+def load_handler_refresh(cache_config):
+    REFRESH_COUNT[0] += 1
+    return REFRESH_COUNT[0]
+
+
+DELTA_SOURCE = {'version': 1, 'datas': {'a': 1, 'b': 2}, 'upserts': {}, 'deletes': []}
+
+
+def load_handler_delta(cache_config):
+    if cache_config['version'] is None:
+        return {'version': DELTA_SOURCE['version'], 'full': True, 'datas': DELTA_SOURCE['datas']}
+
+    return {
+        'version': DELTA_SOURCE['version'], 'upserts': DELTA_SOURCE['upserts'],
+        'deletes': DELTA_SOURCE['deletes']
+    }
+
+
 #############################
 # 检查函数
 #############################
@@ -47,8 +81,24 @@ def check_handler(cache_config, is_ok):
 class TestRedisCacheAdapter(unittest.TestCase):
     """
     测试redis缓存服务
+    注: 使用fakeredis模拟redis服务, 同一个测试用例中创建的适配器连接同一个模拟服务
     """
 
+    def setUp(self):
+        self.fake_server = fakeredis.FakeServer()
+
+        def _create_clients(redis_para: dict = None, **kwargs):
+            _client = fakeredis.FakeRedis(
+                server=self.fake_server, decode_responses=(redis_para or {}).get('decode_responses', False)
+            )
+            return _client, _client
+
+        self.patcher = mock.patch.object(RedisTool, 'create_clients', side_effect=_create_clients)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
     def test_common(self):
         # 测试通用缓存操作
         _adapter = RedisCacheAdapter(
@@ -410,6 +460,114 @@ class TestRedisCacheAdapter(unittest.TestCase):
             TestTool.cmp_list(_ret, []), '%s, 检查删除name失败: %s' % (_tips, str(_ret))
         )
 
+    def test_pipeline(self):
+        # 测试批量处理管道
+        _adapter = RedisCacheAdapter(
+            redis_para={
+                'host': '127.0.0.1'
+            }
+        )
+
+        _tips = '测试管道批量执行'
+        _group = 'pipeline'
+        _adapter.delete_group(_group)
+        with _adapter.pipeline() as _pipe:
+            _pipe.set('p1', 10, group=_group)
+            _pipe.get('p1', group=_group)
+            _pipe.hmset('pd', {'a': 'val_a', 'b': 2}, group=_group)
+            _pipe.hgetall('pd', group=_group)
+            _pipe.incr_counter('pc', amount=3, group=_group)
+
+        _ret = _pipe.results
+        self.assertTrue(
+            TestTool.cmp_list(_ret, [True, 10, True, {'a': 'val_a', 'b': 2}, 3]),
+            '%s, 管道执行结果失败: %s' % (_tips, str(_ret))
+        )
+
+        _tips = '测试事务管道'
+        with _adapter.pipeline(transaction=True) as _pipe:
+            _pipe.rpush('pl', [1, 'str'], group=_group)
+            _pipe.list_range('pl', group=_group)
+
+        _ret = _pipe.results[-1]
+        self.assertTrue(
+            TestTool.cmp_list(_ret, [1, 'str']), '%s, 事务管道执行结果失败: %s' % (_tips, str(_ret))
+        )
+
+        _tips = '测试批量处理函数'
+        _ret = _adapter.mset({'m1': 1, 'm2': 2}, group=_group, ex=1)
+        self.assertTrue(_ret, '%s, 带超时批量设置失败: %s' % (_tips, str(_ret)))
+        _ret = _adapter.mset_ex({'e1': 1, 'e2': 2}, group=_group, ex={'e1': 1})
+        self.assertTrue(_ret, '%s, mset_ex设置失败: %s' % (_tips, str(_ret)))
+        time.sleep(1.1)
+        _ret = _adapter.mget(['m1', 'm2', 'e1', 'e2'], group=_group)
+        self.assertTrue(
+            TestTool.cmp_list(_ret, [None, None, None, 2]), '%s, 检查批量设置超时失败: %s' % (_tips, str(_ret))
+        )
+
+        _ret = _adapter.mhset({'h1': {'a': 1}, 'h2': {'b': 'val_b'}}, group=_group)
+        self.assertTrue(_ret, '%s, mhset设置失败: %s' % (_tips, str(_ret)))
+        _ret = _adapter.hgetall('h2', group=_group)
+        self.assertTrue(
+            TestTool.cmp_dict(_ret, {'b': 'val_b'}), '%s, 检查mhset设置失败: %s' % (_tips, str(_ret))
+        )
+
+        _ret = _adapter.mincr({'c1': 2, 'c2': -1}, group=_group)
+        self.assertTrue(
+            TestTool.cmp_dict(_ret, {'c1': 2, 'c2': -1}), '%s, mincr处理失败: %s' % (_tips, str(_ret))
+        )
+
+    def test_serializer(self):
+        # 测试缓存值序列化及压缩
+        _adapter = RedisCacheAdapter(
+            redis_para={
+                'host': '127.0.0.1'
+            },
+            serializer={'format': 'msgpack', 'compress': 'zlib', 'compress_threshold': 10},
+            group_serializers={
+                'serializer_pickle': {'format': 'pickle', 'compress': 'lz4', 'compress_threshold': 0}
+            }
+        )
+
+        _tips = '测试msgpack格式及压缩'
+        _group = 'serializer'
+        _adapter.delete_group(_group)
+        _value = {'a': [1, 2, 'x' * 100], 'b': None}
+        _adapter.set('s1', _value, group=_group)
+        _ret = _adapter.get('s1', group=_group)
+        self.assertTrue(
+            TestTool.cmp_dict(_ret, _value), '%s, 获取值失败: %s' % (_tips, str(_ret))
+        )
+        _adapter.set('s2', '\x00str', group=_group)
+        _ret = _adapter.get('s2', group=_group)
+        self.assertTrue(_ret == '\x00str', '%s, 获取特殊字符串失败: %s' % (_tips, str(_ret)))
+        _adapter.hmset('h1', {'k1': _value, 'k2': 'v2'}, group=_group)
+        _ret = _adapter.hgetall('h1', group=_group)
+        self.assertTrue(
+            TestTool.cmp_dict(_ret, {'k1': _value, 'k2': 'v2'}), '%s, 获取字典失败: %s' % (_tips, str(_ret))
+        )
+
+        _tips = '测试兼容旧版本json格式'
+        _adapter._redis.set(_adapter._get_real_name('s3', _group), '{$json$}{"a": 1}')
+        _ret = _adapter.get('s3', group=_group)
+        self.assertTrue(TestTool.cmp_dict(_ret, {'a': 1}), '%s, 获取值失败: %s' % (_tips, str(_ret)))
+
+        _tips = '测试分组指定pickle格式'
+        _group = 'serializer_pickle'
+        _adapter.delete_group(_group)
+        _adapter.set('p1', {1: (1, 2)}, group=_group)
+        _ret = _adapter.get('p1', group=_group)
+        self.assertTrue(_ret == {1: (1, 2)}, '%s, 获取值失败: %s' % (_tips, str(_ret)))
+
+        _tips = '测试非pickle格式的分组不反序列化pickle数据'
+        _data = _adapter._redis.get(_adapter._get_real_name('p1', _group))
+        _adapter._redis.set(_adapter._get_real_name('s4', 'serializer'), _data)
+        try:
+            _ret = _adapter.get('s4', group='serializer')
+            self.assertTrue(False, '%s, 未抛出异常: %s' % (_tips, str(_ret)))
+        except RuntimeError:
+            pass
+
     def test_auto_cache(self):
         # 先清除数据
         _adapter_1 = RedisCacheAdapter(
@@ -522,6 +680,121 @@ class TestRedisCacheAdapter(unittest.TestCase):
         )
 
 
+    def test_auto_cache_stampede(self):
+        # 测试自动缓存的并发加载保护
+        _adapter = RedisCacheAdapter(
+            redis_para={
+                'host': '127.0.0.1'
+            }
+        )
+        _adapter.delete('test_stampede', group='test')
+        _adapter.delete('test_swr', group='test')
+
+        _tips = '测试并发获取只加载一次'
+        LOAD_SLOW_TIMES.clear()
+        _adapter.set_auto_cache(
+            'test_stampede', load_handler_slow, group='test', load_args=['stampede_val'], ex=10
+        )
+        _results = []
+        _threads = [
+            threading.Thread(
+                target=lambda: _results.append(_adapter.get_auto_cache('test_stampede', group='test'))
+            ) for _i in range(5)
+        ]
+        for _thread in _threads:
+            _thread.start()
+        for _thread in _threads:
+            _thread.join()
+
+        self.assertTrue(len(LOAD_SLOW_TIMES) == 1, '%s, 加载次数错误: %d' % (_tips, len(LOAD_SLOW_TIMES)))
+        self.assertTrue(
+            TestTool.cmp_list(_results, ['stampede_val'] * 5), '%s, 获取结果错误: %s' % (_tips, str(_results))
+        )
+
+        _tips = '测试过期后返回旧值并后台刷新'
+        LOAD_SLOW_TIMES.clear()
+        _adapter.set_auto_cache(
+            'test_swr', load_handler_slow, group='test', cache_type='dict', load_args=[{'a': 'val_a'}],
+            ex=1, stale_while_revalidate=True
+        )
+        _ret = _adapter.hget_auto_cache('test_swr', 'a', group='test')
+        self.assertTrue(_ret == 'val_a', '%s, 首次加载失败: %s' % (_tips, str(_ret)))
+        time.sleep(1.1)
+        _start = time.time()
+        _ret = _adapter.hget_auto_cache('test_swr', 'a', group='test')
+        self.assertTrue(
+            _ret == 'val_a' and time.time() - _start < 0.5, '%s, 过期后获取旧值失败: %s' % (_tips, str(_ret))
+        )
+        time.sleep(1)
+        self.assertTrue(len(LOAD_SLOW_TIMES) == 2, '%s, 后台刷新失败: %d' % (_tips, len(LOAD_SLOW_TIMES)))
+
+
+    def test_auto_cache_refresh(self):
+        # 测试自动缓存的定时刷新
+        _adapter = RedisCacheAdapter(
+            redis_para={
+                'host': '127.0.0.1'
+            }
+        )
+        _adapter.delete('test_refresh', group='test')
+
+        _tips = '测试按间隔定时刷新'
+        REFRESH_COUNT[0] = 0
+        _adapter.set_auto_cache(
+            'test_refresh', load_handler_refresh, group='test', load_on_init=True, refresh_interval=0.5
+        )
+        _ret = _adapter.get_auto_cache('test_refresh', group='test')
+        self.assertTrue(_ret == 1, '%s, 初始化加载失败: %s' % (_tips, str(_ret)))
+        time.sleep(1.2)
+        _ret = _adapter.get_auto_cache('test_refresh', group='test')
+        self.assertTrue(_ret >= 3, '%s, 定时刷新失败: %s' % (_tips, str(_ret)))
+
+        _tips = '测试移除配置后停止刷新'
+        _adapter.remove_auto_cache('test_refresh', group='test')
+        _last = _adapter.get('test_refresh', group='test')
+        time.sleep(1)
+        _ret = _adapter.get('test_refresh', group='test')
+        self.assertTrue(_ret == _last, '%s, 停止刷新失败: %s' % (_tips, str(_ret)))
+
+
+    def test_auto_cache_incremental(self):
+        # 测试自动缓存的增量加载
+        _adapter = RedisCacheAdapter(
+            redis_para={
+                'host': '127.0.0.1'
+            }
+        )
+        _adapter.delete('test_delta', group='test')
+
+        _tips = '测试首次全量加载'
+        _adapter.set_auto_cache(
+            'test_delta', load_handler_delta, group='test', cache_type='dict',
+            incremental=True, delta_max_size=3
+        )
+        _ret = _adapter.hgetall_auto_cache('test_delta', group='test')
+        self.assertTrue(
+            TestTool.cmp_dict(_ret, {'a': 1, 'b': 2}), '%s, 全量加载失败: %s' % (_tips, str(_ret))
+        )
+
+        _tips = '测试增量更新'
+        DELTA_SOURCE.update({'version': 2, 'upserts': {'c': 3}, 'deletes': ['a']})
+        _adapter.load_auto_cache('test_delta', group='test')
+        _ret = _adapter.hgetall('test_delta', group='test')
+        self.assertTrue(
+            TestTool.cmp_dict(_ret, {'b': 2, 'c': 3}), '%s, 增量更新失败: %s' % (_tips, str(_ret))
+        )
+
+        _tips = '测试变更过多改为全量加载'
+        DELTA_SOURCE.update({
+            'version': 3, 'datas': {'x': 1}, 'upserts': {'k%d' % _i: _i for _i in range(5)}, 'deletes': []
+        })
+        _adapter.load_auto_cache('test_delta', group='test')
+        _ret = _adapter.hgetall('test_delta', group='test')
+        self.assertTrue(
+            TestTool.cmp_dict(_ret, {'x': 1}), '%s, 全量加载失败: %s' % (_tips, str(_ret))
+        )
+
+
 if __name__ == '__main__':
     # 当程序自己独立运行时执行的操作
     unittest.main()
@@ -11,19 +11,31 @@ import os
 import sys
 import time
 import copy
+import asyncio
 import unittest
+from unittest import mock
+import fakeredis
 from HiveNetCore.utils.test_tool import TestTool
 # 根据当前文件路径将包路径纳入, 在非安装的情况下可以引用到
 sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir)))
+from HiveNetMicro.core.utils.redis_tool import RedisTool
 from HiveNetMicro.plugins.cluster_redis import RedisClusterAdapter
+from HiveNetMicro.interface.adapter.cluster import ClusterRateLimiter
 
 
 # 控制测试的字典
 TEST_CONTROL = {
     'single': True,
     'mutiple': True,
-    'event': True
+    'event': True,
+    'event_block': True,
+    'master_token': True,
+    'async_mode': True,
+    'broadcast_delivery': True,
+    'partition': True,
+    'lock': True,
+    'rate_limit': True
 }
 
 
@@ -65,8 +77,24 @@ INIT_CONFIG = {
 class TestRedisClusterAdapter(unittest.TestCase):
     """
     测试Redis集群功能支持适配器
+    注: 使用fakeredis模拟redis服务, 同一个测试用例中创建的适配器连接同一个模拟服务
     """
 
+    def setUp(self):
+        self.fake_server = fakeredis.FakeServer()
+
+        def _create_clients(redis_para: dict = None, **kwargs):
+            _client = fakeredis.FakeRedis(
+                server=self.fake_server, decode_responses=(redis_para or {}).get('decode_responses', False)
+            )
+            return _client, _client
+
+        self.patcher = mock.patch.object(RedisTool, 'create_clients', side_effect=_create_clients)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
     def test_single(self):
         if not TEST_CONTROL['single']:
             return
@@ -445,6 +473,353 @@ class TestRedisClusterAdapter(unittest.TestCase):
             _ret.is_success(), '%s, deregister_cluster adapter3 error %s' % (_tips, _ret)
         )
 
+    def test_master_token(self):
+        if not TEST_CONTROL['master_token']:
+            return
+
+        _tips = '测试主服务抢占及防护令牌'
+        print(_tips)
+
+        _init_config = copy.deepcopy(INIT_CONFIG)
+        _init_config['heart_beat'] = 0.5
+        _init_config['enable_event'] = False
+        _adapter1 = RedisClusterAdapter(init_config=copy.deepcopy(_init_config))
+        _ret = _adapter1.register_cluster()
+        self.assertTrue(_ret.is_success(), '%s, register_cluster adapter1 error %s' % (_tips, _ret))
+        _init_config['server_id'] = '02'
+        _init_config['app_name'] = 'app_02'
+        _adapter2 = RedisClusterAdapter(init_config=copy.deepcopy(_init_config))
+        _ret = _adapter2.register_cluster()
+        self.assertTrue(_ret.is_success(), '%s, register_cluster adapter2 error %s' % (_tips, _ret))
+
+        _token1 = _adapter1.master_token
+        self.assertTrue(
+            _adapter1.master and not _adapter2.master and _token1 is not None and _adapter2.master_token is None,
+            '%s, own master error: %s, %s' % (_tips, str(_token1), str(_adapter2.master_token))
+        )
+        time.sleep(1)  # 主服务续约
+        self.assertTrue(
+            _adapter1.master and _adapter1.master_token == _token1 and _adapter1.check_master_token(_token1),
+            '%s, master renew error: %s' % (_tips, str(_adapter1.master_token))
+        )
+
+        _tips = '测试主服务切换后令牌递增'
+        _ret = _adapter1.deregister_cluster()
+        self.assertTrue(_ret.is_success(), '%s, deregister_cluster adapter1 error %s' % (_tips, _ret))
+        time.sleep(1)  # 等待adapter2通过心跳抢占
+        _token2 = _adapter2.master_token
+        self.assertTrue(
+            _adapter2.master and _token2 is not None and _token2 > _token1,
+            '%s, failover error: %s, %s' % (_tips, str(_token1), str(_token2))
+        )
+        self.assertTrue(_adapter2.check_master_token(_token2), '%s, check new token error' % _tips)
+        self.assertTrue(
+            not _adapter2.check_master_token(_token1) and not _adapter1.check_master_token(_token1),
+            '%s, old token should be rejected' % _tips
+        )
+
+        _adapter2.deregister_cluster()
+
+    def test_event_block(self):
+        if not TEST_CONTROL['event_block']:
+            return
+
+        _tips = '测试阻塞模式接收事件'
+        print(_tips)
+
+        _received = []
+
+        def _block_event(context: dict, event: str, para):
+            _received.append((time.time(), context['adapter']._server_id, para))
+
+        _init_config = copy.deepcopy(INIT_CONFIG)
+        _init_config['event_mode'] = 'block'
+        _init_config['event_block_timeout'] = 1.0
+        _init_config['event_interval'] = 5.0  # 轮询间隔远大于期望的投递时长
+        _adapters = []
+        for _server_id in ('01', '02'):
+            _init_config['server_id'] = _server_id
+            _init_config['app_name'] = 'app_%s' % _server_id
+            _adapter = RedisClusterAdapter(init_config=copy.deepcopy(_init_config))
+            _ret = _adapter.register_cluster()
+            self.assertTrue(_ret.is_success(), '%s, register_cluster adapter%s error %s' % (_tips, _server_id, _ret))
+            _adapter.register_event('block_event', _block_event)
+            _adapters.append(_adapter)
+
+        _start = time.time()
+        _ret = _adapters[0].emit(
+            'block_event', {'no': 1}, _init_config['namespace'], _init_config['sys_id'], _init_config['module_id'], '02'
+        )
+        self.assertTrue(_ret.is_success(), '%s, emit error %s' % (_tips, _ret))
+        for _i in range(20):
+            if len(_received) > 0:
+                break
+            time.sleep(0.05)
+
+        self.assertTrue(
+            len(_received) == 1 and _received[0][1] == '02' and _received[0][2] == {'no': 1},
+            '%s, receive error: %s' % (_tips, str(_received))
+        )
+        self.assertTrue(
+            _received[0][0] - _start < 0.5, '%s, deliver too slow: %s' % (_tips, str(_received[0][0] - _start))
+        )
+
+        for _adapter in _adapters:
+            _adapter._event_thread_stop = True
+            _adapter.deregister_cluster()
+
+    def test_async_mode(self):
+        if not TEST_CONTROL['async_mode']:
+            return
+
+        _tips = '测试asyncio运行模式'
+        print(_tips)
+
+        _init_config = copy.deepcopy(INIT_CONFIG)
+        _init_config['run_mode'] = 'asyncio'
+        _init_config['expire'] = 2.0
+        _init_config['heart_beat'] = 0.5
+        _init_config['event_interval'] = 0.2
+        _adapter1 = RedisClusterAdapter(init_config=copy.deepcopy(_init_config))
+        _init_config['run_mode'] = 'thread'
+        _init_config['enable_event'] = False
+        _init_config['server_id'] = '02'
+        _init_config['app_name'] = 'app_02'
+        _adapter2 = RedisClusterAdapter(init_config=copy.deepcopy(_init_config))
+
+        async def async_mode():
+            _received = []
+            _loop = asyncio.get_running_loop()
+
+            async def _async_event(context: dict, event: str, para):
+                _received.append((asyncio.get_running_loop() is _loop, para))
+
+            _adapter1.register_event('async_event', _async_event)
+            _ret = _adapter1.register_cluster()
+            self.assertTrue(_ret.is_success(), '%s, register_cluster error %s' % (_tips, _ret))
+            await _adapter1.start_async_tasks()
+
+            _ret = _adapter2.emit(
+                'async_event', {'no': 1}, _init_config['namespace'], _init_config['sys_id'],
+                _init_config['module_id'], '01'
+            )
+            self.assertTrue(_ret.is_success(), '%s, emit error %s' % (_tips, _ret))
+            await asyncio.sleep(2.5)  # 超过注册超时时间, 需通过心跳任务续约
+
+            _clusters = _adapter2.get_cluster_list(
+                _init_config['namespace'], _init_config['sys_id'], _init_config['module_id']
+            )
+            await _adapter1.stop_async_tasks()
+            return _received, _clusters
+
+        _received, _clusters = asyncio.run(async_mode())
+        self.assertTrue(
+            _received == [(True, {'no': 1})], '%s, dispatch event error: %s' % (_tips, str(_received))
+        )
+        self.assertTrue(
+            [_info['server_id'] for _info in _clusters] == ['01'] and _clusters[0]['master'],
+            '%s, heart beat task error: %s' % (_tips, str(_clusters))
+        )
+        self.assertTrue(len(_adapter1._async_tasks) == 0, '%s, stop async tasks error' % _tips)
+
+        _adapter1.deregister_cluster()
+
+    def test_broadcast_delivery(self):
+        if not TEST_CONTROL['broadcast_delivery']:
+            return
+
+        _tips = '测试广播投递统计'
+        print(_tips)
+
+        _init_config = copy.deepcopy(INIT_CONFIG)
+        _init_config['event_interval'] = 30.0  # 测试期间不消费事件
+        _adapters = []
+        for _server_id in ('01', '02', '03'):
+            _init_config['server_id'] = _server_id
+            _init_config['app_name'] = 'app_%s' % _server_id
+            _adapter = RedisClusterAdapter(init_config=copy.deepcopy(_init_config))
+            _ret = _adapter.register_cluster()
+            self.assertTrue(_ret.is_success(), '%s, register_cluster adapter%s error %s' % (_tips, _server_id, _ret))
+            _adapters.append(_adapter)
+
+        _ret = _adapters[0].broadcast('broadcast_event', {'no': 1}, _init_config['namespace'])
+        self.assertTrue(
+            _ret.is_success() and _ret.delivery['targets'] == 3 and _ret.delivery['delivered'] == 3
+            and _ret.delivery['failed'] == 0 and _ret.delivery['duration'] > 0,
+            '%s, delivery error: %s' % (_tips, str(_ret.delivery))
+        )
+        _ret = [_adapter._redis.llen(_adapter._cache_events) for _adapter in _adapters]
+        self.assertTrue(_ret == [1, 1, 1], '%s, event queue error: %s' % (_tips, str(_ret)))
+
+        _tips = '测试广播部分投递失败'
+        # 将adapter3的事件队列替换为字符串, 使RPUSH失败
+        _adapters[2]._redis.set(_adapters[2]._cache_events, 'x')
+        _ret = _adapters[0].broadcast(
+            'broadcast_event', {'no': 2}, _init_config['namespace'], _init_config['sys_id'],
+            _init_config['module_id']
+        )
+        self.assertTrue(
+            not _ret.is_success() and _ret.delivery['targets'] == 3 and _ret.delivery['delivered'] == 2
+            and _ret.delivery['failed'] == 1,
+            '%s, delivery error: %s' % (_tips, str(_ret.delivery))
+        )
+
+        for _adapter in _adapters:
+            _adapter.deregister_cluster()
+
+    def test_partition(self):
+        if not TEST_CONTROL['partition']:
+            return
+
+        _tips = '测试成员视图及分区分配'
+        print(_tips)
+
+        # 清理无效服务
+        _init_config = copy.deepcopy(INIT_CONFIG)
+        _adapter_manager = RedisClusterAdapter(init_config=_init_config, is_manage=True)
+        _ret = _adapter_manager.clear_all_cluster(
+            _init_config['namespace']
+        )
+        self.assertTrue(_ret, '%s, clear all cluster error: %s' % (_tips, str(_ret)))
+
+        _init_config = copy.deepcopy(INIT_CONFIG)
+        _init_config['heart_beat'] = 0.5
+        _init_config['enable_event'] = False
+        _init_config['enable_member_view'] = True
+        _adapters = []
+        for _server_id in ('01', '02', '03'):
+            _init_config['server_id'] = _server_id
+            _init_config['app_name'] = 'app_%s' % _server_id
+            _adapter = RedisClusterAdapter(init_config=copy.deepcopy(_init_config))
+            _ret = _adapter.register_cluster()
+            self.assertTrue(
+                _ret.is_success(), '%s, register_cluster adapter%s error %s' % (_tips, _server_id, _ret)
+            )
+            _adapters.append(_adapter)
+
+        time.sleep(1.1)  # 等待成员视图刷新
+        _ret = [len(_adapter.get_members()) for _adapter in _adapters]
+        self.assertTrue(_ret == [3, 3, 3], '%s, get_members error %s' % (_tips, str(_ret)))
+        _ret = _adapters[2].get_member_master()
+        self.assertTrue(
+            _ret is not None and _ret['server_id'] == '01', '%s, get_member_master error %s' % (_tips, str(_ret))
+        )
+
+        # 注册分区集合
+        for _adapter in _adapters:
+            _ret = _adapter.register_partition_set('jobs', 64)
+            self.assertTrue(_ret.is_success(), '%s, register_partition_set error %s' % (_tips, _ret))
+
+        _ret = [_adapter.get_partitions('jobs') for _adapter in _adapters]
+        self.assertTrue(
+            sorted(_ret[0] + _ret[1] + _ret[2]) == list(range(64)),
+            '%s, partitions assign error %s' % (_tips, str(_ret))
+        )
+
+        # 成员离开后重新分配, 其他成员原有的分区不变
+        _before = _ret
+        _ret = _adapters[2].deregister_cluster()
+        self.assertTrue(_ret.is_success(), '%s, deregister_cluster adapter3 error %s' % (_tips, _ret))
+        time.sleep(1.1)
+        _ret = [_adapter.get_partitions('jobs') for _adapter in _adapters]
+        self.assertTrue(
+            sorted(_ret[0] + _ret[1]) == list(range(64)) and len(_ret[2]) == 0 and
+            set(_before[0]).issubset(_ret[0]) and set(_before[1]).issubset(_ret[1]),
+            '%s, partitions rebalance error %s' % (_tips, str(_ret))
+        )
+
+        for _adapter in _adapters[0: 2]:
+            _adapter.deregister_cluster()
+
+    def test_lock(self):
+        if not TEST_CONTROL['lock']:
+            return
+
+        _tips = '测试分布式锁及信号量'
+        print(_tips)
+
+        _init_config = copy.deepcopy(INIT_CONFIG)
+        _init_config['enable_event'] = False
+        _adapter1 = RedisClusterAdapter(init_config=copy.deepcopy(_init_config))
+        _init_config['server_id'] = '02'
+        _adapter2 = RedisClusterAdapter(init_config=copy.deepcopy(_init_config))
+
+        _lock1 = _adapter1.lock('test_lock', ttl=0.6)
+        _ret = _lock1.acquire()
+        self.assertTrue(_ret and _lock1.token is not None, '%s, lock1 acquire error' % _tips)
+        _ret = _adapter2.lock('test_lock', timeout=0.3).acquire()
+        self.assertTrue(not _ret, '%s, lock2 acquire should be failed' % _tips)
+
+        time.sleep(1)  # 自动续约
+        _ret = _adapter2.lock('test_lock', blocking=False).acquire()
+        self.assertTrue(not _ret and _lock1.acquired, '%s, lock1 auto renew error' % _tips)
+        _token = _lock1.token
+        _ret = _lock1.release()
+        self.assertTrue(_ret, '%s, lock1 release error' % _tips)
+
+        with _adapter2.lock('test_lock') as _lock2:
+            self.assertTrue(_lock2.token > _token, '%s, fencing token error: %s' % (_tips, str(_lock2.token)))
+
+        _tips = '测试信号量'
+        _sems = [_adapter1.semaphore('test_sem', 2, blocking=False) for _i in range(3)]
+        _ret = [_sem.acquire() for _sem in _sems]
+        self.assertTrue(_ret == [True, True, False], '%s, acquire error: %s' % (_tips, str(_ret)))
+        for _sem in _sems:
+            _sem.release()
+
+        _tips = '测试异步锁'
+
+        async def async_lock():
+            async with _adapter1.lock('test_async_lock', ttl=0.6) as _lock:
+                await asyncio.sleep(1)
+                return _lock.acquired
+
+        _ret = asyncio.run(async_lock())
+        self.assertTrue(_ret, '%s, async lock error' % _tips)
+
+    def test_rate_limit(self):
+        if not TEST_CONTROL['rate_limit']:
+            return
+
+        _tips = '测试集群限流'
+        print(_tips)
+
+        _init_config = copy.deepcopy(INIT_CONFIG)
+        _init_config['enable_event'] = False
+        _adapter1 = RedisClusterAdapter(init_config=copy.deepcopy(_init_config))
+        _init_config['server_id'] = '02'
+        _adapter2 = RedisClusterAdapter(init_config=copy.deepcopy(_init_config))
+
+        _limiter1 = _adapter1.rate_limiter('test_rate', 4, period=1)
+        _limiter2 = _adapter2.rate_limiter('test_rate', 4, period=1)
+        _ret = [_limiter.acquire(key='t1')[0] for _limiter in (_limiter1, _limiter2, _limiter1, _limiter2, _limiter1)]
+        self.assertTrue(_ret == [True, True, True, True, False], '%s, share quota error: %s' % (_tips, str(_ret)))
+        _ret = _limiter2.acquire(key='t2')
+        self.assertTrue(_ret[0], '%s, different key error: %s' % (_tips, str(_ret)))
+        _ret = _limiter2.acquire(key='t1')
+        self.assertTrue(not _ret[0] and 0 < _ret[1] <= 0.25, '%s, retry after error: %s' % (_tips, str(_ret)))
+        time.sleep(_ret[1])
+        _ret = _limiter2.acquire(key='t1')
+        self.assertTrue(_ret[0], '%s, acquire after wait error: %s' % (_tips, str(_ret)))
+
+        _tips = '测试预取令牌'
+        _limiter1 = _adapter1.rate_limiter('test_prefetch', 4, period=1, prefetch=3)
+        _limiter2 = _adapter2.rate_limiter('test_prefetch', 4, period=1, prefetch=3)
+        _ret = _limiter1.acquire()
+        self.assertTrue(_ret[0] and _limiter1._states[''][0] == 2, '%s, prefetch error: %s' % (_tips, str(_ret)))
+        _ret = [_limiter2.acquire()[0], _limiter2.acquire()[0], _limiter1.acquire()[0], _limiter1.acquire()[0]]
+        self.assertTrue(_ret == [True, False, True, True], '%s, local tokens error: %s' % (_tips, str(_ret)))
+
+        _tips = '测试本地限流'
+        _limiter = ClusterRateLimiter(None, 'test_local', 2, period=1)
+
+        async def async_acquire():
+            return [(await _limiter.async_acquire())[0] for _i in range(3)]
+
+        _ret = asyncio.run(async_acquire())
+        self.assertTrue(_ret == [True, True, False], '%s, local acquire error: %s' % (_tips, str(_ret)))
+
+
 
 if __name__ == '__main__':
     # 当程序自己独立运行时执行的操作
@@ -10,12 +10,43 @@
 import os
 import sys
 import time
+import json
+import asyncio
+import threading
 import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from HiveNetCore.utils.run_tool import AsyncTools
 # 根据当前文件路径将包路径纳入, 在非安装的情况下可以引用到
 sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir)))
 import HiveNetMicro.core.nacos as nacos
+from HiveNetMicro.core.nacos.exception import NacosRequestException
+
+
+class RecordHandler(BaseHTTPRequestHandler):
+    """
+    记录请求信息的http处理类, 返回的状态码由server.status指定
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def _deal(self):
+        _length = int(self.headers.get('Content-Length', 0))
+        self.server.requests.append({
+            'method': self.command, 'path': self.path, 'headers': dict(self.headers),
+            'body': self.rfile.read(_length).decode('utf-8'), 'client_port': self.client_address[1]
+        })
+        _content = b'ok'
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', str(len(_content)))
+        self.end_headers()
+        self.wfile.write(_content)
+
+    do_GET = _deal
+    do_POST = _deal
+    do_PUT = _deal
+
+    def log_message(self, *args):
+        pass
 
 
 class TestNacos(unittest.TestCase):
@@ -89,6 +120,134 @@ class TestNacos(unittest.TestCase):
         print('async_send_heartbeat:', _result)
 
 
+class TestNacosTransport(unittest.TestCase):
+    """
+    测试nacos客户端的请求传输层
+    """
+
+    def setUp(self):
+        self.servers = []
+        for _i in range(2):
+            _server = ThreadingHTTPServer(('127.0.0.1', 0), RecordHandler)
+            _server.daemon_threads = True
+            _server.requests = []
+            _server.status = 200
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+            self.servers.append(_server)
+
+        self.client = nacos.NacosClient(','.join(
+            ['127.0.0.1:%d' % _server.server_address[1] for _server in self.servers]
+        ))
+        # 只连接第1个服务端的客户端
+        self.single_client = nacos.NacosClient('127.0.0.1:%d' % self.servers[0].server_address[1])
+
+    def tearDown(self):
+        for _client in (self.client, self.single_client):
+            for _state in _client.transport.servers:
+                _client.transport._drop_sync_conn(_state)
+        for _server in self.servers:
+            _server.shutdown()
+            _server.server_close()
+
+    def test_sync_request(self):
+        _tips = '测试表单请求的内容类型'
+        _resp = self.single_client._do_sync_req('/nacos/v1/ns/instance', data={'ip': '10.0.0.1'}, method='POST')
+        self.assertTrue(_resp.read() == b'ok', '%s, 响应错误' % _tips)
+        _req = self.servers[0].requests[-1]
+        self.assertTrue(
+            _req['headers'].get('Content-Type') == 'application/x-www-form-urlencoded' and _req['body'] == 'ip=10.0.0.1',
+            '%s, 请求错误: %s' % (_tips, str(_req))
+        )
+        self.single_client._do_sync_req(
+            '/nacos/v1/cs/configs', data={'a': '1'}, method='POST', headers={'content-type': 'text/plain'}
+        )
+        _req = self.servers[0].requests[-1]
+        self.assertTrue(
+            _req['headers'].get('content-type') == 'text/plain' and 'Content-Type' not in _req['headers'],
+            '%s, 覆盖了调用方的内容类型: %s' % (_tips, str(_req['headers']))
+        )
+
+        _tips = '测试长连接复用'
+        self.single_client._do_sync_req('/nacos/v1/ns/instance/list', params={'serviceName': 'a'})
+        _ports = set([_req['client_port'] for _req in self.servers[0].requests])
+        self.assertTrue(len(_ports) == 1, '%s, 未复用连接: %s' % (_tips, str(_ports)))
+
+    def test_async_request(self):
+        _tips = '测试异步表单请求的内容类型'
+
+        async def _request():
+            _resp = await self.single_client._do_async_req('/nacos/v1/ns/instance', data={'ip': '10.0.0.1'}, method='PUT')
+            await self.single_client._do_async_req('/nacos/v1/ns/instance/list', params={'serviceName': 'a'})
+            return _resp
+
+        _loop = asyncio.new_event_loop()
+        _resp = _loop.run_until_complete(_request())
+        self.assertTrue(_resp['status'] == 200, '%s, 响应错误: %s' % (_tips, str(_resp)))
+        _req = self.servers[0].requests[0]
+        self.assertTrue(
+            _req['headers'].get('Content-Type') == 'application/x-www-form-urlencoded' and _req['body'] == 'ip=10.0.0.1',
+            '%s, 请求错误: %s' % (_tips, str(_req))
+        )
+        _ports = set([_req['client_port'] for _req in self.servers[0].requests])
+        self.assertTrue(len(_ports) == 1, '测试异步会话复用连接, 未复用连接: %s' % str(_ports))
+
+        _tips = '测试关闭已关闭事件循环的会话'
+        _old_session = self.single_client.transport._sessions[_loop]
+        _loop.close()
+        _loop = asyncio.new_event_loop()
+        _loop.run_until_complete(self.single_client._do_async_req('/nacos/v1/ns/instance/list'))
+        self.assertTrue(
+            _old_session.closed and len(self.single_client.transport._sessions) == 1, '%s, 会话未关闭' % _tips
+        )
+        _loop.run_until_complete(self.single_client.transport.close_session())
+        _loop.close()
+
+    def test_eject_and_retry_budget(self):
+        _transport = self.client.transport
+
+        def _counts():
+            return [len(_server.requests) for _server in self.servers]
+
+        _tips = '测试服务端失败时重试其他服务端'
+        self.servers[0].status = 503
+        _resp = self.client._do_sync_req('/nacos/v1/ns/instance/list')
+        self.assertTrue(_resp.read() == b'ok' and _counts() == [1, 1], '%s, 请求数错误: %s' % (_tips, str(_counts())))
+        self.client._do_sync_req('/nacos/v1/ns/instance/list')
+        self.assertTrue(_counts() == [1, 2], '%s, 失败的服务端未排在后面: %s' % (_tips, str(_counts())))
+
+        _tips = '测试连续失败的服务端被剔除'
+        _state = _transport.servers[0]
+        for _i in range(nacos.DEFAULTS['TRANSPORT_EJECT_FAILURES'] - 1):
+            _transport.record_failure(_state)
+        self.assertTrue(
+            _state.eject_until > time.monotonic() and _transport.select()[-1] is _state, '%s, 服务端未剔除' % _tips
+        )
+        # 可用的服务端都失败时, 才会尝试被剔除的服务端
+        self.servers[1].status = 503
+        try:
+            self.client._do_sync_req('/nacos/v1/ns/instance/list')
+            self.assertTrue(False, '%s, 未抛出异常' % _tips)
+        except NacosRequestException:
+            pass
+        self.assertTrue(_counts() == [2, 3], '%s, 请求数错误: %s' % (_tips, str(_counts())))
+
+        _tips = '测试服务端恢复后取消剔除'
+        _transport.record_success(_state, 0.01)
+        self.assertTrue(
+            _state.failures == 0 and _state.eject_until == 0 and _transport.select()[0] is _state,
+            '%s, 服务端状态错误' % _tips
+        )
+
+        _tips = '测试重试预算耗尽'
+        self.servers[0].status = 503
+        _transport._retry_tokens = 0
+        try:
+            self.client._do_sync_req('/nacos/v1/ns/instance/list')
+            self.assertTrue(False, '%s, 未抛出异常' % _tips)
+        except NacosRequestException:
+            pass
+        self.assertTrue(_counts() == [3, 3], '%s, 预算耗尽后仍在重试: %s' % (_tips, str(_counts())))
+
 if __name__ == '__main__':
     # 当程序自己独立运行时执行的操作
     unittest.main()
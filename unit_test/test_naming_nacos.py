@@ -25,6 +25,8 @@ from HiveNetCore.utils.run_tool import AsyncTools
 sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), os.path.pardir)))
 from HiveNetMicro.plugins.naming_nacos import NacosNamingAdapter
+from HiveNetMicro.interface.adapter.naming import NamingInstanceSnapshot
+from HiveNetMicro.core.utils.shared_snapshot import SharedSnapshot
 from HiveNetMicro.core.logger_manager import LoggerManager
 from HiveNetMicro.core.global_manager import GlobalManager
 
@@ -155,6 +157,86 @@ class TestNacosNaming(unittest.TestCase):
         _result = _adapter.client.remove_namespace(_namespace)
         print('Remove namespace result: %s' % str(_result))
 
+    def test_instance_snapshot(self):
+        # 测试实例快照的选择
+        _snapshot = NamingInstanceSnapshot([
+            {'instance_id': 'a', 'healthy': True, 'weight': 1.0},
+            {'instance_id': 'b', 'healthy': False, 'weight': 100.0},
+            {'instance_id': 'c', 'healthy': True, 'weight': 3.0},
+            {'instance_id': 'd', 'healthy': True, 'weight': 0.0}
+        ])
+        _ret = [_info['instance_id'] for _info in _snapshot.list()]
+        self.assertTrue(_ret == ['a', 'c', 'd'], msg='list healthy error: %s' % str(_ret))
+
+        _counts = {}
+        for _i in range(4000):
+            _id = _snapshot.choose()['instance_id']
+            _counts[_id] = _counts.get(_id, 0) + 1
+        self.assertTrue(
+            'b' not in _counts and 'd' not in _counts and 2.0 < _counts['c'] / _counts['a'] < 4.5,
+            msg='choose by weight error: %s' % str(_counts)
+        )
+
+        _snapshot = NamingInstanceSnapshot([{'instance_id': 'b', 'healthy': False, 'weight': 1.0}])
+        self.assertTrue(_snapshot.choose() is None, msg='choose healthy only error')
+        _ret = _snapshot.choose(healthy_only=False)
+        self.assertTrue(_ret['instance_id'] == 'b', msg='choose unhealthy error: %s' % str(_ret))
+
+    def test_instance_locality(self):
+        # 测试按位置就近选择实例
+        _snapshot = NamingInstanceSnapshot([
+            {'instance_id': 'a1', 'healthy': True, 'cluster_name': 'c1', 'metadata': {'zone': 'z1'}},
+            {'instance_id': 'a2', 'healthy': False, 'cluster_name': 'c1', 'metadata': {'zone': 'z1'}},
+            {'instance_id': 'b1', 'healthy': True, 'cluster_name': 'c2', 'metadata': {'zone': 'z1'}},
+            {'instance_id': 'c1', 'healthy': True, 'cluster_name': 'c3', 'metadata': {'zone': 'z2'}}
+        ])
+        _levels = [('cluster_name', 'c1'), ('zone', 'z1')]
+        _ret = set(_snapshot.choose_local(_levels)['instance_id'] for _i in range(50))
+        self.assertTrue(_ret == {'a1'}, msg='choose same cluster error: %s' % str(_ret))
+
+        # 本地健康比例不足, 溢出到同区域
+        _ret = set(_snapshot.choose_local(_levels, min_healthy_ratio=0.6)['instance_id'] for _i in range(50))
+        self.assertTrue(_ret == {'a1', 'b1'}, msg='spill over to zone error: %s' % str(_ret))
+
+        # 本地健康实例数不足, 溢出到全部实例
+        _ret = set(_snapshot.choose_local(_levels, min_healthy=3)['instance_id'] for _i in range(100))
+        self.assertTrue(_ret == {'a1', 'b1', 'c1'}, msg='spill over to all error: %s' % str(_ret))
+
+        # 本地位置未设置时跳过
+        _ret = set(_snapshot.choose_local([('cluster_name', None), ('zone', 'z2')])['instance_id'] for _i in range(50))
+        self.assertTrue(_ret == {'c1'}, msg='skip none level error: %s' % str(_ret))
+
+    def test_shared_snapshot(self):
+        # 测试跨进程共享快照的发布和读取
+        _name = 'hnm_test_%d' % os.getpid()
+        _reader = SharedSnapshot(_name, attach_interval=0)
+        self.assertTrue(_reader.version is None and _reader.read() is None, msg='read before create error')
+
+        _writer = SharedSnapshot(_name, size=1024, is_writer=True)
+        try:
+            self.assertTrue(_reader.version is None, msg='version before publish error')
+            _data = {'DEFAULT_GROUP@@svc': [{'instance_id': 'a', 'healthy': True, 'weight': 1.0}]}
+            _version = _writer.publish(_data)
+            _ret = _reader.read()
+            self.assertTrue(
+                _reader.version == _version and _ret == (_version, _data), msg='read error: %s' % str(_ret)
+            )
+
+            _version = _writer.publish({})
+            _ret = _reader.read()
+            self.assertTrue(_ret == (_version, {}), msg='read new version error: %s' % str(_ret))
+
+            try:
+                _writer.publish({'a': 'x' * 2048})
+                self.assertTrue(False, msg='publish oversize data should raise error')
+            except ValueError:
+                pass
+            _ret = _reader.read()
+            self.assertTrue(_ret == (_version, {}), msg='read after oversize error: %s' % str(_ret))
+        finally:
+            _reader.close()
+            _writer.close(unlink=True)
+
 
 if __name__ == '__main__':
     # 当程序自己独立运行时执行的操作
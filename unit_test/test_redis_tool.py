@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""
+测试Redis连接工具的部署模式
+
+@module test_redis_tool
+@file test_redis_tool.py
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+import fakeredis
+# 根据当前文件路径将包路径纳入, 在非安装的情况下可以引用到
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.path.pardir)))
+import HiveNetMicro.core.utils.redis_tool as redis_tool
+from HiveNetMicro.core.utils.redis_tool import RedisTool
+from HiveNetMicro.plugins.cache_redis import RedisCacheAdapter
+
+
+class TestRedisTool(unittest.TestCase):
+    """
+    测试Redis连接工具
+    """
+
+    def test_create_clients(self):
+        _tips = '测试不支持的部署模式'
+        try:
+            RedisTool.create_clients(redis_mode='unknown')
+            self.assertTrue(False, '%s, 未抛出异常' % _tips)
+        except ValueError:
+            pass
+
+        _tips = '测试standalone模式副本读取'
+        _client, _read_client = RedisTool.create_clients(
+            redis_para={'host': '127.0.0.1', 'port': 6379},
+            replica_para={'host': '127.0.0.2'}, read_from_replicas=True
+        )
+        _kwargs = _read_client.connection_pool.connection_kwargs
+        self.assertTrue(
+            _client is not _read_client and _kwargs['host'] == '127.0.0.2' and _kwargs['port'] == 6379,
+            '%s, 副本连接参数错误: %s' % (_tips, str(_kwargs))
+        )
+        _client, _read_client = RedisTool.create_clients(
+            redis_para={'host': '127.0.0.1'}, replica_para={'host': '127.0.0.2'}
+        )
+        self.assertTrue(_client is _read_client, '%s, 未启用副本读取时应使用同一连接' % _tips)
+
+        _tips = '测试cluster模式'
+        with mock.patch.object(redis_tool, 'RedisCluster') as _cluster:
+            _client, _read_client = RedisTool.create_clients(
+                redis_mode='cluster', read_from_replicas=True, redis_para={
+                    'startup_nodes': [{'host': '127.0.0.1', 'port': 7000}, {'host': '127.0.0.2'}],
+                    'max_connections': 10, 'password': 'pwd'
+                }
+            )
+            _kwargs = _cluster.call_args.kwargs
+            _nodes = [(_node.host, _node.port) for _node in _kwargs['startup_nodes']]
+            self.assertTrue(
+                _client is _read_client and _kwargs['read_from_replicas'] and 'max_connections' not in _kwargs
+                and _kwargs['password'] == 'pwd' and _nodes == [('127.0.0.1', 7000), ('127.0.0.2', 6379)],
+                '%s, 集群连接参数错误: %s' % (_tips, str(_kwargs))
+            )
+
+        _tips = '测试sentinel模式'
+        with mock.patch.object(redis_tool, 'Sentinel') as _sentinel:
+            _client, _read_client = RedisTool.create_clients(
+                redis_mode='sentinel', redis_para={'password': 'pwd'}, read_from_replicas=True,
+                sentinel_para={'sentinels': [['127.0.0.1', 26379]], 'service_name': 'svc'}
+            )
+            _args = _sentinel.call_args
+            self.assertTrue(
+                _args.args[0] == [('127.0.0.1', 26379)] and _args.kwargs['password'] == 'pwd',
+                '%s, 哨兵连接参数错误: %s' % (_tips, str(_args))
+            )
+            self.assertTrue(
+                _client is _sentinel.return_value.master_for.return_value
+                and _read_client is _sentinel.return_value.slave_for.return_value,
+                '%s, 主从连接对象错误' % _tips
+            )
+            _sentinel.return_value.master_for.assert_called_with('svc')
+            _sentinel.return_value.slave_for.assert_called_with('svc')
+
+            _client, _read_client = RedisTool.create_clients(
+                redis_mode='sentinel', sentinel_para={'sentinels': [['127.0.0.1', 26379]]}
+            )
+            self.assertTrue(_client is _read_client, '%s, 未启用副本读取时应使用主节点连接' % _tips)
+            _sentinel.return_value.master_for.assert_called_with('mymaster')
+
+    def test_read_routing(self):
+        # 测试缓存适配器的只读命令发送到副本连接
+        _primary = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        _replica = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+        with mock.patch.object(RedisTool, 'create_clients', return_value=(_primary, _replica)):
+            _adapter = RedisCacheAdapter(redis_para={'host': '127.0.0.1'}, read_from_replicas=True)
+
+        _tips = '测试写入发送到主节点'
+        _ret = _adapter.set('k1', 'primary', group='g')
+        self.assertTrue(_ret, '%s, 写入失败: %s' % (_tips, str(_ret)))
+        self.assertTrue(_primary.exists('{$group=g$}_k1') == 1, '%s, 主节点无数据' % _tips)
+        self.assertTrue(_replica.exists('{$group=g$}_k1') == 0, '%s, 副本节点不应有数据' % _tips)
+
+        _tips = '测试读取发送到副本节点'
+        _ret = _adapter.get('k1', group='g')
+        self.assertTrue(_ret is None, '%s, 读取了主节点数据: %s' % (_tips, str(_ret)))
+        _replica.set('{$group=g$}_k1', _primary.get('{$group=g$}_k1'))
+        _ret = _adapter.get('k1', group='g')
+        self.assertTrue(_ret == 'primary', '%s, 读取副本数据失败: %s' % (_tips, str(_ret)))
+        _ret = _adapter.get_group('g')
+        self.assertTrue(_ret == {'k1': 'primary'}, '%s, 分组读取副本数据失败: %s' % (_tips, str(_ret)))
+
+
+if __name__ == '__main__':
+    # 当程序自己独立运行时执行的操作
+    unittest.main()